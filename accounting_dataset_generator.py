@@ -18,6 +18,20 @@ import csv
 import os
 from typing import List, Dict, Tuple
 import uuid
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from tax_engine import TAX_RULES, compute_invoice_amounts
+from value_pools import FakerValuePool
+from columnar_export import ColumnarWriter
+from oracle_loader import ORACLE_TABLES, InsertAllWriter, write_loader_kit
+from db_sink import DatabaseSink
+from compact_tables import from_compact, is_compact, memory_per_million, to_compact
+from counter_rng import CounterRNG
+from dataset_manifest import TABLE_KEYS, DatasetManifest
+from date_windows import date_bounds
+from dataset_stats import TABLE_STATISTICS, DatasetStatistics
+from stage_metrics import advance, measured, timed
 
 print("Script démarré !") 
 fake = Faker('fr_FR')  # Locale français
@@ -25,6 +39,99 @@ random.seed(42)
 np.random.seed(42)
 Faker.seed(42)
 
+
+def _random_dates_between(rng: np.random.Generator, start, end, size=None) -> np.ndarray:
+    """Tire une date uniforme dans [start, end[, élément par élément (même convention que fake.date_between)."""
+    start = np.asarray(start, dtype='datetime64[D]')
+    end = np.asarray(end, dtype='datetime64[D]')
+    span = np.maximum((end - start).astype(np.int64), 0)
+    shape = np.broadcast(start, end).shape if size is None else size
+    offsets = np.floor(rng.random(shape) * span).astype(np.int64)
+    return start + offsets.astype('timedelta64[D]')
+
+
+def _check_csv_header(path: str, columns) -> None:
+    """Vérifie, avant un ajout sans en-tête, que le CSV existant a les colonnes du bloc (même ordre)."""
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        header = next(csv.reader(f), [])
+    if header != list(columns):
+        raise ValueError(f"En-tête de {path} incompatible avec les lignes ajoutées : "
+                         f"{header} au lieu de {list(columns)}")
+
+
+def _as_frame(table) -> pd.DataFrame:
+    """Retourne une table (liste de dicts, DataFrame ou DataFrame compact) sous forme de DataFrame."""
+    if is_compact(table):
+        return from_compact(table)
+    return table if isinstance(table, pd.DataFrame) else pd.DataFrame(table)
+
+
+def _date_column(frame: pd.DataFrame, column: str) -> np.ndarray:
+    """Colonne de dates d'un DataFrame en tableau datetime64[D] (None -> NaT)."""
+    return pd.to_datetime(frame[column]).to_numpy().astype('datetime64[D]')
+
+
+def _format_templates(rng: np.random.Generator, templates: List[str], n: int, **columns) -> np.ndarray:
+    """Tire un modèle de libellé par ligne et le formate groupe par groupe de modèles."""
+    template_idx = rng.integers(0, len(templates), n)
+    labels = np.empty(n, dtype=object)
+    for idx, template in enumerate(templates):
+        mask = template_idx == idx
+        if not mask.any():
+            continue
+        if '{' not in template:
+            labels[mask] = template
+            continue
+        names = list(columns)
+        values = [np.asarray(columns[name])[mask] for name in names]
+        labels[mask] = [template.format(**dict(zip(names, row))) for row in zip(*values)]
+    return labels
+
+
+def _as_records(table) -> List[Dict]:
+    """Retourne une table (liste de dicts ou DataFrame du mode batch) sous forme de liste de dicts."""
+    if not isinstance(table, pd.DataFrame):
+        return table
+    table = _as_frame(table)
+    frame = table.astype(object)
+    for col in table.select_dtypes(include=['datetime64']).columns:
+        frame[col] = table[col].dt.date.astype(object)
+    frame = frame.where(table.notna(), None)
+    return frame.to_dict('records')
+
+
+def _shard_range(total: int, shard_index: int, nb_shards: int) -> Tuple[int, int]:
+    """Découpe [0, total[ en nb_shards plages contiguës ; retourne (décalage, taille) du shard."""
+    base, extra = divmod(total, nb_shards)
+    offset = shard_index * base + min(shard_index, extra)
+    return offset, base + (1 if shard_index < extra else 0)
+
+
+def _write_shard(generator: 'AccountingDatasetGenerator', output_dir: str) -> Tuple[Dict[str, int], DatasetStatistics]:
+    """Point d'entrée d'un processus de shard : écrit les blocs du shard dans output_dir.
+
+    Retourne le nombre de lignes par table et les statistiques du shard.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    stats = DatasetStatistics()
+    return generator._write_chunks(output_dir, stats=stats), stats
+
+
+def _merge_csv_files(paths: List[str], target: str):
+    """Concatène des CSV de même en-tête (le premier fixe l'en-tête et le BOM)."""
+    header_written = False
+    with open(target, 'wb') as out:
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            with open(path, 'rb') as f:
+                header = f.readline()
+                if not header_written:
+                    out.write(header)
+                    header_written = True
+                shutil.copyfileobj(f, out, 16 * 1024 * 1024)
+
+
 class AccountingDatasetGenerator:
     """Générateur de dataset comptable synthétique compatible Oracle DB."""
     
@@ -35,12 +142,63 @@ class AccountingDatasetGenerator:
         self.expenses = []
         self.invoice_statuses = []
         
+        # Index par identifiant (construits une fois, utilisés pour les jointures)
+        self.client_index = {}
+        self.invoice_index = {}
+        self.expense_index = {}
+        
         # Paramètres de génération MAJ pour les nouveaux volumes
         self.nb_invoices = 5000
         self.nb_bank_statements = 8000  # Augmenté à 8000
         self.nb_expenses = 5000         # Nouveau paramètre spécifique
         self.nb_clients = 800
         
+        # Mode batch : génération vectorisée NumPy (colonnes entières en une passe)
+        self.batch_mode = False
+        self.seed = 42
+        self.rng = np.random.default_rng(self.seed)
+        
+        # Tirages des lignes : 'sequential' (flux unique self.rng) ou 'counter'
+        # (Philox indexé par graine, table et identifiant de ligne : toute ligne
+        # ou plage d'IDs se régénère seule, voir generate_rows)
+        self.rng_mode = 'sequential'
+        
+        # Mode batch : fenêtres de dates (bornes Faker ou dates) et date de référence
+        # des paiements et CREATED_AT (None = aujourd'hui) ; fixées par append_period
+        self.date_windows = {
+            'clients': ('-5y', 'today'),
+            'invoices': ('-18m', 'today'),
+            'expenses': ('-24m', 'today'),
+            'orphan_statements': ('-24m', 'today')
+        }
+        self.as_of = None
+        
+        # Mode streaming : taille des blocs générés puis ajoutés aux fichiers de sortie
+        self.chunk_size = 100_000
+
+        # Mode batch : tables conservées en représentation compacte (int32, category,
+        # dates, centimes int64) et restituées à l'export
+        self.compact_tables = False
+        
+        # Export Parquet / Arrow : clé de partition par table
+        self.columnar_partitions = {'invoices': 'INVOICE_YEAR', 'bank_statements': 'STATEMENT_MONTH'}
+        
+        # Script SQL : lignes par lot INSERT ALL
+        self.sql_batch_size = 500
+
+        # Décalages d'identifiants (mode shardé : chaque shard couvre une plage d'IDs)
+        self.invoice_id_offset = 0
+        self.expense_id_offset = 0
+        self.statement_id_offset = 0
+        
+        # Régimes fiscaux par type de client (TVA, RAS)
+        self.tax_rules = TAX_RULES
+        
+        # Lots de valeurs Faker du mode batch (taille par méthode réglable via
+        # self.value_pools.sizes ; unique_emails=True pour des emails distincts)
+        self.value_pools = FakerValuePool(locale='fr_FR', seed=self.seed)
+        self.unique_emails = False
+        
         # Templates de libellés bancaires réalistes
         self.operation_labels = {
             'payment': [
@@ -112,6 +270,7 @@ class AccountingDatasetGenerator:
             ]
         }
     
+    @measured('accounting')
     def generate_invoice_statuses(self) -> List[Dict]:
         """Génère les statuts de facture."""
         statuses = [
@@ -127,8 +286,12 @@ class AccountingDatasetGenerator:
         self.invoice_statuses = statuses
         return statuses
     
+    @measured('accounting')
     def generate_clients(self) -> List[Dict]:
         """Génère la liste des clients."""
+        if self.batch_mode:
+            return self.generate_clients_batch()
+
         print("Génération des clients...")
         
         clients = []
@@ -162,48 +325,68 @@ class AccountingDatasetGenerator:
         self.clients = clients
         return clients
     
+    def generate_clients_batch(self) -> pd.DataFrame:
+        """Génère les clients en mode batch à partir des lots de valeurs Faker."""
+        print("Génération des clients (mode batch)...")
+        
+        clients = self._client_batch(1, self.nb_clients)  # Oracle IDENTITY commence à 1
+        
+        self.clients = self._stored('clients', clients)
+        return self.clients
+    
+    def _client_batch(self, first_id: int, n: int, used_emails=None) -> pd.DataFrame:
+        """Génère les clients d'identifiants first_id .. first_id + n - 1 en tableaux NumPy.
+
+        used_emails : emails déjà attribués, écartés du tirage si unique_emails (mode ajout).
+        """
+        client_ids = np.arange(first_id, first_id + n)
+        rng = self._rng_for('clients', client_ids)
+        pools = self.value_pools
+        
+        client_type = np.array(['PUBLIC', 'PRIVATE'])[rng.integers(0, 2, n)]
+        is_public = client_type == 'PUBLIC'
+        
+        # Organismes publics : "<ville> <suffixe>", entreprises privées : fake.company()
+        company_suffixes = np.array(['Mairie', 'Conseil Départemental', 'Préfecture',
+                                     'Hôpital', 'Université', 'Lycée', 'Collège'])
+        public_names = [f"{city} {suffix}" for city, suffix in zip(
+            pools.draw('city', n, rng), company_suffixes[rng.integers(0, len(company_suffixes), n)])]
+        company = np.where(is_public, np.array(public_names, dtype=object), pools.draw('company', n, rng))
+        
+        start, end = date_bounds(*self.date_windows['clients'])
+        return pd.DataFrame({
+            'CLIENT_ID': client_ids,
+            'COMPANY_NAME': company,
+            'CLIENT_TYPE': client_type,
+            'CONTACT_NAME': pools.draw('name', n, rng),
+            'EMAIL': pools.draw('email', n, rng, unique=self.unique_emails, exclude=used_emails),
+            'PHONE': pools.draw('phone_number', n, rng),
+            'ADDRESS': [address.replace('\n', ', ') for address in pools.draw('address', n, rng)],
+            'CITY': pools.draw('city', n, rng),
+            'POSTAL_CODE': pools.draw('postcode', n, rng),
+            'SIRET': np.where(is_public, None, pools.draw('siret', n, rng)),
+            'CREATED_AT': _random_dates_between(rng, start, end, n)
+        })
+    
     def calculate_invoice_amounts(self, ht_amount: float, client_type: str) -> Dict[str, float]:
-        """Calcule les montants d'une facture selon le type de client."""
-        if client_type == 'PUBLIC':
-            # Calculs spécifiques pour les clients publics
-            montant_tva = ht_amount * 0.2  # TVA 20%
-            amount_ttc = ht_amount + montant_tva
-            ras_5p = ht_amount * 0.05  # Retenue à la source 5%
-            ras_tva = montant_tva * 0.75  # RAS TVA = TVA * 75%
-            amount_to_pay = amount_ttc - ras_5p - ras_tva
-            
-            return {
-                'TOTAL_HT': round(ht_amount, 2),
-                'AMOUNT_TTC': round(amount_ttc, 2),
-                'MONTANT_TVA': round(montant_tva, 2),
-                'RAS_5P': round(ras_5p, 2),
-                'RAS_TVA': round(ras_tva, 2),
-                'AMOUNT_TO_PAY': round(amount_to_pay, 2)
-            }
-        else:
-            # Calculs classiques pour les clients privés
-            tva_rate = random.choice([0.055, 0.10, 0.20])  # 5,5%, 10% ou 20%
-            montant_tva = ht_amount * tva_rate
-            amount_ttc = ht_amount + montant_tva
-            
-            return {
-                'TOTAL_HT': round(ht_amount, 2),
-                'AMOUNT_TTC': round(amount_ttc, 2),
-                'MONTANT_TVA': round(montant_tva, 2),
-                'RAS_5P': 0.0,
-                'RAS_TVA': 0.0,
-                'AMOUNT_TO_PAY': round(amount_ttc, 2)
-            }
+        """Calcule les montants d'une facture selon le type de client (voir tax_engine.TAX_RULES)."""
+        amounts = compute_invoice_amounts([ht_amount], [client_type], self.tax_rules)
+        return {col: float(values[0]) for col, values in amounts.items()}
     
+    @measured('accounting')
     def generate_invoices(self) -> List[Dict]:
         """Génère les factures selon le schéma Oracle INVOICES."""
+        if self.batch_mode:
+            return self.generate_invoices_batch()
+
         print("Génération des factures...")
-        
+
         invoices = []
+        clients = _as_records(self.clients)
         current_year = datetime.now().year
         
         for i in range(self.nb_invoices):
-            client = random.choice(self.clients)
+            client = random.choice(clients)
             
             # Génération des dates
             invoice_date = fake.date_between(start_date='-18m', end_date='today')
@@ -251,9 +434,6 @@ class AccountingDatasetGenerator:
             if pu < 1 or pu > 1000:
                 continue  # Régénérer la facture si le prix unitaire n'est pas réaliste
             
-            # Calculs selon le type de client
-            amounts = self.calculate_invoice_amounts(ht_amount, client['CLIENT_TYPE'])
-            
             invoice = {
                 'INVOICE_ID': i + 1,  # Oracle IDENTITY
                 'CLIENT_ID': client['CLIENT_ID'],
@@ -271,16 +451,136 @@ class AccountingDatasetGenerator:
                 'LABEL': f"Prestation {fake.catch_phrase()}",
                 'CLIENT_TYPE': client['CLIENT_TYPE'],
                 'CREATED_AT': fake.date_between(start_date=invoice_date, end_date='today'),
-                **amounts
+                'TOTAL_HT': ht_amount
             }
             
             invoices.append(invoice)
         
+        # Calculs selon le type de client, en un seul appel pour toutes les factures
+        amounts = compute_invoice_amounts(
+            [inv['TOTAL_HT'] for inv in invoices],
+            [inv['CLIENT_TYPE'] for inv in invoices],
+            self.tax_rules
+        )
+        for col, values in amounts.items():
+            for invoice, value in zip(invoices, values.tolist()):
+                invoice[col] = value
+        
         self.invoices = invoices
         return invoices
+
+    def generate_invoices_batch(self) -> pd.DataFrame:
+        """Génère les factures en mode batch : toutes les colonnes en tableaux NumPy en une passe.
+
+        Reprend les distributions de generate_invoices (fenêtres de dates Faker,
+        poids des statuts, rejet des PU irréalistes, règles PUBLIC/PRIVATE).
+        """
+        print("Génération des factures (mode batch)...")
+        
+        invoices = self._invoice_batch(1, self.nb_invoices)
+        
+        self.invoices = self._stored('invoices', invoices)
+        return self.invoices
+    
+    def _client_columns(self) -> Dict[str, np.ndarray]:
+        """Colonnes clients (ids, types, noms) en tableaux, recalculées si la table change."""
+        key = (id(self.clients), len(self.clients))
+        if getattr(self, '_client_columns_key', None) != key:
+            clients = _as_records(self.clients)
+            ids = np.array([c['CLIENT_ID'] for c in clients], dtype=np.int64)
+            names_by_id = np.empty(ids.max() + 1 if len(ids) else 0, dtype=object)
+            names_by_id[ids] = [c['COMPANY_NAME'] for c in clients]
+            self._client_columns_cache = {
+                'ids': ids,
+                'types': np.array([c['CLIENT_TYPE'] for c in clients]),
+                'names_by_id': names_by_id
+            }
+            self._client_columns_key = key
+        return self._client_columns_cache
     
+    def _invoice_batch(self, first_id: int, n: int) -> pd.DataFrame:
+        """Génère les factures d'identifiants first_id .. first_id + n - 1 en tableaux NumPy."""
+        invoice_ids = np.arange(first_id, first_id + n)
+        rng = self._rng_for('invoices', invoice_ids)
+        client_columns = self._client_columns()
+        client_ids = client_columns['ids']
+        client_types = client_columns['types']
+        today = self._today()
+
+        client_pos = rng.integers(0, len(client_ids), n)
+
+        # Génération des dates
+        start, end = date_bounds(*self.date_windows['invoices'])
+        invoice_date = _random_dates_between(rng, start, end, n)
+        electronic_date = invoice_date + rng.integers(0, 3, n).astype('timedelta64[D]')
+        physical_date = electronic_date + rng.integers(1, 6, n).astype('timedelta64[D]')
+        expected_payment_date = invoice_date + rng.integers(15, 91, n).astype('timedelta64[D]')
+
+        # Statut de paiement (mêmes poids que le mode ligne à ligne)
+        status_codes = np.array(['PAID', 'UNPAID', 'OVERDUE', 'PARTIAL', 'SENT'])
+        status_weights = np.array([0.75, 0.15, 0.05, 0.03, 0.02])
+        status = status_codes[rng.choice(len(status_codes), n, p=status_weights / status_weights.sum())]
+
+        max_payment_date = np.minimum(expected_payment_date + np.timedelta64(30, 'D'), today)
+        has_payment = np.isin(status, ['PAID', 'PARTIAL']) & (max_payment_date > invoice_date)
+        payment_date = np.where(
+            has_payment,
+            _random_dates_between(rng, invoice_date, max_payment_date),
+            np.datetime64('NaT')
+        )
+
+        # Montant HT, quantité et prix unitaire
+        ht_amount = np.round(rng.uniform(100, 10000, n), 2)
+        quantity = rng.integers(1, 101, n)
+        pu = np.round(ht_amount / quantity, 2)
+
+        # Calculs selon le type de client
+        client_type = client_types[client_pos]
+        amounts = compute_invoice_amounts(ht_amount, client_type, self.tax_rules, rng)
+
+        # Libellés : tirage dans un lot de slogans Faker plutôt qu'un appel par ligne
+        label = np.array([f"Prestation {phrase}" for phrase in self.value_pools.draw('catch_phrase', n, rng)],
+                         dtype=object)
+        po_number = rng.integers(1000, 10000, n)
+        has_po = rng.random(n) < 0.7
+        po = np.array([f"PO-{num}" if keep else None for num, keep in zip(po_number, has_po)], dtype=object)
+
+        created_at = _random_dates_between(rng, invoice_date, today)
+        invoice_year = invoice_date.astype('datetime64[Y]').astype(np.int64) + 1970
+        invoice_number = np.array(
+            [f"FACT-{year}-{inv_id:06d}" for year, inv_id in zip(invoice_year, invoice_ids)],
+            dtype=object
+        )
+
+        invoices = pd.DataFrame({
+            'INVOICE_ID': invoice_ids,
+            'CLIENT_ID': client_ids[client_pos],
+            'INVOICE_DATE': invoice_date,
+            'PAYMENT_DATE': payment_date,
+            'STATUS': status,
+            'INVOICE_NUMBER': invoice_number,
+            'INVOICE_YEAR': invoice_year,
+            'PO': po,
+            'PU': pu,
+            'QUANTITY': quantity,
+            'ELECTRONIC_DATE': electronic_date,
+            'PHYSICAL_DATE': physical_date,
+            'EXPECTED_PAYMENT_DATE': expected_payment_date,
+            'LABEL': label,
+            'CLIENT_TYPE': client_type,
+            'CREATED_AT': created_at,
+            **amounts
+        })
+
+        # Rejet des prix unitaires irréalistes, comme en mode ligne à ligne
+        return invoices[(pu >= 1) & (pu <= 1000)].reset_index(drop=True)
+
+    @measured('accounting')
     def generate_expenses(self) -> List[Dict]:
         """Génère des dépenses conformément au schéma Oracle EXPENSES."""
+        if self.batch_mode:
+            return self.generate_expenses_batch()
+
         print("Génération des dépenses...")
         
         expenses = []
@@ -351,26 +651,149 @@ class AccountingDatasetGenerator:
         self.expenses = expenses
         return expenses
     
+    def generate_expenses_batch(self) -> pd.DataFrame:
+        """Génère les dépenses en mode batch à partir des lots de valeurs Faker."""
+        print("Génération des dépenses (mode batch)...")
+        
+        expenses = self._expense_batch(1, self.nb_expenses)
+        
+        self.expenses = self._stored('expenses', expenses)
+        return self.expenses
+    
+    def _expense_batch(self, first_id: int, n: int) -> pd.DataFrame:
+        """Génère les dépenses d'identifiants first_id .. first_id + n - 1 en tableaux NumPy."""
+        expense_ids = np.arange(first_id, first_id + n)
+        rng = self._rng_for('expenses', expense_ids)
+        pools = self.value_pools
+        
+        categories = np.array([
+            'Fournitures bureau', 'Frais professionnels', 'Déplacements', 
+            'Communication', 'Formation', 'Logiciels', 'Matériel informatique',
+            'Frais bancaires', 'Assurances', 'Loyer', 'Services publics',
+            'Marketing', 'R&D', 'Frais de représentation', 'Abonnements',
+            'Maintenance', 'Transport', 'Restauration', 'Hébergement'
+        ])
+        types = np.array([
+            'professional', 'travel', 'equipment', 'software', 
+            'subscription', 'office', 'other', 'marketing',
+            'research', 'maintenance', 'food', 'lodging'
+        ])
+        
+        start, end = date_bounds(*self.date_windows['expenses'])
+        expense_date = _random_dates_between(rng, start, end, n)
+        created_at = expense_date + rng.integers(0, 3, n).astype('timedelta64[D]')
+        updated_at = np.where(rng.random(n) < 0.7, created_at,
+                              created_at + rng.integers(1, 31, n).astype('timedelta64[D]'))
+        
+        # Montant entre 5 et 5000 € (log-normale bornée)
+        amount = np.clip(np.round(rng.lognormal(mean=4, sigma=0.8, size=n), 2), 5, 5000)
+        
+        title_suffix = np.array(['Dépense', 'Frais', 'Achat', 'Facture'])[rng.integers(0, 4, n)]
+        title = [f"{word.capitalize()} {suffix}" for word, suffix in zip(pools.draw('word', n, rng), title_suffix)]
+        
+        # Un libellé parmi six modèles, chacun alimenté par son lot Faker (tirage
+        # complet par modèle : le nombre de tirages ne dépend pas des données)
+        label_templates = [
+            ("Frais {}", 'word'), ("Note {}", 'city'), ("Facture {}", 'company'),
+            ("Remboursement {}", 'last_name'), ("Achat {}", 'word'), ("Service {}", 'word')
+        ]
+        template_idx = rng.integers(0, len(label_templates), n)
+        label = np.empty(n, dtype=object)
+        for idx, (template, method) in enumerate(label_templates):
+            mask = template_idx == idx
+            label[mask] = [template.format(value) for value in pools.draw(method, n, rng)[mask]]
+        
+        comments = np.where(rng.random(n) < 0.6, pools.draw('sentence', n, rng), None)
+        expense_year = expense_date.astype('datetime64[Y]').astype(np.int64) + 1970
+        
+        return pd.DataFrame({
+            'EXPENSE_ID': expense_ids,
+            'TITLE': title,
+            'AMOUNT': amount,
+            'LABEL': label,
+            'COMMENTS': comments,
+            'EXPENSE_DATE': expense_date,
+            'CREATED_AT': created_at,
+            'ATTACHMENT': None,
+            'TYPE': types[rng.integers(0, len(types), n)],
+            'CATEGORY': categories[rng.integers(0, len(categories), n)],
+            'EXPENSE_NUMBER': [f"EXP-{year}-{exp_id:05d}" for year, exp_id in zip(expense_year, expense_ids)],
+            'UPDATED_AT': updated_at,
+            'STATUS': np.where(rng.random(n) < 0.3, 'unpaid', 'paid'),  # 70% de paid, 30% unpaid
+            'EXPECTED_PAYMENT_DATE': expense_date + rng.integers(1, 61, n).astype('timedelta64[D]')
+        })
+    
+    def _stored(self, table: str, frame: pd.DataFrame) -> pd.DataFrame:
+        """Table telle que conservée en mémoire (compacte si self.compact_tables)."""
+        return to_compact(frame, table) if self.compact_tables else frame
+    
+    def _today(self) -> np.datetime64:
+        """Date de référence des tirages batch (self.as_of, aujourd'hui par défaut)."""
+        return np.datetime64(self.as_of or datetime.now().date(), 'D')
+    
+    def _rng_for(self, stream: str, row_ids: np.ndarray):
+        """Générateur des tirages d'un bloc de lignes selon self.rng_mode.
+
+        'sequential' : le flux unique self.rng (la sortie dépend de l'ordre de génération).
+        'counter' : un CounterRNG indexé par (seed, stream, identifiant de ligne).
+        """
+        if self.rng_mode == 'counter':
+            return CounterRNG(self.seed, stream, row_ids)
+        if self.rng_mode != 'sequential':
+            raise ValueError(f"rng_mode inconnu: {self.rng_mode}")
+        return self.rng
+    
+    def generate_rows(self, table: str, first_id: int, n: int = 1) -> pd.DataFrame:
+        """Régénère les lignes d'identifiants first_id .. first_id + n - 1 d'une table (mode 'counter').
+
+        Les lignes sont identiques à celles d'une génération complète de même
+        graine, quels que soient les volumes, le découpage en blocs ou en shards.
+        Tables : 'clients', 'invoices', 'expenses' (les factures rejetées pour PU
+        irréaliste sont absentes, comme en génération complète). La sélection des
+        factures / dépenses payées, la numérotation et le tri des relevés restent
+        séquentiels : les relevés ne sont pas accessibles ligne à ligne.
+        """
+        if self.rng_mode != 'counter':
+            raise ValueError("generate_rows nécessite rng_mode = 'counter'")
+        batches = {'clients': self._client_batch, 'invoices': self._invoice_batch, 'expenses': self._expense_batch}
+        if table not in batches:
+            raise ValueError(f"Table sans accès ligne à ligne: {table}")
+        if table == 'invoices' and not len(self.clients):
+            self.generate_clients_batch()
+        return batches[table](first_id, n)
+    
+    def build_indexes(self):
+        """Construit les index identifiant -> enregistrement des clients, factures et dépenses."""
+        self.client_index = {c['CLIENT_ID']: c for c in _as_records(self.clients)}
+        self.invoice_index = {inv['INVOICE_ID']: inv for inv in _as_records(self.invoices)}
+        self.expense_index = {exp['EXPENSE_ID']: exp for exp in _as_records(self.expenses)}
+    
+    @measured('accounting')
     def generate_bank_statements(self) -> List[Dict]:
         """Génère les relevés bancaires selon le schéma Oracle BANK_STATEMENT."""
+        if self.batch_mode:
+            return self.generate_bank_statements_batch()
+
         print("Génération des relevés bancaires...")
         
         bank_statements = []
-        paid_invoices = [inv for inv in self.invoices if inv['STATUS'] in ['PAID', 'PARTIAL']]
+        self.build_indexes()
+        paid_invoice_ids = [inv_id for inv_id, inv in self.invoice_index.items()
+                            if inv['STATUS'] in ['PAID', 'PARTIAL']]
         
         # Répartition adaptée pour 8000 relevés
-        nb_invoice_payments = int(self.nb_bank_statements * 0.65)  # 65% -> 5200
-        nb_expense_payments = int(self.nb_bank_statements * 0.25)  # 25% -> 2000
-        nb_orphan_statements = self.nb_bank_statements - nb_invoice_payments - nb_expense_payments  # 10% -> 800
+        nb_invoice_payments, nb_expense_payments, nb_orphan_statements = self._statement_split()
         
         statement_id = 1
         
         # 1. Relevés liés aux factures payées (5200)
         print(f"  Génération de {nb_invoice_payments} paiements de factures...")
-        selected_invoices = random.sample(paid_invoices, 
-                                        min(nb_invoice_payments, len(paid_invoices)))
+        selected_invoice_ids = random.sample(paid_invoice_ids, 
+                                           min(nb_invoice_payments, len(paid_invoice_ids)))
         
-        for invoice in selected_invoices:
+        for invoice_id in selected_invoice_ids:
+            invoice = self.invoice_index[invoice_id]
+            
             # Variation de montant (±5%)
             amount_variation = random.uniform(-0.05, 0.05)
             bank_amount = invoice['AMOUNT_TO_PAY'] * (1 + amount_variation)
@@ -389,7 +812,7 @@ class AccountingDatasetGenerator:
             additional_template = random.choice(self.additional_labels['payment'])
             
             # Récupération du nom du client
-            client = next(c for c in self.clients if c['CLIENT_ID'] == invoice['CLIENT_ID'])
+            client = self.client_index[invoice['CLIENT_ID']]
             company_short = client['COMPANY_NAME'][:20]  # Limitation Oracle VARCHAR2(255)
             
             operation_label = operation_template.format(company=company_short)
@@ -429,11 +852,14 @@ class AccountingDatasetGenerator:
         
         # 2. Relevés liés aux dépenses (2000)
         print(f"  Génération de {nb_expense_payments} paiements de dépenses...")
-        if self.expenses:
-            selected_expenses = random.sample(self.expenses, 
-                                            min(nb_expense_payments, len(self.expenses)))
+        if self.expense_index:
+            expense_ids = list(self.expense_index)
+            selected_expense_ids = random.sample(expense_ids, 
+                                               min(nb_expense_payments, len(expense_ids)))
             
-            for expense in selected_expenses:
+            for expense_id in selected_expense_ids:
+                expense = self.expense_index[expense_id]
+                
                 # Variation de montant (±2%)
                 amount_variation = random.uniform(-0.02, 0.02)
                 bank_amount = expense['AMOUNT'] * (1 + amount_variation)
@@ -510,31 +936,516 @@ class AccountingDatasetGenerator:
         self.bank_statements = bank_statements
         return bank_statements
     
-    def export_to_csv(self, output_dir: str = 'output'):
-        """Exporte les données en fichiers CSV compatibles Oracle."""
+    def _statement_split(self) -> Tuple[int, int, int]:
+        """Répartition des relevés : 65% paiements de factures, 25% dépenses, 10% orphelins."""
+        nb_invoice_payments = int(self.nb_bank_statements * 0.65)
+        nb_expense_payments = int(self.nb_bank_statements * 0.25)
+        nb_orphan_statements = self.nb_bank_statements - nb_invoice_payments - nb_expense_payments
+        return nb_invoice_payments, nb_expense_payments, nb_orphan_statements
+    
+    def _payable_invoices(self, invoices: pd.DataFrame) -> pd.DataFrame:
+        """Factures payées ou partiellement payées ayant une date de paiement."""
+        mask = invoices['STATUS'].isin(['PAID', 'PARTIAL']) & invoices['PAYMENT_DATE'].notna()
+        return invoices[mask]
+    
+    def _invoice_payment_statements(self, invoices: pd.DataFrame) -> pd.DataFrame:
+        """Relevés de crédit pour un lot de factures payées (sans STATEMENT_ID)."""
+        rng = self._rng_for('invoice_payments', invoices['INVOICE_ID'].to_numpy())
+        n = len(invoices)
+        today = self._today()
+        
+        # Variation de montant (±5%) et date entre le paiement et aujourd'hui
+        credit = np.round(invoices['AMOUNT_TO_PAY'].to_numpy() * (1 + rng.uniform(-0.05, 0.05, n)), 2)
+        statement_date = _random_dates_between(rng, _date_column(invoices, 'PAYMENT_DATE'), today)
+        value_date = statement_date + rng.integers(0, 3, n).astype('timedelta64[D]')
+        
+        names_by_id = self._client_columns()['names_by_id']
+        company_short = [name[:20] for name in names_by_id[invoices['CLIENT_ID'].to_numpy()]]
+        operation_label = _format_templates(rng, self.operation_labels['payment'], n, company=company_short)
+        additional_label = _format_templates(
+            rng, self.additional_labels['payment'], n,
+            invoice_number=invoices['INVOICE_NUMBER'].to_numpy(),
+            date=pd.Series(statement_date).dt.strftime('%d/%m').to_numpy(dtype=object)
+        )
+        comments_options = np.array(["Paiement conforme", "Règlement client", "Virement reçu",
+                                     "Facture soldée", None], dtype=object)
+        
+        return pd.DataFrame({
+            'STATEMENT_DATE': statement_date,
+            'OPERATION_LABEL': operation_label,
+            'ADDITIONAL_LABEL': additional_label,
+            'DEBIT': np.nan,
+            'CREDIT': credit,
+            'COMMENTS': comments_options[rng.integers(0, len(comments_options), n)],
+            'RELATED_INVOICE_ID': pd.array(invoices['INVOICE_ID'].to_numpy(), dtype='Int64'),
+            'RELATED_EXPENSE_ID': pd.array([None] * n, dtype='Int64'),
+            'VALUE_DATE': value_date,
+            'SOURCE_FILENAME': None,
+            'MIME_TYPE': None,
+            'CREATED_AT': _random_dates_between(rng, statement_date, today)
+        })
+    
+    def _expense_payment_statements(self, expenses: pd.DataFrame) -> pd.DataFrame:
+        """Relevés de débit pour un lot de dépenses (sans STATEMENT_ID)."""
+        rng = self._rng_for('expense_payments', expenses['EXPENSE_ID'].to_numpy())
+        n = len(expenses)
+        today = self._today()
+        
+        # Variation de montant (±2%) et date entre la dépense et aujourd'hui
+        debit = np.round(expenses['AMOUNT'].to_numpy() * (1 + rng.uniform(-0.02, 0.02, n)), 2)
+        statement_date = _random_dates_between(rng, _date_column(expenses, 'EXPENSE_DATE'), today)
+        value_date = statement_date + rng.integers(0, 3, n).astype('timedelta64[D]')
+        
+        operation_labels = np.array(self.operation_labels['expense'], dtype=object)
+        additional_label = _format_templates(
+            rng, self.additional_labels['expense'], n,
+            date=pd.Series(statement_date).dt.strftime('%d/%m').to_numpy(dtype=object)
+        )
+        
+        return pd.DataFrame({
+            'STATEMENT_DATE': statement_date,
+            'OPERATION_LABEL': operation_labels[rng.integers(0, len(operation_labels), n)],
+            'ADDITIONAL_LABEL': additional_label,
+            'DEBIT': debit,
+            'CREDIT': np.nan,
+            'COMMENTS': [f"Dépense {category}" for category in expenses['CATEGORY']],
+            'RELATED_INVOICE_ID': pd.array([None] * n, dtype='Int64'),
+            'RELATED_EXPENSE_ID': pd.array(expenses['EXPENSE_ID'].to_numpy(), dtype='Int64'),
+            'VALUE_DATE': value_date,
+            'SOURCE_FILENAME': None,
+            'MIME_TYPE': None,
+            'CREATED_AT': _random_dates_between(rng, statement_date, today)
+        })
+    
+    def _orphan_statements(self, n: int, first: int = 0) -> pd.DataFrame:
+        """Relevés orphelins (frais, agios...) sans facture ni dépense liée (sans STATEMENT_ID).
+
+        first est le rang du premier orphelin produit (clé des tirages en mode 'counter').
+        """
+        rng = self._rng_for('orphan_statements', self.statement_id_offset + first + np.arange(n))
+        today = self._today()
+        
+        # Montants log-normaux bornés à 500, signe aléatoire
+        amount = np.round(rng.lognormal(mean=3, sigma=1.2, size=n), 2)
+        amount = rng.choice([-1, 1], n) * np.minimum(np.abs(amount), 500)
+        
+        start, end = date_bounds(*self.date_windows['orphan_statements'])
+        statement_date = _random_dates_between(rng, start, end, n)
+        value_date = statement_date + rng.integers(-1, 2, n).astype('timedelta64[D]')
+        operation_labels = np.array(self.operation_labels['orphan'], dtype=object)
+        additional_labels = np.array(self.additional_labels['orphan'], dtype=object)
+        
+        return pd.DataFrame({
+            'STATEMENT_DATE': statement_date,
+            'OPERATION_LABEL': operation_labels[rng.integers(0, len(operation_labels), n)],
+            'ADDITIONAL_LABEL': additional_labels[rng.integers(0, len(additional_labels), n)],
+            'DEBIT': np.where(amount < 0, np.round(np.abs(amount), 2), np.nan),
+            'CREDIT': np.where(amount > 0, np.round(amount, 2), np.nan),
+            'COMMENTS': "Opération automatique",
+            'RELATED_INVOICE_ID': pd.array([None] * n, dtype='Int64'),
+            'RELATED_EXPENSE_ID': pd.array([None] * n, dtype='Int64'),
+            'VALUE_DATE': value_date,
+            'SOURCE_FILENAME': None,
+            'MIME_TYPE': None,
+            'CREATED_AT': _random_dates_between(rng, statement_date, today)
+        })
+    
+    def generate_bank_statements_batch(self) -> pd.DataFrame:
+        """Génère les relevés bancaires en mode batch (mêmes règles que generate_bank_statements)."""
+        print("Génération des relevés bancaires (mode batch)...")
+        
+        rng = self.rng
+        nb_invoice_payments, nb_expense_payments, nb_orphan_statements = self._statement_split()
+        
+        paid_invoices = self._payable_invoices(_as_frame(self.invoices))
+        selected = rng.choice(len(paid_invoices), min(nb_invoice_payments, len(paid_invoices)), replace=False)
+        parts = [self._invoice_payment_statements(paid_invoices.iloc[selected])]
+        
+        if len(self.expenses):
+            expenses = _as_frame(self.expenses)
+            selected = rng.choice(len(expenses), min(nb_expense_payments, len(expenses)), replace=False)
+            parts.append(self._expense_payment_statements(expenses.iloc[selected]))
+        
+        parts.append(self._orphan_statements(nb_orphan_statements))
+        
+        bank_statements = pd.concat(parts, ignore_index=True)
+        bank_statements.insert(0, 'STATEMENT_ID', np.arange(1, len(bank_statements) + 1))
+        
+        # Tri par date
+        bank_statements = bank_statements.sort_values('STATEMENT_DATE', kind='stable').reset_index(drop=True)
+        
+        self.bank_statements = self._stored('bank_statements', bank_statements)
+        return self.bank_statements
+    
+    def chunk_rows(self) -> int:
+        """Nombre total de lignes produites par iter_chunks (factures, dépenses et relevés)."""
+        return self.nb_invoices + self.nb_expenses + self.nb_bank_statements
+
+    def iter_chunks(self):
+        """Génère le dataset par blocs de self.chunk_size lignes, en mémoire bornée.
+        
+        Produit des couples (table, DataFrame) avec table parmi 'invoices',
+        'expenses' et 'bank_statements'. Les relevés de paiement sont tirés dans
+        chaque bloc de factures / dépenses au moment où il est produit ; le quota
+        de chaque bloc est proportionnel à sa taille pour respecter la répartition
+        globale 65/25/10.
+        """
+        rng = self.rng
+        chunk_size = self.chunk_size
+        nb_invoice_payments, nb_expense_payments, nb_orphan_statements = self._statement_split()
+        next_statement_id = self.statement_id_offset + 1
+        
+        def numbered(statements: pd.DataFrame) -> pd.DataFrame:
+            nonlocal next_statement_id
+            statements.insert(0, 'STATEMENT_ID', np.arange(next_statement_id, next_statement_id + len(statements)))
+            next_statement_id += len(statements)
+            return statements
+        
+        emitted = 0
+        for first_id in range(1, self.nb_invoices + 1, chunk_size):
+            n = min(chunk_size, self.nb_invoices - first_id + 1)
+            invoices = self._invoice_batch(self.invoice_id_offset + first_id, n)
+            yield 'invoices', invoices
+            
+            paid_invoices = self._payable_invoices(invoices)
+            quota = nb_invoice_payments * (first_id - 1 + n) // self.nb_invoices - emitted
+            selected = np.sort(rng.choice(len(paid_invoices), min(quota, len(paid_invoices)), replace=False))
+            emitted += len(selected)
+            yield 'bank_statements', numbered(self._invoice_payment_statements(paid_invoices.iloc[selected]))
+        
+        emitted = 0
+        for first_id in range(1, self.nb_expenses + 1, chunk_size):
+            n = min(chunk_size, self.nb_expenses - first_id + 1)
+            expenses = self._expense_batch(self.expense_id_offset + first_id, n)
+            yield 'expenses', expenses
+            
+            quota = nb_expense_payments * (first_id - 1 + n) // self.nb_expenses - emitted
+            selected = np.sort(rng.choice(n, min(quota, n), replace=False))
+            emitted += len(selected)
+            yield 'bank_statements', numbered(self._expense_payment_statements(expenses.iloc[selected]))
+        
+        for start in range(0, nb_orphan_statements, chunk_size):
+            n = min(chunk_size, nb_orphan_statements - start)
+            yield 'bank_statements', numbered(self._orphan_statements(n, start))
+    
+    @measured('accounting')
+    def export_streaming(self, output_dir: str = 'output', sql_script: bool = False) -> Dict[str, int]:
+        """Génère et exporte le dataset bloc par bloc : chaque bloc est ajouté à son CSV puis libéré.
+        
+        Les clients et les statuts (petites tables) sont générés et écrits en entier.
+        Les relevés sont écrits dans l'ordre de génération (pas de tri global par date).
+        Avec sql_script=True, chaque bloc est aussi ajouté à insert_data.sql (lots INSERT ALL).
+        """
+        print(f"Export streaming vers le répertoire '{output_dir}' (blocs de {self.chunk_size} lignes)...")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        if not self.invoice_statuses:
+            self.generate_invoice_statuses()
+        statuses_df = pd.DataFrame(self.invoice_statuses)
+        with timed('io'):
+            statuses_df.to_csv(f'{output_dir}/invoice_statuses.csv', index=False, encoding='utf-8-sig')
+        if not len(self.clients):
+            self.generate_clients()
+        clients_df = _as_frame(self.clients)
+        with timed('io'):
+            clients_df.to_csv(f'{output_dir}/clients.csv', index=False, encoding='utf-8-sig', date_format='%Y-%m-%d')
+        
+        manifest = DatasetManifest(seed=self.seed, runs=1)
+        manifest.update('clients', clients_df)
+        stats = DatasetStatistics()
+        stats.update('clients', clients_df)
+        sql_writer = None
+        if sql_script:
+            sql_writer = InsertAllWriter(f'{output_dir}/insert_data.sql', batch_size=self.sql_batch_size)
+            sql_writer.write(ORACLE_TABLES['invoice_statuses'], statuses_df)
+            sql_writer.write(ORACLE_TABLES['clients'], clients_df)
+        try:
+            row_counts = self._write_chunks(output_dir, sql_writer, manifest, stats)
+        finally:
+            if sql_writer is not None:
+                sql_writer.close()
+        for table, count in row_counts.items():
+            print(f"  ✓ {count} lignes exportées vers {table}.csv")
+        self.generate_loader_kit(output_dir)
+        manifest.save(output_dir)
+        self.generate_summary_report(output_dir, stats)
+        return row_counts
+    
+    def _write_chunks(self, output_dir: str, sql_writer: InsertAllWriter = None,
+                      manifest: DatasetManifest = None, stats: DatasetStatistics = None,
+                      append: bool = False) -> Dict[str, int]:
+        """Écrit les blocs de iter_chunks dans output_dir/<table>.csv et retourne le nombre de lignes.
+        
+        Chaque bloc met à jour le manifeste et les statistiques fournis. Avec
+        append=True les blocs sont ajoutés à la fin des CSV existants (sans en-tête),
+        après vérification que l'en-tête existant porte les colonnes du bloc.
+        """
+        row_counts = {'invoices': 0, 'expenses': 0, 'bank_statements': 0}
+        started = set()
+        for table, chunk in self.iter_chunks():
+            advance(len(chunk), self.chunk_rows())
+            path = f'{output_dir}/{table}.csv'
+            new_file = table not in started and not (append and os.path.exists(path))
+            if append and not new_file and table not in started:
+                _check_csv_header(path, chunk.columns)
+            started.add(table)
+            with timed('io'):
+                chunk.to_csv(
+                    path,
+                    mode='w' if new_file else 'a',
+                    header=new_file,
+                    index=False,
+                    encoding='utf-8-sig' if new_file else 'utf-8',
+                    date_format='%Y-%m-%d'
+                )
+            if sql_writer is not None:
+                sql_writer.write(ORACLE_TABLES[table], chunk)
+            if manifest is not None:
+                manifest.update(table, chunk)
+            if stats is not None:
+                stats.update(table, chunk)
+            row_counts[table] += len(chunk)
+        return row_counts
+    
+    @measured('accounting')
+    def append_period(self, output_dir: str = 'output', months: int = 1, start=None, end=None,
+                      nb_new_clients: int = 0) -> Dict[str, int]:
+        """Prolonge un dataset CSV exporté d'une nouvelle période (mode ajout).
+        
+        Ne lit que le manifeste (IDs maximaux, dernières dates) et la liste des
+        clients, génère self.nb_invoices factures, self.nb_expenses dépenses et
+        self.nb_bank_statements relevés datés dans [start, end[ et les ajoute en fin
+        de CSV : le coût ne dépend que des lignes ajoutées. Les IDs et les numéros
+        FACT-YYYY-NNNNNN / EXP-YYYY-NNNNN prolongent ceux de l'export existant.
+        Par défaut la période commence le lendemain de la dernière date et dure
+        months mois. Les paiements ne concernent que les factures de la période.
+        start / end : date, datetime ou texte ISO ('2027-01-01').
+        """
+        manifest = DatasetManifest.load(output_dir)
+        if start is None:
+            last_date = manifest.last_date()
+            start = last_date + timedelta(days=1) if last_date else datetime.now().date()
+        start = pd.Timestamp(start).date()
+        if end is None:
+            end = (pd.Timestamp(start) + pd.DateOffset(months=months)).date()
+        end = pd.Timestamp(end).date()
+        print(f"Ajout de la période {start} -> {end} au dataset '{output_dir}'...")
+        
+        if manifest.seed is not None:
+            self.seed = manifest.seed
+        # Flux séquentiel propre à chaque ajout (en mode 'counter' les tirages sont indexés par ID)
+        self.rng = np.random.default_rng([self.seed, manifest.runs])
+        self.invoice_id_offset = manifest.max_id('invoices')
+        self.expense_id_offset = manifest.max_id('expenses')
+        self.statement_id_offset = manifest.max_id('bank_statements')
+        window = (start, end)
+        self.date_windows = {**self.date_windows, 'clients': window, 'invoices': window,
+                             'expenses': window, 'orphan_statements': window}
+        self.as_of = end - timedelta(days=1)
+        
+        clients_path = f'{output_dir}/clients.csv'
+        # Emails existants relus seulement s'ils doivent rester uniques avec les nouveaux clients
+        unique_emails = bool(nb_new_clients) and self.unique_emails
+        clients = pd.read_csv(clients_path, usecols=['CLIENT_ID', 'COMPANY_NAME', 'CLIENT_TYPE']
+                              + (['EMAIL'] if unique_emails else []), encoding='utf-8-sig')
+        used_emails = clients.pop('EMAIL').dropna() if unique_emails else None
+        if nb_new_clients:
+            new_clients = self._client_batch(manifest.max_id('clients') + 1, nb_new_clients, used_emails)
+            _check_csv_header(clients_path, new_clients.columns)
+            with timed('io'):
+                new_clients.to_csv(clients_path, mode='a', header=False, index=False, encoding='utf-8',
+                                   date_format='%Y-%m-%d')
+            manifest.update('clients', new_clients)
+            clients = pd.concat([clients, new_clients[clients.columns]], ignore_index=True)
+        self.clients = clients
+        
+        row_counts = self._write_chunks(output_dir, manifest=manifest, append=True)
+        manifest.runs += 1
+        manifest.periods.append({'start': start.isoformat(), 'end': end.isoformat(),
+                                 'clients': nb_new_clients, **row_counts})
+        manifest.save(output_dir)
+        for table, count in row_counts.items():
+            print(f"  ✓ {count} lignes ajoutées à {table}.csv")
+        return row_counts
+    
+    @measured('accounting')
+    def export_columnar(self, output_dir: str = 'output', fmt: str = 'parquet',
+                        partition_by: Dict[str, str] = None) -> Dict[str, int]:
+        """Génère et exporte le dataset bloc par bloc en Parquet / Arrow IPC.
+        
+        Chaque bloc de iter_chunks est écrit dès sa génération, dates en date32 natif.
+        Par défaut les factures sont partitionnées par INVOICE_YEAR et les relevés
+        par mois de STATEMENT_DATE (voir columnar_export.ColumnarWriter).
+        """
+        print(f"Export {fmt} vers le répertoire '{output_dir}' (blocs de {self.chunk_size} lignes)...")
+        if partition_by is None:
+            partition_by = self.columnar_partitions
+        
+        if not self.invoice_statuses:
+            self.generate_invoice_statuses()
+        if not len(self.clients):
+            self.generate_clients()
+        
+        with ColumnarWriter(output_dir, fmt=fmt, partition_by=partition_by) as writer:
+            writer.write('invoice_statuses', pd.DataFrame(self.invoice_statuses))
+            writer.write('clients', _as_frame(self.clients))
+            for table, chunk in self.iter_chunks():
+                advance(len(chunk), self.chunk_rows())
+                writer.write(table, chunk)
+        
+        for table, count in writer.row_counts.items():
+            print(f"  ✓ {count} lignes exportées vers {table}/")
+        return writer.row_counts
+    
+    @measured('accounting')
+    def export_to_database(self, sink: DatabaseSink) -> Dict[str, Dict[str, float]]:
+        """Génère le dataset bloc par bloc et l'écrit directement en base via sink.
+        
+        Les blocs sont soumis au fil de la génération ; le sink respecte l'ordre des
+        clés étrangères et écrit les tables indépendantes en parallèle.
+        
+        Returns:
+            Débit par table (voir DatabaseSink.report).
+        """
+        print(f"Export en base (blocs de {self.chunk_size} lignes)...")
+        if not self.invoice_statuses:
+            self.generate_invoice_statuses()
+        if not len(self.clients):
+            self.generate_clients()
+        
+        sink.write('invoice_statuses', pd.DataFrame(self.invoice_statuses))
+        sink.write('clients', _as_frame(self.clients))
+        for table, chunk in self.iter_chunks():
+            advance(len(chunk), self.chunk_rows())
+            sink.write(table, chunk)
+        sink.flush()
+        
+        report = sink.report()
+        for table, stats in report.items():
+            print(f"  ✓ {stats['rows']} lignes insérées dans {sink.tables[table]} ({stats['rows_per_sec']} lignes/s)")
+        return report
+    
+    def shard(self, shard_index: int, nb_shards: int) -> 'AccountingDatasetGenerator':
+        """Retourne un générateur limité au shard shard_index sur nb_shards.
+        
+        Chaque shard couvre une plage contiguë d'IDs de factures, de dépenses et
+        de relevés, et tire ses données d'une graine dérivée de (seed, shard) :
+        la sortie ne dépend que de la graine et du nombre de shards.
+        """
+        shard = AccountingDatasetGenerator.__new__(AccountingDatasetGenerator)
+        shard.__dict__.update(self.__dict__)
+        shard.invoices, shard.expenses, shard.bank_statements = [], [], []
+        
+        shard_seed = np.random.SeedSequence(self.seed).spawn(nb_shards)[shard_index]
+        shard.rng = np.random.default_rng(shard_seed)
+        
+        for count_attr, offset_attr in [('nb_invoices', 'invoice_id_offset'),
+                                        ('nb_expenses', 'expense_id_offset'),
+                                        ('nb_bank_statements', 'statement_id_offset')]:
+            offset, count = _shard_range(getattr(self, count_attr), shard_index, nb_shards)
+            setattr(shard, count_attr, count)
+            setattr(shard, offset_attr, getattr(self, offset_attr) + offset)
+        return shard
+    
+    @measured('accounting')
+    def export_sharded(self, output_dir: str = 'output', nb_shards: int = 4, processes: int = None,
+                       merge: bool = True) -> Dict[str, int]:
+        """Génère le dataset en parallèle : un processus par shard, fichiers par shard puis fusion.
+        
+        Les clients et les statuts sont générés une fois (graine de base) et partagés.
+        Les fichiers de chaque shard sont écrits dans output_dir/shard_XXX/ ; avec
+        merge=True ils sont concaténés dans l'ordre des shards dans output_dir/.
+        Les IDs de relevés sont réservés par shard : une plage peut contenir des trous
+        si un shard manque de factures payées.
+        """
+        print(f"Export shardé vers le répertoire '{output_dir}' ({nb_shards} shards)...")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        if not self.invoice_statuses:
+            self.generate_invoice_statuses()
+        with timed('io'):
+            pd.DataFrame(self.invoice_statuses).to_csv(f'{output_dir}/invoice_statuses.csv', index=False,
+                                                       encoding='utf-8-sig')
+        if not len(self.clients):
+            self.generate_clients()
+        with timed('io'):
+            _as_frame(self.clients).to_csv(f'{output_dir}/clients.csv', index=False, encoding='utf-8-sig',
+                                           date_format='%Y-%m-%d')
+        
+        shard_dirs = [os.path.join(output_dir, f'shard_{i:03d}') for i in range(nb_shards)]
+        with ProcessPoolExecutor(max_workers=processes or nb_shards) as executor:
+            shard_results = list(executor.map(
+                _write_shard, [self.shard(i, nb_shards) for i in range(nb_shards)], shard_dirs
+            ))
+        
+        shard_counts = [counts for counts, _ in shard_results]
+        row_counts = {table: sum(counts[table] for counts in shard_counts) for table in shard_counts[0]}
+        stats = DatasetStatistics()
+        stats.update('clients', _as_frame(self.clients))
+        for _, shard_stats in shard_results:
+            stats.merge(shard_stats)
+        if merge:
+            for table in row_counts:
+                _merge_csv_files([os.path.join(d, f'{table}.csv') for d in shard_dirs],
+                                 os.path.join(output_dir, f'{table}.csv'))
+            for shard_dir in shard_dirs:
+                shutil.rmtree(shard_dir)
+            self.generate_loader_kit(output_dir)
+            manifest = DatasetManifest.scan(output_dir)
+            manifest.seed = self.seed
+            manifest.save(output_dir)
+            self.generate_summary_report(output_dir, stats)
+        
+        for table, count in row_counts.items():
+            print(f"  ✓ {count} lignes exportées vers {table}.csv")
+        return row_counts
+    
+    @measured('accounting')
+    def export_to_csv(self, output_dir: str = 'output', fmt: str = 'csv'):
+        """Exporte les données en fichiers CSV compatibles Oracle.
+        
+        Avec fmt='parquet' ou 'arrow', les tables en mémoire sont écrites en
+        fichiers colonne partitionnés (dates natives, pas de formatage texte).
+        """
         print(f"Export des données vers le répertoire '{output_dir}'...")
         
         # Création du répertoire de sortie
         os.makedirs(output_dir, exist_ok=True)
         
+        if fmt != 'csv':
+            with ColumnarWriter(output_dir, fmt=fmt, partition_by=self.columnar_partitions) as writer:
+                for table, rows in [('invoice_statuses', self.invoice_statuses), ('clients', self.clients),
+                                    ('invoices', self.invoices), ('bank_statements', self.bank_statements),
+                                    ('expenses', self.expenses)]:
+                    if len(rows):
+                        writer.write(table, _as_frame(rows))
+                        print(f"  ✓ {len(rows)} lignes exportées vers {table}/")
+                        advance(len(rows))
+            self.generate_summary_report(output_dir)
+            return
+        
         # Export des statuts de facture
         if self.invoice_statuses:
             statuses_df = pd.DataFrame(self.invoice_statuses)
-            statuses_df.to_csv(f'{output_dir}/invoice_statuses.csv', index=False, encoding='utf-8-sig')
+            with timed('io'):
+                statuses_df.to_csv(f'{output_dir}/invoice_statuses.csv', index=False, encoding='utf-8-sig')
             print(f"  ✓ {len(self.invoice_statuses)} statuts exportés vers invoice_statuses.csv")
+            advance(len(self.invoice_statuses))
         
         # Export des clients
-        if self.clients:
-            clients_df = pd.DataFrame(self.clients)
+        if len(self.clients):
+            clients_df = pd.DataFrame(_as_frame(self.clients))
             # Formatage des dates pour Oracle
             for col in clients_df.select_dtypes(include=['datetime64']).columns:
                 clients_df[col] = clients_df[col].dt.strftime('%Y-%m-%d')
-            clients_df.to_csv(f'{output_dir}/clients.csv', index=False, encoding='utf-8-sig')
+            with timed('io'):
+                clients_df.to_csv(f'{output_dir}/clients.csv', index=False, encoding='utf-8-sig')
             print(f"  ✓ {len(self.clients)} clients exportés vers clients.csv")
+            advance(len(self.clients))
         
         # Export des factures (table INVOICES)
-        if self.invoices:
-            invoices_df = pd.DataFrame(self.invoices)
+        if len(self.invoices):
+            invoices_df = pd.DataFrame(_as_frame(self.invoices))
             # Formatage des dates pour Oracle
             date_columns = ['INVOICE_DATE', 'PAYMENT_DATE', 'ELECTRONIC_DATE', 
                           'PHYSICAL_DATE', 'EXPECTED_PAYMENT_DATE', 'CREATED_AT']
@@ -542,92 +1453,86 @@ class AccountingDatasetGenerator:
                 if col in invoices_df.columns:
                     invoices_df[col] = pd.to_datetime(invoices_df[col]).dt.strftime('%Y-%m-%d')
             
-            invoices_df.to_csv(f'{output_dir}/invoices.csv', index=False, encoding='utf-8-sig')
+            with timed('io'):
+                invoices_df.to_csv(f'{output_dir}/invoices.csv', index=False, encoding='utf-8-sig')
             print(f"  ✓ {len(self.invoices)} factures exportées vers invoices.csv")
+            advance(len(self.invoices))
         
         # Export des relevés bancaires (table BANK_STATEMENT)
-        if self.bank_statements:
-            statements_df = pd.DataFrame(self.bank_statements)
+        if len(self.bank_statements):
+            statements_df = pd.DataFrame(_as_frame(self.bank_statements))
             # Formatage des dates pour Oracle
             date_columns = ['STATEMENT_DATE', 'VALUE_DATE', 'CREATED_AT']
             for col in date_columns:
                 if col in statements_df.columns:
                     statements_df[col] = pd.to_datetime(statements_df[col]).dt.strftime('%Y-%m-%d')
             
-            statements_df.to_csv(f'{output_dir}/bank_statements.csv', index=False, encoding='utf-8-sig')
+            with timed('io'):
+                statements_df.to_csv(f'{output_dir}/bank_statements.csv', index=False, encoding='utf-8-sig')
             print(f"  ✓ {len(self.bank_statements)} relevés bancaires exportés vers bank_statements.csv")
+            advance(len(self.bank_statements))
         
         # Export des dépenses (table EXPENSES)
-        if self.expenses:
-            expenses_df = pd.DataFrame(self.expenses)
+        if len(self.expenses):
+            expenses_df = pd.DataFrame(_as_frame(self.expenses))
             # Formatage des dates pour Oracle
             date_columns = ['EXPENSE_DATE', 'CREATED_AT', 'UPDATED_AT', 'EXPECTED_PAYMENT_DATE']
             for col in date_columns:
                 if col in expenses_df.columns:
                     expenses_df[col] = pd.to_datetime(expenses_df[col]).dt.strftime('%Y-%m-%d')
-            expenses_df.to_csv(f'{output_dir}/expenses.csv', index=False, encoding='utf-8-sig')
+            with timed('io'):
+                expenses_df.to_csv(f'{output_dir}/expenses.csv', index=False, encoding='utf-8-sig')
             print(f"  ✓ {len(self.expenses)} dépenses exportées vers expenses.csv")
+            advance(len(self.expenses))
         
-        # Génération d'un script SQL d'insertion
+        # Génération d'un script SQL d'insertion et du kit SQL*Loader
         self.generate_sql_inserts(output_dir)
+        self.generate_loader_kit(output_dir)
+        
+        # Manifeste (IDs maximaux, dernières dates) pour le mode ajout
+        manifest = DatasetManifest(seed=self.seed, runs=1)
+        for table in TABLE_KEYS:
+            if len(getattr(self, table)):
+                manifest.update(table, _as_frame(getattr(self, table)))
+        manifest.save(output_dir)
         
         # Génération d'un rapport de synthèse
         self.generate_summary_report(output_dir)
     
+    @measured('accounting')
     def generate_sql_inserts(self, output_dir: str):
-        """Génère des scripts SQL d'insertion pour Oracle."""
+        """Génère le script SQL d'insertion Oracle (lots INSERT ALL) de toutes les tables."""
         sql_path = f'{output_dir}/insert_data.sql'
         
-        with open(sql_path, 'w', encoding='utf-8') as f:
-            f.write("-- Script d'insertion pour Oracle DB\n")
-            f.write("-- Dataset Comptable Synthétique\n")
-            f.write(f"-- Généré le {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-            
-            # Insertion des statuts de facture
-            f.write("-- Insertion des statuts de facture\n")
-            for status in self.invoice_statuses:
-                f.write(f"INSERT INTO INVOICE_STATUSES (STATUS_CODE, DESCRIPTION) VALUES ('{status['STATUS_CODE']}', '{status['DESCRIPTION']}');\n")
-            f.write("\n")
-            
-            # Note sur les insertions des autres tables
-            f.write("-- Les autres insertions peuvent être effectuées via:\n")
-            f.write("-- 1. SQL*Loader avec les fichiers CSV générés\n")
-            f.write("-- 2. Import/Export Oracle\n")
-            f.write("-- 3. Scripts d'insertion générés automatiquement\n\n")
-            
-            f.write("-- Exemple de structure d'insertion pour INVOICES:\n")
-            if self.invoices:
-                sample_invoice = self.invoices[0]
-                f.write("/*\n")
-                f.write("INSERT INTO INVOICES (\n")
-                f.write("    CLIENT_ID, INVOICE_DATE, PAYMENT_DATE, TOTAL_HT, STATUS,\n")
-                f.write("    INVOICE_NUMBER, INVOICE_YEAR, PO, PU, QUANTITY,\n")
-                f.write("    AMOUNT_TTC, RAS_5P, RAS_TVA, AMOUNT_TO_PAY,\n")
-                f.write("    ELECTRONIC_DATE, PHYSICAL_DATE, EXPECTED_PAYMENT_DATE,\n")
-                f.write("    LABEL, CLIENT_TYPE, MONTANT_TVA\n")
-                f.write(") VALUES (\n")
-                f.write(f"    {sample_invoice['CLIENT_ID']}, DATE '{sample_invoice['INVOICE_DATE']}', ")
-                payment_date = f"DATE '{sample_invoice['PAYMENT_DATE']}'" if sample_invoice['PAYMENT_DATE'] else "NULL"
-                f.write(f"{payment_date}, {sample_invoice['TOTAL_HT']}, '{sample_invoice['STATUS']}',\n")
-                f.write(f"    '{sample_invoice['INVOICE_NUMBER']}', {sample_invoice['INVOICE_YEAR']}, ")
-                po = "'{}'".format(sample_invoice['PO']) if sample_invoice['PO'] else "NULL"
-                f.write(f"{po}, {sample_invoice['PU']}, {sample_invoice['QUANTITY']},\n")
-                f.write(f"    {sample_invoice['AMOUNT_TTC']}, {sample_invoice['RAS_5P']}, {sample_invoice['RAS_TVA']}, {sample_invoice['AMOUNT_TO_PAY']},\n")
-                f.write(f"    DATE '{sample_invoice['ELECTRONIC_DATE']}', DATE '{sample_invoice['PHYSICAL_DATE']}', DATE '{sample_invoice['EXPECTED_PAYMENT_DATE']}',\n")
-                f.write("    '{}', '{}', {}\n".format(
-                    sample_invoice['LABEL'].replace("'", "''"),
-                    sample_invoice['CLIENT_TYPE'],
-                    sample_invoice['MONTANT_TVA']
-                ))
-                f.write(");\n")
-                f.write("*/\n\n")
-            
-            f.write("COMMIT;\n")
+        with InsertAllWriter(sql_path, batch_size=self.sql_batch_size) as writer:
+            writer.comment("Dataset Comptable Synthétique")
+            writer.comment(f"Généré le {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}")
+            # Ordre des clés étrangères : statuts, clients, factures / dépenses, relevés
+            for table, oracle_table in ORACLE_TABLES.items():
+                rows = self.invoice_statuses if table == 'invoice_statuses' else getattr(self, table, [])
+                if len(rows):
+                    writer.write(oracle_table, _as_frame(rows))
+                    advance(len(rows))
         
         print(f"  ✓ Script SQL généré: insert_data.sql")
     
-    def generate_summary_report(self, output_dir: str):
-        """Génère un rapport de synthèse du dataset."""
+    def generate_loader_kit(self, output_dir: str):
+        """Génère les fichiers de contrôle SQL*Loader des CSV de output_dir (voir oracle_loader)."""
+        control_paths = write_loader_kit(output_dir)
+        print(f"  ✓ Kit SQL*Loader généré: {len(control_paths)} fichiers .ctl dans loader/")
+    
+    def generate_summary_report(self, output_dir: str, stats: DatasetStatistics = None):
+        """Génère un rapport de synthèse du dataset.
+        
+        stats : statistiques déjà agrégées (ex: au fil d'un export streaming ou
+        shardé) ; à défaut, une passe vectorisée par table en mémoire.
+        """
+        if stats is None:
+            stats = DatasetStatistics()
+            for table in TABLE_STATISTICS:
+                if len(getattr(self, table)):
+                    stats.update(table, _as_frame(getattr(self, table)))
+        
         report_path = f'{output_dir}/dataset_summary.txt'
         
         with open(report_path, 'w', encoding='utf-8') as f:
@@ -637,77 +1542,21 @@ class AccountingDatasetGenerator:
             f.write(f"Date de génération: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
             f.write(f"Compatible avec le schéma Oracle DB\n\n")
             
-            # Statistiques clients
-            if self.clients:
-                public_clients = len([c for c in self.clients if c['CLIENT_TYPE'] == 'PUBLIC'])
-                private_clients = len([c for c in self.clients if c['CLIENT_TYPE'] == 'PRIVATE'])
-                f.write(f"CLIENTS ({len(self.clients)} total):\n")
-                f.write(f"  - Publics: {public_clients}\n")
-                f.write(f"  - Privés: {private_clients}\n\n")
-            
-            # Statistiques factures
-            if self.invoices:
-                status_counts = {}
-                for invoice in self.invoices:
-                    status = invoice['STATUS']
-                    status_counts[status] = status_counts.get(status, 0) + 1
-                
-                total_ht = sum([i['TOTAL_HT'] for i in self.invoices])
-                total_ttc = sum([i['AMOUNT_TTC'] for i in self.invoices])
-                total_to_pay = sum([i['AMOUNT_TO_PAY'] for i in self.invoices])
-                
-                f.write(f"FACTURES ({len(self.invoices)} total):\n")
-                for status, count in status_counts.items():
-                    f.write(f"  - {status}: {count}\n")
-                f.write(f"  - Montant total HT: {total_ht:,.2f} €\n")
-                f.write(f"  - Montant total TTC: {total_ttc:,.2f} €\n")
-                f.write(f"  - Montant total à payer: {total_to_pay:,.2f} €\n\n")
-            
-            # Statistiques relevés bancaires
-            if self.bank_statements:
-                linked_to_invoices = len([s for s in self.bank_statements if s['RELATED_INVOICE_ID']])
-                linked_to_expenses = len([s for s in self.bank_statements if s['RELATED_EXPENSE_ID']])
-                orphan_statements = len(self.bank_statements) - linked_to_invoices - linked_to_expenses
-                
-                total_credits = sum([s['CREDIT'] for s in self.bank_statements if s['CREDIT']])
-                total_debits = sum([s['DEBIT'] for s in self.bank_statements if s['DEBIT']])
-                
-                f.write(f"RELEVES BANCAIRES ({len(self.bank_statements)} total):\n")
-                f.write(f"  - Liés à des factures: {linked_to_invoices}\n")
-                f.write(f"  - Liés à des dépenses: {linked_to_expenses}\n")
-                f.write(f"  - Orphelins: {orphan_statements}\n")
-                f.write(f"  - Total crédits: {total_credits:,.2f} €\n")
-                f.write(f"  - Total débits: {total_debits:,.2f} €\n\n")
-            
-            # Statistiques dépenses
-            if self.expenses:
-                status_counts = {}
-                category_counts = {}
-                type_counts = {}
-                total_amount = 0
-                
-                for expense in self.expenses:
-                    status = expense['STATUS']
-                    category = expense['CATEGORY']
-                    expense_type = expense['TYPE']
-                    
-                    status_counts[status] = status_counts.get(status, 0) + 1
-                    category_counts[category] = category_counts.get(category, 0) + 1
-                    type_counts[expense_type] = type_counts.get(expense_type, 0) + 1
-                    total_amount += expense['AMOUNT']
-                
-                f.write(f"DEPENSES ({len(self.expenses)} total):\n")
-                f.write(f"  - Montant total: {total_amount:,.2f} €\n")
-                f.write("  - Par statut:\n")
-                for status, count in status_counts.items():
-                    f.write(f"    - {status}: {count}\n")
-                f.write("  - Par catégorie:\n")
-                for category, count in category_counts.items():
-                    f.write(f"    - {category}: {count}\n")
-                f.write("  - Par type:\n")
-                for expense_type, count in type_counts.items():
-                    f.write(f"    - {expense_type}: {count}\n")
-                f.write("\n")
+            # Clients, factures, relevés, dépenses et distributions
+            for line in stats.report_lines():
+                f.write(line + "\n")
+            
+            # Mémoire des tables selon leur représentation
+            f.write("MEMOIRE PAR MILLION DE LIGNES (mesurée sur un échantillon):\n")
+            for table in ['clients', 'invoices', 'expenses', 'bank_statements']:
+                rows = getattr(self, table)
+                if not len(rows):
+                    continue
+                memory = memory_per_million(_as_frame(rows[:20_000]), table)
+                reduction = 1 - memory['compact'] / memory['dicts']
+                f.write(f"  - {table}: dicts {memory['dicts']:,.0f} Mo | DataFrame {memory['dataframe']:,.0f} Mo"
+                        f" | compact {memory['compact']:,.0f} Mo (-{reduction:.0%} vs dicts)\n")
+            f.write("\n")
             
             f.write("FIN DU RAPPORT\n")
 
@@ -0,0 +1,326 @@
+"""
+Banc de mesure des étapes de génération
+=======================================
+
+Chaque étape des générateurs (SUITES) est chronométrée à plusieurs échelles
+(10k, 100k, 1M lignes par défaut) avec une graine fixe :
+
+- accounting : AccountingDatasetGenerator en mode batch (generate_clients,
+  generate_invoices, generate_expenses, generate_bank_statements,
+  export_to_csv), échelle = factures = dépenses = relevés ;
+- invoices : invoices_generate (generate_all_invoices, split_invoices,
+  generate_bank_statements, save_datasets) ;
+- expenses : les scénarios du notebook (expenses_generate), un par étape.
+
+Pour chaque étape : lignes produites, durée, lignes par seconde et pic de
+mémoire résidente (RSS) du processus à la fin de l'étape. Chaque couple
+(suite, échelle) tourne dans un processus neuf : le pic mesuré est celui de
+la chaîne d'étapes de la suite, pas celui des échelles précédentes.
+
+Les mesures sont ajoutées à un historique JSON (HISTORY_FILE) qui garde
+aussi une référence par étape et par échelle (la première mesure, ou la
+dernière avec update_baseline). Une étape dont le débit baisse de plus de
+threshold (ou dont le pic mémoire monte de plus de memory_threshold) face à
+sa référence est une régression : la commande se termine en erreur.
+
+    python benchmark.py --scales 10000 100000 --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from stage_metrics import peak_rss_mb
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+HISTORY_FILE = 'benchmark_history.json'
+HISTORY_VERSION = 1
+RESULT_COLUMNS = ['suite', 'stage', 'scale', 'rows', 'seconds', 'rows_per_second', 'peak_rss_mb']
+
+
+def _seed_all(seed: int):
+    """Graine des tirages globaux (random, NumPy, Faker) et des générateurs de module."""
+    from faker import Faker
+    import expenses_generate
+    import invoices_generate
+
+    random.seed(seed)
+    np.random.seed(seed)
+    Faker.seed(seed)
+    invoices_generate.fake.seed_instance(seed)
+    invoices_generate.RNG = np.random.default_rng(seed)
+    expenses_generate.RNG = np.random.default_rng(seed)
+
+
+# --- Suite accounting : AccountingDatasetGenerator en mode batch ---
+
+def _accounting_setup(scale: int, seed: int) -> Dict:
+    from accounting_dataset_generator import AccountingDatasetGenerator
+    from value_pools import FakerValuePool
+
+    generator = AccountingDatasetGenerator()
+    generator.batch_mode = True
+    generator.seed = seed
+    generator.rng = np.random.default_rng(seed)
+    generator.value_pools = FakerValuePool(locale='fr_FR', seed=seed)
+    generator.nb_invoices = generator.nb_expenses = generator.nb_bank_statements = scale
+    generator.nb_clients = max(scale // 100, 100)
+    generator.generate_invoice_statuses()
+    return {'generator': generator}
+
+
+def _accounting_stage(method: str, table: str) -> Callable[[Dict, int, str], int]:
+    def run(state: Dict, scale: int, output_dir: str) -> int:
+        generator = state['generator']
+        getattr(generator, method)()
+        return len(getattr(generator, table))
+    return run
+
+
+def _accounting_export(state: Dict, scale: int, output_dir: str) -> int:
+    generator = state['generator']
+    generator.export_to_csv(os.path.join(output_dir, 'accounting'))
+    return sum(len(getattr(generator, table)) for table in ['clients', 'invoices', 'expenses', 'bank_statements'])
+
+
+# --- Suite invoices : invoices_generate ---
+
+def _invoices_generate(state: Dict, scale: int, output_dir: str) -> int:
+    import invoices_generate
+    state['invoices'] = invoices_generate.generate_all_invoices(scale)
+    return len(state['invoices'])
+
+
+def _invoices_split(state: Dict, scale: int, output_dir: str) -> int:
+    import invoices_generate
+    state['splits'] = invoices_generate.split_invoices(state['invoices'])
+    return len(state['invoices'])
+
+
+def _invoices_statements(state: Dict, scale: int, output_dir: str) -> int:
+    import invoices_generate
+    state['statements'], state['links'] = invoices_generate.generate_bank_statements(state['splits'],
+                                                                                     with_links=True)
+    return len(state['statements'])
+
+
+def _invoices_save(state: Dict, scale: int, output_dir: str) -> int:
+    import invoices_generate
+    output_dir = os.path.join(output_dir, 'invoices')
+    os.makedirs(output_dir, exist_ok=True)
+    invoices_generate.save_datasets(state['splits'], state['statements'], output_dir, state['links'])
+    return len(state['invoices']) + len(state['statements'])
+
+
+# --- Suite expenses : scénarios du notebook (expenses_generate) ---
+
+def _expenses_scenario(function: str, **options) -> Callable[[Dict, int, str], int]:
+    def run(state: Dict, scale: int, output_dir: str) -> int:
+        import expenses_generate
+        df_expenses, df_transactions = getattr(expenses_generate, function)(
+            scale, output_dir=os.path.join(output_dir, 'expenses'), **options)
+        return len(df_expenses) + len(df_transactions)
+    return run
+
+
+# Étapes de chaque suite, dans l'ordre (chaque étape reprend l'état des précédentes)
+SUITES = {
+    'accounting': {
+        'setup': _accounting_setup,
+        'stages': {
+            'generate_clients': _accounting_stage('generate_clients', 'clients'),
+            'generate_invoices': _accounting_stage('generate_invoices', 'invoices'),
+            'generate_expenses': _accounting_stage('generate_expenses', 'expenses'),
+            'generate_bank_statements': _accounting_stage('generate_bank_statements', 'bank_statements'),
+            'export_to_csv': _accounting_export
+        }
+    },
+    'invoices': {
+        'setup': lambda scale, seed: {},
+        'stages': {
+            'generate_all_invoices': _invoices_generate,
+            'split_invoices': _invoices_split,
+            'generate_bank_statements': _invoices_statements,
+            'save_datasets': _invoices_save
+        }
+    },
+    'expenses': {
+        'setup': lambda scale, seed: {},
+        'stages': {
+            'matched': _expenses_scenario('generate_transaction_expenses_matched', matched_percentage=0.8),
+            'unmatched': _expenses_scenario('generate_unmatched_transactions_expenses'),
+            'partial': _expenses_scenario('generate_partial_payment_expenses'),
+            'grouped': _expenses_scenario('generate_grouped_payment_expenses')
+        }
+    }
+}
+
+
+def run_suite(suite: str, scale: int, seed: int = 42, work_dir: Optional[str] = None,
+              quiet: bool = True) -> List[Dict]:
+    """Chronomètre les étapes de suite à l'échelle scale ; une mesure (RESULT_COLUMNS) par étape.
+
+    Les fichiers sont écrits dans un dossier temporaire de work_dir, supprimé ensuite.
+    """
+    config = SUITES[suite]
+    results = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as output_dir, open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext():
+            _seed_all(seed)
+            state = config['setup'](scale, seed)
+            for stage, run in config['stages'].items():
+                started = time.perf_counter()
+                rows = run(state, scale, output_dir)
+                seconds = time.perf_counter() - started
+                results.append({
+                    'suite': suite, 'stage': stage, 'scale': scale, 'rows': int(rows),
+                    'seconds': round(seconds, 4),
+                    'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+                    'peak_rss_mb': peak_rss_mb()
+                })
+    return results
+
+
+def result_key(result: Dict) -> str:
+    """Clé d'une mesure dans la référence : suite.étape@échelle."""
+    return f"{result['suite']}.{result['stage']}@{result['scale']}"
+
+
+def check_regressions(results: List[Dict], baseline: Dict[str, Dict], threshold: float = 0.2,
+                      memory_threshold: Optional[float] = None) -> List[str]:
+    """Messages des étapes en régression face à baseline (débit, et pic mémoire si memory_threshold)."""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result_key(result))
+        if reference is None:
+            continue
+        if reference.get('rows_per_second') and result['rows_per_second'] is not None:
+            ratio = result['rows_per_second'] / reference['rows_per_second']
+            if ratio < 1 - threshold:
+                regressions.append(f"{result_key(result)} : {result['rows_per_second']:,.0f} lignes/s "
+                                   f"contre {reference['rows_per_second']:,.0f} ({ratio - 1:+.0%})")
+        if (memory_threshold is not None and reference.get('peak_rss_mb') and result['peak_rss_mb'] is not None
+                and result['peak_rss_mb'] > reference['peak_rss_mb'] * (1 + memory_threshold)):
+            regressions.append(f"{result_key(result)} : pic mémoire {result['peak_rss_mb']:,.0f} Mo "
+                               f"contre {reference['peak_rss_mb']:,.0f} Mo")
+    return regressions
+
+
+def read_history(path: str) -> Dict:
+    """Historique des mesures ({'version', 'baseline', 'runs'}), vide si le fichier n'existe pas."""
+    if not os.path.exists(path):
+        return {'version': HISTORY_VERSION, 'baseline': {}, 'runs': []}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_history(path: str, history: Dict):
+    """Écrit l'historique (remplacement atomique)."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(history, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(suites: Optional[Sequence[str]] = None, scales: Sequence[int] = DEFAULT_SCALES,
+                   seed: int = 42, history_path: str = HISTORY_FILE, threshold: float = 0.2,
+                   memory_threshold: Optional[float] = None, update_baseline: bool = False,
+                   isolate: bool = True, work_dir: Optional[str] = None) -> Dict:
+    """Mesure les suites à chaque échelle, compare à la référence et ajoute le passage à l'historique.
+
+    Args:
+        suites: Noms des suites (SUITES), toutes par défaut.
+        scales: Échelles (lignes par étape) mesurées.
+        seed: Graine commune des tirages.
+        history_path: Fichier JSON de l'historique et de la référence.
+        threshold: Baisse relative de débit tolérée avant régression (0.2 = 20%).
+        memory_threshold: Hausse relative du pic mémoire tolérée, None pour ne pas la contrôler.
+        update_baseline: Les mesures de ce passage deviennent la référence.
+        isolate: Un processus neuf par (suite, échelle), pour un pic mémoire propre à la suite.
+        work_dir: Dossier des fichiers temporaires (dossier temporaire du système par défaut).
+
+    Returns:
+        Le passage ajouté à l'historique : mesures et régressions.
+    """
+    history = read_history(history_path)
+    results = []
+    for suite in suites or list(SUITES):
+        for scale in scales:
+            print(f"⏱  {suite} @ {scale:,} lignes...")
+            if isolate:
+                with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+                    measured = executor.submit(run_suite, suite, scale, seed, work_dir).result()
+            else:
+                measured = run_suite(suite, scale, seed, work_dir)
+            for result in measured:
+                print(f"   {result['stage']:<26} {result['seconds']:>9.2f}s {result['rows_per_second'] or 0:>12,.0f} "
+                      f"lignes/s  {result['peak_rss_mb'] or 0:>8,.0f} Mo")
+            results.extend(measured)
+
+    regressions = [] if update_baseline else check_regressions(results, history['baseline'], threshold,
+                                                               memory_threshold)
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': _commit(),
+        'python': platform.python_version(),
+        'seed': seed,
+        'threshold': threshold,
+        'results': results,
+        'regressions': regressions
+    }
+    for result in results:
+        if update_baseline or result_key(result) not in history['baseline']:
+            history['baseline'][result_key(result)] = {name: result[name] for name in
+                                                       ['rows', 'seconds', 'rows_per_second', 'peak_rss_mb']}
+    history['runs'].append(run)
+    write_history(history_path, history)
+
+    for message in regressions:
+        print(f"❌ Régression {message}")
+    if not regressions:
+        print(f"✅ {len(results)} mesures, aucune régression (seuil {threshold:.0%}) - historique : {history_path}")
+    return run
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Banc de mesure des étapes de génération")
+    parser.add_argument('--suites', nargs='+', choices=list(SUITES), default=None)
+    parser.add_argument('--scales', nargs='+', type=int, default=list(DEFAULT_SCALES))
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--history', default=HISTORY_FILE)
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--memory-threshold', type=float, default=None)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--no-isolate', action='store_true')
+    parser.add_argument('--work-dir', default=None)
+    args = parser.parse_args(argv)
+    run = run_benchmarks(args.suites, args.scales, args.seed, args.history, args.threshold, args.memory_threshold,
+                         args.update_baseline, not args.no_isolate, args.work_dir)
+    return 1 if run['regressions'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Couples candidats (relevé, document) par index de blocage
+=========================================================
+
+Les modèles de lettrage s'entraînent sur des couples plausibles : chaque
+relevé face aux quelques factures / dépenses qui pourraient le solder, et
+pas seulement son document (positif) ou le couple UNMATCHED construit 1:1.
+Le produit cartésien (relevés x documents) est hors de portée ; les
+candidats sont tirés de deux index de blocage sur les documents :
+
+- montant x date : documents triés par (tranche de dates, montant en
+  centimes). Pour chaque relevé et chaque tranche de sa fenêtre de dates, un
+  searchsorted donne la fenêtre de tolérance sur le montant et les
+  per_bucket documents les plus proches du montant du relevé ;
+- références : les jetons de type numéro de document (REFERENCE_PATTERN)
+  lus dans les libellés du relevé, joints par hachage aux numéros des
+  documents (retrouve versements partiels et paiements groupés, dont le
+  montant ne correspond à aucun document).
+
+Les candidats sont notés (référence, écart de montant, écart de dates) et
+les top_k meilleurs par relevé sont gardés, étiquetés par la table de liens
+(document_links). Le coût est linéaire en nombre de relevés (par blocs de
+chunk_size relevés, mémoire bornée), logarithmique en nombre de documents.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Jetons de type numéro de document : FAC-2025-86076, FACT-2024-000123, EXP2026116503...
+REFERENCE_PATTERN = re.compile(r'[A-Z]{3,4}-?\d{4}-?\d{5,}')
+
+# Colonnes des relevés de chaque générateur (montant : première colonne renseignée)
+STATEMENT_FIELDS = {
+    'invoices': {'id': 'STATEMENT_ID', 'amount': ['CREDIT', 'DEBIT'], 'date': 'STATEMENT_DATE',
+                 'text': ['ADDITIONAL_LABEL', 'COMMENTS']},
+    'expenses': {'id': 'statement_id', 'amount': ['debit', 'credit'], 'date': 'statement_date',
+                 'text': ['operation_label', 'additional_label', 'comments']}
+}
+
+# Colonnes des documents par DOCUMENT_TYPE (date : date attendue du paiement)
+DOCUMENT_FIELDS = {
+    'INVOICE': {'id': 'INVOICE_ID', 'amount': 'AMOUNT_TO_PAY', 'date': 'PAYMENT_DATE',
+                'reference': 'INVOICE_NUMBER'},
+    'EXPENSE': {'id': 'expense_id', 'amount': 'amount', 'date': 'expense_date', 'reference': 'expense_number'}
+}
+
+CANDIDATE_COLUMNS = ['STATEMENT_ID', 'DOCUMENT_TYPE', 'DOCUMENT_ID', 'AMOUNT_GAP', 'DAY_GAP',
+                     'REFERENCE_MATCH', 'SCORE', 'RANK', 'LABEL']
+
+# Écart entre deux tranches de la clé (tranche, centimes) : au-delà de tout montant en centimes
+BUCKET_SCALE = 1 << 42
+
+
+def _days(values) -> np.ndarray:
+    return pd.to_datetime(pd.Series(values)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _cents(frame: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    amounts = pd.to_numeric(frame[columns[0]]).to_numpy(dtype=np.float64)
+    for column in columns[1:]:
+        amounts = np.where(np.isnan(amounts), pd.to_numeric(frame[column]).to_numpy(dtype=np.float64), amounts)
+    return np.round(np.nan_to_num(np.abs(amounts)) * 100).astype(np.int64)
+
+
+class BlockingIndex:
+    """Index de blocage des documents d'un type : clé (tranche de dates, centimes) triée et références."""
+
+    def __init__(self, documents: pd.DataFrame, document_type: str, bucket_days: int = 30,
+                 fields: Optional[Dict] = None):
+        fields = fields or DOCUMENT_FIELDS[document_type]
+        self.document_type = document_type
+        self.bucket_days = bucket_days
+        self.ids = documents[fields['id']].to_numpy(dtype=np.int64)
+        self.cents = _cents(documents, [fields['amount']])
+        self.days = _days(documents[fields['date']])
+        keys = (self.days // bucket_days) * BUCKET_SCALE + self.cents
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        self.references = pd.DataFrame({'token': documents[fields['reference']].astype(str).to_numpy(),
+                                        'document': np.arange(len(documents))})
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def amount_candidates(self, cents: np.ndarray, days: np.ndarray, date_window: Tuple[int, int],
+                          tolerance: float, per_bucket: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(relevé, document) : per_bucket documents au montant le plus proche par tranche de la fenêtre."""
+        first = (days + date_window[0]) // self.bucket_days
+        last = (days + date_window[1]) // self.bucket_days
+        low = np.floor(cents * (1 - tolerance)).astype(np.int64)
+        high = np.ceil(cents * (1 + tolerance)).astype(np.int64)
+        offsets = np.arange(-(per_bucket // 2), per_bucket - per_bucket // 2)
+        rows, documents = [], []
+        for step in range(int((last - first).max()) + 1 if len(days) else 0):
+            bucket = first + step
+            base = bucket * BUCKET_SCALE
+            start = np.searchsorted(self.keys, base + low, side='left')
+            stop = np.searchsorted(self.keys, base + high, side='right')
+            center = np.searchsorted(self.keys, base + cents)
+            # Fenêtre de per_bucket positions autour du montant, décalée pour rester dans [start, stop[
+            begin = np.clip(center + offsets[0], start, np.maximum(stop - per_bucket, start))
+            positions = begin[:, None] + (offsets - offsets[0])
+            valid = (positions < stop[:, None]) & (bucket <= last)[:, None]
+            rows.append(np.nonzero(valid)[0])
+            documents.append(self.order[positions[valid]])
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(documents)
+
+    def reference_candidates(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(relevé, document) des jetons de référence des libellés, joints aux numéros des documents.
+
+        Une seule passe de l'expression sur les libellés mis bout à bout ; le relevé
+        de chaque jeton se retrouve par la position du jeton.
+        """
+        ends = np.cumsum([len(text) + 1 for text in texts])
+        matches = [(match.start(), match.group()) for match in REFERENCE_PATTERN.finditer('\n'.join(texts))]
+        if not matches:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        positions, tokens = zip(*matches)
+        found = pd.DataFrame({'token': np.array(tokens, dtype=object),
+                              'row': np.searchsorted(ends, positions, side='right')})
+        found = found.merge(self.references, on='token')
+        return found['row'].to_numpy(dtype=np.int64), found['document'].to_numpy(dtype=np.int64)
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions des top_k meilleurs scores de chaque relevé, et leur rang.
+
+    Un seul tri entier sur (relevé, score décroissant quantifié au millionième).
+    """
+    quantized = np.round(scores * 1e6).astype(np.int64)
+    order = np.argsort(rows * (1 << 32) + (quantized.max(initial=0) - quantized), kind='stable')
+    sorted_rows = rows[order]
+    starts = np.flatnonzero(np.r_[True, sorted_rows[1:] != sorted_rows[:-1]]) if len(rows) else np.empty(0, int)
+    ranks = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    keep = ranks < top_k
+    return order[keep], ranks[keep]
+
+
+def candidate_pairs(statements: pd.DataFrame, index: BlockingIndex, links: Optional[pd.DataFrame] = None,
+                    source: str = 'invoices', top_k: int = 10, per_bucket: int = 8,
+                    date_window: Tuple[int, int] = (-90, 30), tolerance: float = 0.05,
+                    chunk_size: int = 200_000, fields: Optional[Dict] = None) -> pd.DataFrame:
+    """Top-K documents plausibles de chaque relevé, étiquetés par la table de liens.
+
+    Args:
+        statements: Relevés (colonnes STATEMENT_FIELDS[source] ou fields).
+        index: Index de blocage des documents candidats.
+        links: Table de liens (document_links) : LABEL = 1 pour les couples liés ; None pour ne pas étiqueter.
+        source: Générateur des relevés ('invoices', 'expenses').
+        top_k: Nombre de candidats gardés par relevé.
+        per_bucket: Candidats tirés par tranche de dates dans l'index montant.
+        date_window: Écart admis (jours) entre la date du document et celle du relevé : [min, max].
+        tolerance: Écart relatif de montant admis dans l'index montant.
+        chunk_size: Relevés traités par bloc (mémoire bornée).
+        fields: Colonnes des relevés, STATEMENT_FIELDS[source] par défaut.
+
+    Returns:
+        Colonnes CANDIDATE_COLUMNS, une ligne par couple candidat, rangées par relevé et score.
+    """
+    fields = fields or STATEMENT_FIELDS[source]
+    span = max(abs(date_window[0]), abs(date_window[1]), 1)
+    type_code = list(DOCUMENT_FIELDS).index(index.document_type)
+    # Clé entière (relevé, document) : ID de relevé x (plus grand ID de document + 1) + ID de document
+    key_scale = int(index.ids.max(initial=0)) + 1
+    true_keys = None
+    if links is not None:
+        typed = links[(links['DOCUMENT_TYPE'] == index.document_type).to_numpy()]
+        true_keys = np.unique(typed['STATEMENT_ID'].to_numpy(dtype=np.int64) * key_scale
+                              + typed['DOCUMENT_ID'].to_numpy(dtype=np.int64))
+    blocks = []
+    for start in range(0, len(statements), chunk_size):
+        chunk = statements.iloc[start:start + chunk_size]
+        cents = _cents(chunk, fields['amount'])
+        days = _days(chunk[fields['date']])
+        texts = chunk[fields['text'][0]].fillna('').astype(str)
+        for column in fields['text'][1:]:
+            texts = texts + ' ' + chunk[column].fillna('').astype(str)
+
+        amount_rows, amount_documents = index.amount_candidates(cents, days, date_window, tolerance, per_bucket)
+        reference_rows, reference_documents = index.reference_candidates(texts.tolist())
+        rows = np.concatenate([reference_rows, amount_rows])
+        documents = np.concatenate([reference_documents, amount_documents])
+        # Un couple par (relevé, document) : la première occurrence porte le jeton de référence s'il existe
+        _, first = np.unique(rows * len(index) + documents, return_index=True)
+        reference_match = first < len(reference_rows)
+        rows, documents = rows[first], documents[first]
+
+        amount_gap = (cents[rows] - index.cents[documents]) / 100
+        day_gap = days[rows] - index.days[documents]
+        relative_gap = np.abs(amount_gap) * 100 / np.maximum(index.cents[documents], 1)
+        in_window = (day_gap >= -date_window[1]) & (day_gap <= -date_window[0])
+        scores = (2.0 * reference_match
+                  + np.clip(1 - relative_gap / tolerance, 0, 1)
+                  + np.where(in_window, 1 - np.abs(day_gap) / span, 0))
+        keep, ranks = _top_k(rows, scores, top_k)
+
+        statement_ids = chunk[fields['id']].to_numpy(dtype=np.int64)[rows[keep]]
+        document_ids = index.ids[documents[keep]]
+        labels = (np.isin(statement_ids * key_scale + document_ids, true_keys) if true_keys is not None
+                  else np.zeros(len(keep), dtype=bool))
+        blocks.append(pd.DataFrame({
+            'STATEMENT_ID': statement_ids,
+            'DOCUMENT_TYPE': pd.Categorical.from_codes(np.full(len(keep), type_code), categories=list(DOCUMENT_FIELDS)),
+            'DOCUMENT_ID': document_ids,
+            'AMOUNT_GAP': amount_gap[keep],
+            'DAY_GAP': day_gap[keep],
+            'REFERENCE_MATCH': reference_match[keep],
+            'SCORE': scores[keep],
+            'RANK': ranks.astype(np.int16),
+            'LABEL': labels.astype(np.int8)
+        }, columns=CANDIDATE_COLUMNS))
+    if not blocks:
+        return pd.DataFrame(columns=CANDIDATE_COLUMNS)
+    return pd.concat(blocks, ignore_index=True)
+
+
+def candidate_recall(candidates: pd.DataFrame, links: pd.DataFrame, statement_ids=None) -> float:
+    """Part des liens vrais (des relevés statement_ids, tous par défaut) présents parmi les candidats.
+
+    Numérateur et dénominateur portent sur les mêmes relevés et DOCUMENT_TYPE : la valeur est dans [0, 1].
+    """
+    keys = ['STATEMENT_ID', 'DOCUMENT_TYPE', 'DOCUMENT_ID']
+    positives = candidates[candidates['LABEL'].to_numpy() == 1]
+    links = links[links['DOCUMENT_TYPE'].isin(candidates['DOCUMENT_TYPE'].unique()).to_numpy()]
+    if statement_ids is not None:
+        links = links[links['STATEMENT_ID'].isin(statement_ids).to_numpy()]
+        positives = positives[positives['STATEMENT_ID'].isin(statement_ids).to_numpy()]
+    positives = positives[positives['DOCUMENT_TYPE'].isin(links['DOCUMENT_TYPE'].unique()).to_numpy()]
+    expected = links[keys].drop_duplicates()
+    return len(positives[keys].drop_duplicates()) / max(len(expected), 1)
@@ -0,0 +1,165 @@
+"""
+Export colonne (Parquet / Arrow IPC) partitionné
+================================================
+
+Écrit les blocs DataFrame produits par les générateurs directement en
+fichiers Parquet ou Arrow IPC typés, au fil de la génération, sans passe
+de formatage des dates en texte : les colonnes de dates sont stockées en
+date32 natif, les horodatages (heure renseignée, ex: CREATED_AT de
+invoices_generate) en timestamp.
+
+Chaque table peut être partitionnée (arborescence de type Hive) par une
+colonne, ex: INVOICE_YEAR, MATCH_TYPE, ou un mois dérivé d'une date
+(STATEMENT_MONTH à partir de STATEMENT_DATE) :
+
+    <output_dir>/<table>/<CLE>=<valeur>/part-00000.parquet
+
+Comme pour tout jeu partitionné Hive, la colonne de partition n'est pas
+répétée dans les fichiers : elle est reconstruite à la lecture, ex:
+pyarrow.dataset.dataset(path, partitioning='hive') ou pandas.read_parquet(path).
+
+Dépendance optionnelle : pyarrow.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from stage_metrics import timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    pa = None
+    pq = None
+
+# Partitions dérivées : nom de la clé -> colonne de date source (partition au mois)
+DERIVED_MONTH_PARTITIONS = {
+    'STATEMENT_MONTH': 'STATEMENT_DATE',
+    'INVOICE_MONTH': 'INVOICE_DATE',
+    'EXPENSE_MONTH': 'EXPENSE_DATE'
+}
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _arrow_type(arrow_type: 'pa.DataType', values: pd.Series) -> 'pa.DataType':
+    """Type de stockage d'une colonne : dates natives, textes en string, colonnes vides en string.
+
+    Une colonne timestamp n'est stockée en date32 que si toutes ses valeurs tombent à minuit.
+    """
+    if pa.types.is_date(arrow_type):
+        return pa.date32()
+    if pa.types.is_timestamp(arrow_type):
+        dates = pd.to_datetime(values).dropna()
+        return pa.date32() if (dates == dates.dt.normalize()).all() else arrow_type
+    if pa.types.is_null(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pa.string()
+    return arrow_type
+
+
+class ColumnarWriter:
+    """Écrit des blocs DataFrame en Parquet / Arrow IPC, partitionnés par table."""
+
+    def __init__(self, output_dir: str, fmt: str = 'parquet', partition_by: Optional[Dict[str, str]] = None,
+                 compression: str = 'zstd'):
+        """
+        Args:
+            output_dir: Répertoire racine des tables.
+            fmt: 'parquet' ou 'arrow' (Arrow IPC).
+            partition_by: Clé de partition par table, ex: {'invoices': 'INVOICE_YEAR'}.
+            compression: Codec Parquet.
+        """
+        if pa is None:
+            raise ImportError("L'export Parquet/Arrow nécessite pyarrow (pip install pyarrow)")
+        if fmt not in FORMATS:
+            raise ValueError(f"Format inconnu: {fmt} (attendu: {', '.join(FORMATS)})")
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.partition_by = dict(partition_by or {})
+        self.compression = compression
+        self.schemas = {}
+        self.row_counts = {}
+        self._writers = {}
+
+    def _to_arrow(self, table: str, frame: pd.DataFrame) -> 'pa.Table':
+        key = self.partition_by.get(table)
+        if key in frame.columns:
+            frame = frame.drop(columns=key)
+        arrow_table = pa.Table.from_pandas(frame, preserve_index=False)
+        if table not in self.schemas:
+            self.schemas[table] = pa.schema(
+                [pa.field(field.name, _arrow_type(field.type, frame[field.name])) for field in arrow_table.schema]
+            )
+        return arrow_table.cast(self.schemas[table])
+
+    def _partition_keys(self, table: str, frame: pd.DataFrame) -> Optional[pd.Series]:
+        key = self.partition_by.get(table)
+        if key is None:
+            return None
+        if key in frame.columns:
+            return frame[key].astype(str)
+        if key in DERIVED_MONTH_PARTITIONS:
+            return pd.to_datetime(frame[DERIVED_MONTH_PARTITIONS[key]]).dt.strftime('%Y-%m')
+        raise KeyError(f"Clé de partition {key} absente de la table {table}")
+
+    def _writer(self, table: str, partition: Optional[str]):
+        writer_key = (table, partition)
+        if writer_key not in self._writers:
+            directory = os.path.join(self.output_dir, table)
+            if partition is not None:
+                directory = os.path.join(directory, f"{self.partition_by[table]}={partition}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-00000{FORMATS[self.fmt]}")
+            schema = self.schemas[table]
+            if self.fmt == 'parquet':
+                self._writers[writer_key] = pq.ParquetWriter(path, schema, compression=self.compression)
+            else:
+                self._writers[writer_key] = pa.ipc.new_file(path, schema)
+        return self._writers[writer_key]
+
+    def write(self, table: str, frame: pd.DataFrame):
+        """Ajoute un bloc à une table (un row group / record batch par partition touchée)."""
+        if frame.empty:
+            return
+        arrow_table = self._to_arrow(table, frame)
+        keys = self._partition_keys(table, frame)
+        with timed('io'):
+            if keys is None:
+                self._writer(table, None).write_table(arrow_table)
+            else:
+                for partition, positions in keys.groupby(keys, sort=False).indices.items():
+                    self._writer(table, partition).write_table(arrow_table.take(positions))
+        self.row_counts[table] = self.row_counts.get(table, 0) + len(frame)
+
+    def close(self):
+        """Ferme tous les fichiers ouverts."""
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_table(output_dir: str, table: str, fmt: str = 'parquet', columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Relit une table écrite par ColumnarWriter, fichiers projetés en mémoire (mmap).
+
+    Les colonnes de partition Hive sont reconstruites ; columns limite la lecture
+    aux colonnes utiles.
+    """
+    if pa is None:
+        raise ImportError("La lecture Parquet/Arrow nécessite pyarrow (pip install pyarrow)")
+    if fmt not in FORMATS:
+        raise ValueError(f"Format inconnu: {fmt} (attendu: {', '.join(FORMATS)})")
+    import pyarrow.dataset as ds
+    from pyarrow.fs import LocalFileSystem
+    path = os.path.abspath(os.path.join(output_dir, table))
+    dataset = ds.dataset(path, format='parquet' if fmt == 'parquet' else 'ipc', partitioning='hive',
+                         filesystem=LocalFileSystem(use_mmap=True))
+    return dataset.to_table(columns=columns).to_pandas()
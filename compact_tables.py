@@ -0,0 +1,134 @@
+"""
+Représentation compacte des tables générées
+===========================================
+
+Une table en liste de dicts (statuts en chaînes, objets datetime.date,
+montants float) coûte plusieurs centaines d'octets par ligne. to_compact
+convertit un DataFrame en représentation typée :
+
+- identifiants et petits entiers en int32 (Int32 si valeurs manquantes) ;
+- champs à faible cardinalité (STATUS, CLIENT_TYPE, MATCH_TYPE, CATEGORY,
+  TYPE, OPERATION_LABEL...) en category ;
+- dates en datetime64 alignées au jour (résolution seconde, la plus fine
+  que pandas accepte au-dessus du jour, 8 octets comme datetime64[D]) ;
+- montants en centimes int64 (Int64 si valeurs manquantes), exacts.
+
+from_compact restitue la représentation d'export (euros float, chaînes).
+Les colonnes absentes d'une table sont ignorées : les schémas servent aussi
+aux tables de invoices_generate.
+"""
+
+import sys
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+COMPACT_ATTR = 'compact_table'
+
+TABLE_SCHEMAS = {
+    'clients': {
+        'int32': ['CLIENT_ID'],
+        'categories': ['CLIENT_TYPE', 'CITY'],
+        'dates': ['CREATED_AT'],
+        'money': []
+    },
+    'invoices': {
+        'int32': ['INVOICE_ID', 'CLIENT_ID', 'INVOICE_YEAR', 'QUANTITY'],
+        'categories': ['STATUS', 'CLIENT_TYPE', 'LABEL', 'TITRE'],
+        'dates': ['INVOICE_DATE', 'PAYMENT_DATE', 'ELECTRONIC_DATE', 'PHYSICAL_DATE',
+                  'EXPECTED_PAYMENT_DATE', 'CREATED_AT'],
+        'money': ['PU', 'TOTAL_HT', 'AMOUNT_TTC', 'MONTANT_TVA', 'RAS_5P', 'RAS_TVA', 'AMOUNT_TO_PAY']
+    },
+    'expenses': {
+        'int32': ['EXPENSE_ID'],
+        'categories': ['TYPE', 'CATEGORY', 'STATUS', 'TITLE'],
+        'dates': ['EXPENSE_DATE', 'CREATED_AT', 'UPDATED_AT', 'EXPECTED_PAYMENT_DATE'],
+        'money': ['AMOUNT']
+    },
+    'bank_statements': {
+        'int32': ['STATEMENT_ID', 'RELATED_INVOICE_ID', 'RELATED_EXPENSE_ID', 'ACTUAL_INVOICE_ID'],
+        'categories': ['OPERATION_LABEL', 'MATCH_TYPE', 'MIME_TYPE', 'SOURCE_FILENAME', 'COMMENTS'],
+        'dates': ['STATEMENT_DATE', 'VALUE_DATE', 'CREATED_AT'],
+        'money': ['DEBIT', 'CREDIT']
+    }
+}
+
+
+def is_compact(frame) -> bool:
+    return isinstance(frame, pd.DataFrame) and COMPACT_ATTR in frame.attrs
+
+
+def _present(frame: pd.DataFrame, columns: List[str]) -> List[str]:
+    return [column for column in columns if column in frame.columns]
+
+
+def to_compact(frame: pd.DataFrame, table: str) -> pd.DataFrame:
+    """Représentation compacte d'une table (voir TABLE_SCHEMAS)."""
+    schema = TABLE_SCHEMAS[table]
+    compact = frame.copy()
+    for column in _present(frame, schema['int32']):
+        values = pd.to_numeric(frame[column])
+        compact[column] = values.astype('Int32' if values.isna().any() else np.int32)
+    for column in _present(frame, schema['categories']):
+        compact[column] = frame[column].astype('category')
+    for column in _present(frame, schema['dates']):
+        dates = pd.to_datetime(frame[column])
+        # Les horodatages (ex: CREATED_AT de invoices_generate) gardent leur heure
+        if (dates.dropna() == dates.dropna().dt.normalize()).all():
+            compact[column] = dates.astype('datetime64[s]')
+    for column in _present(frame, schema['money']):
+        cents = np.round(pd.to_numeric(frame[column]) * 100)
+        compact[column] = cents.astype('Int64' if cents.isna().any() else np.int64)
+    compact.attrs[COMPACT_ATTR] = table
+    return compact
+
+
+def from_compact(frame: pd.DataFrame) -> pd.DataFrame:
+    """Représentation d'export d'une table compacte : euros float, chaînes, entiers int64 / Int64."""
+    schema = TABLE_SCHEMAS[frame.attrs[COMPACT_ATTR]]
+    expanded = frame.copy()
+    for column in _present(frame, schema['int32']):
+        ids = frame[column]
+        expanded[column] = ids.astype('Int64') if ids.isna().any() else ids.astype(np.int64)
+    for column in _present(frame, schema['categories']):
+        # Chaînes str (pandas 3) restituées telles quelles ; colonnes object : manquants en None
+        values = frame[column]
+        if values.cat.categories.dtype == object:
+            expanded[column] = values.astype(object).where(values.notna(), None)
+        else:
+            expanded[column] = values.astype(values.cat.categories.dtype)
+    for column in _present(frame, schema['money']):
+        expanded[column] = frame[column].astype(np.float64) / 100
+    expanded.attrs.pop(COMPACT_ATTR, None)
+    return expanded
+
+
+def records_memory(records: List[Dict]) -> int:
+    """Taille approchée (octets) d'une liste de dicts : liste, dicts et valeurs."""
+    size = sys.getsizeof(records)
+    for record in records:
+        size += sys.getsizeof(record) + sum(sys.getsizeof(value) for value in record.values())
+    return size
+
+
+def memory_per_million(frame: pd.DataFrame, table: str, sample_size: int = 20_000) -> Dict[str, float]:
+    """Mémoire mesurée (Mo par million de lignes) d'une table sous ses trois représentations.
+
+    Mesure sur un échantillon de sample_size lignes : liste de dicts, DataFrame
+    standard (profondeur comprise) et représentation compacte.
+    """
+    sample = frame.iloc[:sample_size]
+    if is_compact(sample):
+        sample = from_compact(sample)
+    if sample.empty:
+        return {}
+    scale = 1_000_000 / len(sample) / 1024 ** 2
+    records = sample.astype(object).where(sample.notna(), None)
+    for column in sample.select_dtypes(include=['datetime64']).columns:
+        records[column] = [None if pd.isna(value) else value.date() for value in sample[column]]
+    return {
+        'dicts': records_memory(records.to_dict('records')) * scale,
+        'dataframe': sample.memory_usage(deep=True).sum() * scale,
+        'compact': to_compact(sample, table).memory_usage(deep=True).sum() * scale
+    }
@@ -0,0 +1,138 @@
+"""
+Générateur aléatoire à compteur (Philox4x32-10)
+===============================================
+
+Un générateur séquentiel (np.random.Generator) impose de produire toutes les
+lignes précédentes pour obtenir la ligne N. CounterRNG calcule chaque tirage
+comme une fonction pure :
+
+    Philox4x32-10(clé = (graine, flux), compteur = (ligne, n° de tirage))
+
+La ligne N d'une table s'obtient donc seule, et elle ne dépend ni des autres
+lignes, ni de la taille des autres tables. CounterRNG reprend le sous-ensemble
+de l'API np.random.Generator utilisé par les générateurs batch ; chaque appel
+produit exactement une valeur par ligne (size = nombre de lignes).
+
+Implémentation vectorisée NumPy de Philox4x32-10 (Salmon et al., Random123),
+vérifiée sur les vecteurs de test de référence (tests/test_counter_rng.py).
+"""
+
+import zlib
+from typing import Optional, Tuple
+
+import numpy as np
+
+_MASK32 = np.uint64(0xFFFFFFFF)
+_PHILOX_M0 = np.uint64(0xD2511F53)
+_PHILOX_M1 = np.uint64(0xCD9E8D57)
+_PHILOX_W0 = 0x9E3779B9
+_PHILOX_W1 = 0xBB67AE85
+_PHILOX_ROUNDS = 10
+
+
+def philox4x32(counter: Tuple[np.ndarray, ...], key: Tuple[int, int]) -> Tuple[np.ndarray, ...]:
+    """Philox4x32-10 sur des compteurs vectorisés.
+
+    Args:
+        counter: 4 tableaux de mots de 32 bits (même forme).
+        key: 2 mots de 32 bits.
+
+    Returns:
+        4 tableaux uint64 de mots de 32 bits.
+
+    Vecteur de référence : compteur (0, 0, 0, 0), clé (0, 0)
+    -> (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8).
+    """
+    c0, c1, c2, c3 = (np.asarray(word, dtype=np.uint64) & _MASK32 for word in counter)
+    k0, k1 = key[0] & 0xFFFFFFFF, key[1] & 0xFFFFFFFF
+    for round_index in range(_PHILOX_ROUNDS):
+        if round_index:
+            k0 = (k0 + _PHILOX_W0) & 0xFFFFFFFF
+            k1 = (k1 + _PHILOX_W1) & 0xFFFFFFFF
+        product0 = _PHILOX_M0 * c0
+        product1 = _PHILOX_M1 * c2
+        c0, c1, c2, c3 = (
+            (product1 >> np.uint64(32)) ^ c1 ^ np.uint64(k0),
+            product1 & _MASK32,
+            (product0 >> np.uint64(32)) ^ c3 ^ np.uint64(k1),
+            product0 & _MASK32
+        )
+    return c0, c1, c2, c3
+
+
+def _unit_doubles(high: np.ndarray, low: np.ndarray) -> np.ndarray:
+    """Deux mots de 32 bits -> flottant uniforme sur [0, 1[ (53 bits)."""
+    return ((high >> np.uint64(5)) * np.uint64(1 << 26) + (low >> np.uint64(6))) / float(1 << 53)
+
+
+def stream_key(seed: int, stream: str) -> Tuple[int, int]:
+    """Clé Philox d'un flux : graine (32 bits bas) et empreinte CRC32 du nom du flux."""
+    return seed & 0xFFFFFFFF, zlib.crc32(stream.encode('utf-8')) ^ ((seed >> 32) & 0xFFFFFFFF)
+
+
+class CounterRNG:
+    """Tirages à compteur pour un ensemble de lignes, indexés par (graine, flux, ligne, n° de tirage)."""
+
+    def __init__(self, seed: int, stream: str, row_ids):
+        """
+        Args:
+            seed: Graine de base.
+            stream: Nom du flux, en général la table (ex: 'invoices').
+            row_ids: Identifiants des lignes tirées (une valeur par ligne et par appel).
+        """
+        self.key = stream_key(seed, stream)
+        self.row_ids = np.asarray(row_ids, dtype=np.uint64)
+        self.draw_index = 0
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def _check_size(self, size):
+        n = len(self.row_ids)
+        if size is not None and size != n and tuple(np.atleast_1d(size)) != (n,):
+            raise ValueError(f"CounterRNG: un tirage par ligne attendu (size={n}), reçu size={size}")
+
+    def _words(self) -> Tuple[np.ndarray, ...]:
+        counter = (self.row_ids & _MASK32, self.row_ids >> np.uint64(32),
+                   np.full(len(self.row_ids), self.draw_index, dtype=np.uint64), np.zeros(len(self.row_ids), np.uint64))
+        self.draw_index += 1
+        return philox4x32(counter, self.key)
+
+    def random(self, size=None) -> np.ndarray:
+        self._check_size(size)
+        x0, x1, _, _ = self._words()
+        return _unit_doubles(x0, x1)
+
+    def uniform(self, low=0.0, high=1.0, size=None) -> np.ndarray:
+        return low + (np.asarray(high) - low) * self.random(size)
+
+    def integers(self, low, high=None, size=None, endpoint: bool = False) -> np.ndarray:
+        if high is None:
+            low, high = 0, low
+        high = np.asarray(high) + (1 if endpoint else 0)
+        return (low + np.floor(self.random(size) * (high - low))).astype(np.int64)
+
+    def choice(self, a, size=None, replace: bool = True, p: Optional[np.ndarray] = None):
+        if not replace:
+            raise ValueError("CounterRNG: tirage sans remise impossible ligne par ligne")
+        values = np.arange(a) if np.ndim(a) == 0 else np.asarray(a)
+        u = self.random(size)
+        if p is None:
+            positions = np.floor(u * len(values)).astype(np.int64)
+        else:
+            cumulative = np.cumsum(p, dtype=np.float64)
+            positions = np.searchsorted(cumulative / cumulative[-1], u, side='right')
+        return values[np.minimum(positions, len(values) - 1)]
+
+    def normal(self, loc=0.0, scale=1.0, size=None) -> np.ndarray:
+        # Box-Muller sur les quatre mots d'un même tirage
+        self._check_size(size)
+        x0, x1, x2, x3 = self._words()
+        u1, u2 = _unit_doubles(x0, x1), _unit_doubles(x2, x3)
+        return loc + scale * np.sqrt(-2.0 * np.log1p(-u1)) * np.cos(2.0 * np.pi * u2)
+
+    def lognormal(self, mean=0.0, sigma=1.0, size=None) -> np.ndarray:
+        return np.exp(self.normal(mean, sigma, size))
+
+    def permutation(self, x):
+        raise ValueError("CounterRNG: permutation impossible ligne par ligne (ex: unique_emails)")
@@ -0,0 +1,118 @@
+"""
+Manifeste d'un dataset exporté
+==============================
+
+Petit fichier JSON (manifest.json) écrit à côté des CSV d'un export : par
+table, nombre de lignes, identifiant maximal (high-water mark) et dernière
+date métier, plus la graine et le nombre de générations déjà exportées.
+
+Le mode ajout (AccountingDatasetGenerator.append_period) ne relit que ce
+manifeste et la liste des clients pour prolonger le dataset : son coût ne
+dépend que des lignes ajoutées. Pour un export antérieur au manifeste,
+DatasetManifest.scan le reconstruit une fois en ne lisant que les colonnes
+identifiant / date des CSV.
+"""
+
+import json
+import os
+from datetime import date, datetime
+from typing import Dict, Optional
+
+import pandas as pd
+
+MANIFEST_FILE = 'manifest.json'
+MANIFEST_VERSION = 1
+
+# Colonne identifiant et colonne date de référence de chaque table
+TABLE_KEYS = {
+    'clients': ('CLIENT_ID', 'CREATED_AT'),
+    'invoices': ('INVOICE_ID', 'INVOICE_DATE'),
+    'expenses': ('EXPENSE_ID', 'EXPENSE_DATE'),
+    'bank_statements': ('STATEMENT_ID', 'STATEMENT_DATE')
+}
+
+
+class DatasetManifest:
+    """État résumé d'un dataset exporté, mis à jour bloc par bloc."""
+
+    def __init__(self, seed: Optional[int] = None, runs: int = 0, tables: Optional[Dict[str, Dict]] = None,
+                 periods: Optional[list] = None):
+        self.seed = seed
+        self.runs = runs
+        self.tables = tables or {}
+        self.periods = periods or []
+
+    def update(self, table: str, frame: pd.DataFrame):
+        """Ajoute un bloc de lignes d'une table (nombre de lignes, ID max, dernière date)."""
+        if table not in TABLE_KEYS or frame.empty:
+            return
+        id_column, date_column = TABLE_KEYS[table]
+        state = self.tables.setdefault(table, {'rows': 0, 'max_id': 0, 'last_date': None})
+        state['rows'] += len(frame)
+        state['max_id'] = max(state['max_id'], int(pd.to_numeric(frame[id_column]).max()))
+        last_date = pd.to_datetime(frame[date_column]).max()
+        if pd.notna(last_date):
+            last_date = last_date.date().isoformat()
+            if state['last_date'] is None or last_date > state['last_date']:
+                state['last_date'] = last_date
+
+    def max_id(self, table: str) -> int:
+        return self.tables.get(table, {}).get('max_id', 0)
+
+    def last_date(self) -> Optional[date]:
+        """Dernière date métier toutes tables de mouvements confondues."""
+        dates = [self.tables[table]['last_date'] for table in ('invoices', 'expenses', 'bank_statements')
+                 if self.tables.get(table, {}).get('last_date')]
+        return date.fromisoformat(max(dates)) if dates else None
+
+    def to_dict(self) -> Dict:
+        return {
+            'version': MANIFEST_VERSION,
+            'seed': self.seed,
+            'runs': self.runs,
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+            'tables': self.tables,
+            'periods': self.periods
+        }
+
+    def save(self, output_dir: str) -> str:
+        """Écrit output_dir/manifest.json (remplacement atomique)."""
+        path = os.path.join(output_dir, MANIFEST_FILE)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+        os.replace(path + '.tmp', path)
+        return path
+
+    @classmethod
+    def read(cls, output_dir: str) -> Optional['DatasetManifest']:
+        """Manifeste de output_dir, ou None s'il n'existe pas."""
+        path = os.path.join(output_dir, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != MANIFEST_VERSION:
+            raise ValueError(f"Version de manifeste non supportée: {data.get('version')}")
+        return cls(data.get('seed'), data.get('runs', 0), data.get('tables'), data.get('periods'))
+
+    @classmethod
+    def scan(cls, output_dir: str, chunksize: int = 1_000_000) -> 'DatasetManifest':
+        """Reconstruit le manifeste des CSV de output_dir (colonnes identifiant / date seulement)."""
+        manifest = cls(runs=1)
+        for table, columns in TABLE_KEYS.items():
+            csv_path = os.path.join(output_dir, f'{table}.csv')
+            if not os.path.exists(csv_path):
+                continue
+            for chunk in pd.read_csv(csv_path, usecols=list(columns), encoding='utf-8-sig', chunksize=chunksize):
+                manifest.update(table, chunk)
+        return manifest
+
+    @classmethod
+    def load(cls, output_dir: str) -> 'DatasetManifest':
+        """Manifeste de output_dir, reconstruit depuis les CSV s'il est absent."""
+        manifest = cls.read(output_dir)
+        if manifest is None:
+            if not os.path.exists(os.path.join(output_dir, 'invoices.csv')):
+                raise FileNotFoundError(f"Aucun dataset exporté dans {output_dir}")
+            manifest = cls.scan(output_dir)
+        return manifest
@@ -0,0 +1,229 @@
+"""
+Statistiques du dataset pour le rapport de synthèse
+===================================================
+
+DatasetStatistics tient des agrégats incrémentaux mis à jour bloc par bloc
+(une passe vectorisée par bloc, sans garder les lignes) :
+
+- nombre de lignes, comptages par valeur (statut, type, catégorie...) ;
+- sommes de montants en centimes entiers (exactes quel que soit le volume) ;
+- relevés liés à une facture / une dépense ;
+- histogrammes à bornes fixes des montants et des délais entre dates (jours).
+
+Les mêmes agrégats se calculent sur les tables en mémoire, au fil de la
+génération en streaming, par shard puis fusionnés (merge), ou en une passe
+sur les CSV exportés (from_csv, colonnes utiles seulement).
+"""
+
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Bornes des histogrammes : montants en euros, délais en jours
+AMOUNT_EDGES = [0, 10, 50, 100, 500, 1_000, 5_000, 10_000, 50_000]
+LAG_EDGES = [0, 1, 2, 4, 8, 15, 31, 61, 91, 181, 366]
+
+# Agrégats par table :
+#   counts   : colonnes comptées par valeur
+#   sums     : montants sommés (centimes)
+#   non_null : colonnes dont on compte les valeurs renseignées
+#   amount   : colonnes du montant de l'histogramme (la première renseignée)
+#   lag      : (date, date de référence) du délai en jours
+TABLE_STATISTICS = {
+    'clients': {'counts': ['CLIENT_TYPE'], 'sums': [], 'non_null': [], 'amount': [], 'lag': None},
+    'invoices': {
+        'counts': ['STATUS'],
+        'sums': ['TOTAL_HT', 'AMOUNT_TTC', 'AMOUNT_TO_PAY'],
+        'non_null': [],
+        'amount': ['AMOUNT_TTC'],
+        'lag': ('PAYMENT_DATE', 'INVOICE_DATE')
+    },
+    'expenses': {
+        'counts': ['STATUS', 'CATEGORY', 'TYPE'],
+        'sums': ['AMOUNT'],
+        'non_null': [],
+        'amount': ['AMOUNT'],
+        'lag': ('EXPECTED_PAYMENT_DATE', 'EXPENSE_DATE')
+    },
+    'bank_statements': {
+        'counts': [],
+        'sums': ['CREDIT', 'DEBIT'],
+        'non_null': ['RELATED_INVOICE_ID', 'RELATED_EXPENSE_ID'],
+        'amount': ['CREDIT', 'DEBIT'],
+        'lag': ('VALUE_DATE', 'STATEMENT_DATE')
+    }
+}
+
+HISTOGRAM_TITLES = {
+    'invoices': ('Montant TTC (€)', 'Délai de paiement (jours)'),
+    'expenses': ('Montant (€)', 'Échéance de paiement (jours)'),
+    'bank_statements': ('Montant (€)', 'Écart date de valeur (jours)')
+}
+
+
+class Histogram:
+    """Histogramme à bornes fixes : fusion par simple addition des comptages."""
+
+    def __init__(self, edges: List[float]):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        # Une classe sous la première borne, une par intervalle, une au-delà de la dernière
+        self.counts = np.zeros(len(edges) + 1, dtype=np.int64)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.counts += np.bincount(np.searchsorted(self.edges, values, side='right'), minlength=len(self.counts))
+
+    def merge(self, other: 'Histogram'):
+        self.counts += other.counts
+
+    def labels(self) -> List[str]:
+        edges = [f"{edge:,.0f}" for edge in self.edges]
+        return ([f"< {edges[0]}"] + [f"[{low}, {high}[" for low, high in zip(edges, edges[1:])]
+                + [f">= {edges[-1]}"])
+
+    def lines(self, width: int = 30) -> List[str]:
+        total = max(int(self.counts.sum()), 1)
+        peak = max(int(self.counts.max()), 1)
+        return [f"      {label:>18}: {count:>12,} ({count / total:6.1%}) {'#' * round(width * count / peak)}"
+                for label, count in zip(self.labels(), self.counts.tolist())]
+
+
+def _day_lags(frame: pd.DataFrame, column: str, reference: str) -> np.ndarray:
+    """Délai en jours column - reference (NaN si l'une des dates manque)."""
+    later = pd.to_datetime(frame[column]).to_numpy().astype('datetime64[D]')
+    earlier = pd.to_datetime(frame[reference]).to_numpy().astype('datetime64[D]')
+    lags = (later - earlier).astype(np.int64).astype(np.float64)
+    lags[np.isnat(later) | np.isnat(earlier)] = np.nan
+    return lags
+
+
+class DatasetStatistics:
+    """Agrégats incrémentaux des tables du dataset (voir TABLE_STATISTICS)."""
+
+    def __init__(self):
+        self.tables = {}
+
+    def _state(self, table: str) -> Dict:
+        if table not in self.tables:
+            spec = TABLE_STATISTICS[table]
+            self.tables[table] = {
+                'rows': 0,
+                'counts': {column: {} for column in spec['counts']},
+                'cents': {column: 0 for column in spec['sums']},
+                'non_null': {column: 0 for column in spec['non_null']},
+                'amounts': Histogram(AMOUNT_EDGES) if spec['amount'] else None,
+                'lags': Histogram(LAG_EDGES) if spec['lag'] else None
+            }
+        return self.tables[table]
+
+    def update(self, table: str, frame: pd.DataFrame):
+        """Ajoute un bloc de lignes d'une table aux agrégats."""
+        if table not in TABLE_STATISTICS or frame.empty:
+            return
+        spec = TABLE_STATISTICS[table]
+        state = self._state(table)
+        state['rows'] += len(frame)
+        for column, counts in state['counts'].items():
+            for value, count in frame[column].value_counts(sort=False).items():
+                counts[value] = counts.get(value, 0) + int(count)
+        for column in state['cents']:
+            cents = np.round(pd.to_numeric(frame[column]).to_numpy(dtype=np.float64) * 100)
+            state['cents'][column] += int(np.nansum(cents))
+        for column in state['non_null']:
+            state['non_null'][column] += int(frame[column].notna().sum())
+        if state['amounts'] is not None:
+            amount = pd.to_numeric(frame[spec['amount'][0]])
+            for column in spec['amount'][1:]:
+                amount = amount.fillna(pd.to_numeric(frame[column]))
+            state['amounts'].add(amount.abs())
+        if state['lags'] is not None:
+            state['lags'].add(_day_lags(frame, *spec['lag']))
+
+    def merge(self, other: 'DatasetStatistics'):
+        """Ajoute les agrégats d'un autre DatasetStatistics (ex: un shard)."""
+        for table, theirs in other.tables.items():
+            ours = self._state(table)
+            ours['rows'] += theirs['rows']
+            for column, counts in theirs['counts'].items():
+                for value, count in counts.items():
+                    ours['counts'][column][value] = ours['counts'][column].get(value, 0) + count
+            for key in ('cents', 'non_null'):
+                for column, value in theirs[key].items():
+                    ours[key][column] += value
+            for key in ('amounts', 'lags'):
+                if theirs[key] is not None:
+                    ours[key].merge(theirs[key])
+
+    @classmethod
+    def from_csv(cls, output_dir: str, chunksize: int = 1_000_000) -> 'DatasetStatistics':
+        """Agrégats des CSV exportés dans output_dir, en une passe bloc par bloc."""
+        stats = cls()
+        for table, spec in TABLE_STATISTICS.items():
+            csv_path = os.path.join(output_dir, f'{table}.csv')
+            if not os.path.exists(csv_path):
+                continue
+            columns = set(spec['counts'] + spec['sums'] + spec['non_null'] + spec['amount'] + list(spec['lag'] or ()))
+            header = pd.read_csv(csv_path, nrows=0, encoding='utf-8-sig').columns
+            usecols = [column for column in header if column in columns]
+            for chunk in pd.read_csv(csv_path, usecols=usecols, encoding='utf-8-sig', chunksize=chunksize):
+                stats.update(table, chunk)
+        return stats
+
+    def rows(self, table: str) -> int:
+        return self.tables.get(table, {}).get('rows', 0)
+
+    def euros(self, table: str, column: str) -> float:
+        return self.tables[table]['cents'][column] / 100
+
+    def report_lines(self) -> List[str]:
+        """Sections clients, factures, relevés, dépenses et distributions du rapport de synthèse."""
+        lines = []
+        if self.rows('clients'):
+            client_types = self.tables['clients']['counts']['CLIENT_TYPE']
+            lines += [f"CLIENTS ({self.rows('clients')} total):",
+                      f"  - Publics: {client_types.get('PUBLIC', 0)}",
+                      f"  - Privés: {client_types.get('PRIVATE', 0)}", ""]
+
+        if self.rows('invoices'):
+            lines.append(f"FACTURES ({self.rows('invoices')} total):")
+            lines += [f"  - {status}: {count}" for status, count in self.tables['invoices']['counts']['STATUS'].items()]
+            lines += [f"  - Montant total HT: {self.euros('invoices', 'TOTAL_HT'):,.2f} €",
+                      f"  - Montant total TTC: {self.euros('invoices', 'AMOUNT_TTC'):,.2f} €",
+                      f"  - Montant total à payer: {self.euros('invoices', 'AMOUNT_TO_PAY'):,.2f} €", ""]
+
+        if self.rows('bank_statements'):
+            linked = self.tables['bank_statements']['non_null']
+            orphans = self.rows('bank_statements') - linked['RELATED_INVOICE_ID'] - linked['RELATED_EXPENSE_ID']
+            lines += [f"RELEVES BANCAIRES ({self.rows('bank_statements')} total):",
+                      f"  - Liés à des factures: {linked['RELATED_INVOICE_ID']}",
+                      f"  - Liés à des dépenses: {linked['RELATED_EXPENSE_ID']}",
+                      f"  - Orphelins: {orphans}",
+                      f"  - Total crédits: {self.euros('bank_statements', 'CREDIT'):,.2f} €",
+                      f"  - Total débits: {self.euros('bank_statements', 'DEBIT'):,.2f} €", ""]
+
+        if self.rows('expenses'):
+            counts = self.tables['expenses']['counts']
+            lines += [f"DEPENSES ({self.rows('expenses')} total):",
+                      f"  - Montant total: {self.euros('expenses', 'AMOUNT'):,.2f} €"]
+            for title, column in [("Par statut", 'STATUS'), ("Par catégorie", 'CATEGORY'), ("Par type", 'TYPE')]:
+                lines.append(f"  - {title}:")
+                lines += [f"    - {value}: {count}" for value, count in counts[column].items()]
+            lines.append("")
+
+        histograms = [table for table in HISTOGRAM_TITLES if self.rows(table)]
+        if histograms:
+            lines.append("DISTRIBUTIONS:")
+            for table in histograms:
+                amount_title, lag_title = HISTOGRAM_TITLES[table]
+                state = self.tables[table]
+                lines.append(f"  - {table}")
+                lines.append(f"    {amount_title}:")
+                lines += state['amounts'].lines()
+                lines.append(f"    {lag_title}:")
+                lines += state['lags'].lines()
+            lines.append("")
+        return lines
+
@@ -0,0 +1,81 @@
+"""
+Fenêtres de dates des générateurs
+=================================
+
+Les générateurs batch tirent leurs dates dans des fenêtres décrites comme
+pour fake.date_between : décalage depuis aujourd'hui ('-2y', '-12M',
+'today'...) ou date. parse_date résout ces bornes localement, sans l'API
+privée de Faker, avec la même convention :
+
+- 'today' / 'now' : aujourd'hui ;
+- décalage signé, unités cumulables dans l'ordre y M w d h m s :
+  y = 365,24 jours, M = 30,42 jours, m = minutes (ex: '-18m' est la veille) ;
+  seule la partie en jours du décalage compte ;
+- date, datetime, Timestamp, datetime64, texte ISO ('2027-01-01'),
+  timedelta ou nombre de jours.
+
+random_dates et day_offsets tirent des dates et des décalages uniformes en
+tableaux datetime64[D] / timedelta64[D].
+"""
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Décalage relatif au format Faker : chaque unité est signée et optionnelle
+OFFSET_PATTERN = re.compile(''.join(rf'((?P<{name}>[+-]\d+){unit})?' for name, unit in [
+    ('years', 'y'), ('months', 'M'), ('weeks', 'w'), ('days', 'd'),
+    ('hours', 'h'), ('minutes', 'm'), ('seconds', 's')
+]))
+
+# Unités converties en jours (convention Faker)
+DAYS_PER_UNIT = {'years': 365.24, 'months': 30.42}
+
+
+def parse_date(value, today: Optional[date] = None) -> date:
+    """Borne de fenêtre -> date (today : date de référence des décalages, aujourd'hui par défaut)."""
+    today = today or date.today()
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, np.datetime64):
+        return pd.Timestamp(value).date()
+    if isinstance(value, timedelta):
+        return today + value
+    if isinstance(value, (int, np.integer)):
+        return today + timedelta(days=int(value))
+    if isinstance(value, str):
+        if value in ('today', 'now'):
+            return today
+        parts = OFFSET_PATTERN.fullmatch(value)
+        if parts and any(parts.groupdict().values()):
+            offset = {name: int(amount) for name, amount in parts.groupdict().items() if amount}
+            days = sum(offset.pop(name, 0) * factor for name, factor in DAYS_PER_UNIT.items())
+            return today + timedelta(days=offset.pop('days', 0) + days, **offset)
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            pass
+    raise ValueError(f"Borne de date invalide: {value!r}")
+
+
+def date_bounds(start_date, end_date, today: Optional[date] = None) -> Tuple[np.datetime64, np.datetime64]:
+    """Fenêtre de dates (bornes parse_date) -> bornes datetime64[D]."""
+    return (np.datetime64(parse_date(start_date, today), 'D'),
+            np.datetime64(parse_date(end_date, today), 'D'))
+
+
+def random_dates(rng: np.random.Generator, start_date, end_date, size: int) -> np.ndarray:
+    """Dates uniformes dans [start_date, end_date[ (au moins le jour start_date)."""
+    start, end = date_bounds(start_date, end_date)
+    span = max(int((end - start).astype(np.int64)), 1)
+    return start + rng.integers(0, span, size).astype('timedelta64[D]')
+
+
+def day_offsets(rng: np.random.Generator, low, high, size) -> np.ndarray:
+    """Décalages uniformes de low à high jours inclus (bornes scalaires ou par ligne)."""
+    return rng.integers(low, np.asarray(high) + 1, size).astype('timedelta64[D]')
@@ -0,0 +1,226 @@
+"""
+Écriture directe en base (DB-API 2.0)
+=====================================
+
+DatabaseSink pousse les blocs générés directement dans une base via une
+connexion DB-API (cx_Oracle / oracledb, sqlite3...), sans passer par des CSV :
+
+- insertion par lots executemany de batch_size lignes ;
+- COMMIT toutes les commit_interval lignes et en fin de bloc ;
+- petit pool de connexions : chaque table a son fil d'écriture, les tables
+  indépendantes (factures / dépenses) s'écrivent en parallèle ;
+- ordre des clés étrangères : un bloc n'est écrit qu'une fois les blocs
+  déjà soumis de ses tables parentes validés
+  (statuts et clients -> factures, factures et dépenses -> relevés -> liens) ;
+- débit (lignes/s) mesuré par table.
+
+SQLite sert de base locale de test à la place d'Oracle :
+
+    sink = DatabaseSink(lambda: sqlite3.connect('dataset.db', timeout=60, check_same_thread=False),
+                        create_tables=True)
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from oracle_loader import ORACLE_TABLES
+
+# Tables parentes de chaque table (clés étrangères)
+TABLE_DEPENDENCIES = {
+    'invoice_statuses': [],
+    'clients': [],
+    'invoices': ['invoice_statuses', 'clients'],
+    'expenses': [],
+    'bank_statements': ['invoices', 'expenses'],
+    'statement_links': ['bank_statements']
+}
+
+PLACEHOLDERS = {
+    'qmark': lambda i, column: '?',
+    'numeric': lambda i, column: f':{i + 1}',
+    'named': lambda i, column: f':{column}',
+    'format': lambda i, column: '%s',
+    'pyformat': lambda i, column: f'%({column})s'
+}
+
+
+def _python_rows(frame: pd.DataFrame) -> List[tuple]:
+    """Lignes d'un DataFrame en tuples de valeurs Python natives (NaN / NaT -> None)."""
+    columns = []
+    for column in frame.columns:
+        series = frame[column]
+        if pd.api.types.is_datetime64_any_dtype(series):
+            # Dates pures -> date, horodatages -> datetime
+            if (series.dropna() == series.dropna().dt.normalize()).all():
+                values = [None if pd.isna(v) else v.date() for v in series]
+            else:
+                values = [None if pd.isna(v) else v.to_pydatetime() for v in series]
+        elif column.endswith('_ID') and pd.api.types.is_float_dtype(series):
+            # IDs rendus flottants par les valeurs manquantes (ex: 2689.0) -> entiers
+            values = series.astype('Int64').astype(object).where(series.notna(), None).tolist()
+        else:
+            values = series.astype(object).where(series.notna(), None).tolist()
+        columns.append(values)
+    return list(zip(*columns))
+
+
+class ConnectionPool:
+    """Pool borné de connexions DB-API, créées à la demande."""
+
+    def __init__(self, connect: Callable, size: int = 4):
+        self.connect = connect
+        self.size = size
+        self._idle = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                return self.connect()
+        return self._idle.get()
+
+    def release(self, connection):
+        self._idle.put(connection)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get().close()
+
+
+class DatabaseSink:
+    """Écrit des blocs DataFrame dans une base DB-API, table par table, en parallèle."""
+
+    def __init__(self, connect: Callable, pool_size: int = 4, batch_size: int = 1000,
+                 commit_interval: int = 10_000, paramstyle: str = 'qmark',
+                 tables: Optional[Dict[str, str]] = None, create_tables: bool = False):
+        """
+        Args:
+            connect: Fonction sans argument retournant une connexion DB-API.
+            pool_size: Nombre maximal de connexions ouvertes (tables écrites en parallèle).
+            batch_size: Lignes par appel executemany.
+            commit_interval: Lignes insérées entre deux COMMIT.
+            paramstyle: Style des paramètres du pilote ('qmark' pour sqlite3, 'numeric' pour Oracle).
+            tables: Nom de table du dataset -> table en base (ORACLE_TABLES par défaut).
+            create_tables: Crée les tables manquantes à partir des colonnes du premier bloc
+                (base de test sans schéma, ex: SQLite).
+        """
+        if paramstyle not in PLACEHOLDERS:
+            raise ValueError(f"paramstyle inconnu: {paramstyle}")
+        self.pool = ConnectionPool(connect, pool_size)
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.paramstyle = paramstyle
+        self.tables = tables or ORACLE_TABLES
+        self.create_tables = create_tables
+        self.stats = {}
+        self._executors = {}
+        self._pending = {}
+        self._created = set()
+
+    def _insert_sql(self, db_table: str, columns: List[str]) -> str:
+        placeholder = PLACEHOLDERS[self.paramstyle]
+        values = ', '.join(placeholder(i, column) for i, column in enumerate(columns))
+        return f"INSERT INTO {db_table} ({', '.join(columns)}) VALUES ({values})"
+
+    def _insert(self, table: str, frame: pd.DataFrame):
+        db_table = self.tables[table]
+        columns = list(frame.columns)
+        rows = _python_rows(frame)
+        if self.paramstyle in ('named', 'pyformat'):
+            rows = [dict(zip(columns, row)) for row in rows]
+        sql = self._insert_sql(db_table, columns)
+
+        connection = self.pool.acquire()
+        try:
+            start = time.perf_counter()
+            cursor = connection.cursor()
+            if self.create_tables and table not in self._created:
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {db_table} ({', '.join(columns)})")
+                self._created.add(table)
+            uncommitted = 0
+            for offset in range(0, len(rows), self.batch_size):
+                batch = rows[offset:offset + self.batch_size]
+                cursor.executemany(sql, batch)
+                uncommitted += len(batch)
+                if uncommitted >= self.commit_interval:
+                    connection.commit()
+                    uncommitted = 0
+            # Bloc validé en entier : visible des tables filles écrites sur d'autres connexions
+            connection.commit()
+            cursor.close()
+            elapsed = time.perf_counter() - start
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            self.pool.release(connection)
+
+        stats = self.stats.setdefault(table, {'rows': 0, 'seconds': 0.0})
+        stats['rows'] += len(rows)
+        stats['seconds'] += elapsed
+
+    def write(self, table: str, frame: pd.DataFrame):
+        """Soumet un bloc à l'écriture (asynchrone, ordre conservé par table).
+
+        Attend d'abord que les blocs déjà soumis des tables parentes soient validés.
+        """
+        if frame.empty:
+            return
+        for parent in TABLE_DEPENDENCIES.get(table, []):
+            # Tous les blocs du parent : l'échec d'un bloc ancien n'est pas masqué par un bloc validé ensuite
+            for future in self._pending.get(parent, []):
+                future.result()
+        if table not in self._executors:
+            self._executors[table] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f'sink-{table}')
+        # Blocs validés retirés (leur DataFrame est libéré) ; les blocs en échec restent jusqu'à flush
+        futures = [future for future in self._pending.get(table, [])
+                   if not future.done() or future.exception() is not None]
+        futures.append(self._executors[table].submit(self._insert, table, frame))
+        self._pending[table] = futures
+
+    def flush(self):
+        """Attend la fin de toutes les écritures soumises ; relance la première erreur rencontrée."""
+        pending, self._pending = self._pending, {}
+        error = None
+        for futures in pending.values():
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as exc:
+                    error = error or exc
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Termine les écritures et ferme les connexions."""
+        try:
+            self.flush()
+        finally:
+            for executor in self._executors.values():
+                executor.shutdown(wait=True)
+            self._executors = {}
+            self.pool.close()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Lignes, durée d'insertion et débit (lignes/s) par table."""
+        return {
+            table: {
+                'rows': stats['rows'],
+                'seconds': round(stats['seconds'], 3),
+                'rows_per_sec': round(stats['rows'] / stats['seconds']) if stats['seconds'] else 0
+            }
+            for table, stats in self.stats.items()
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,101 @@
+"""
+Table de liens relevé -> document
+=================================
+
+Un relevé bancaire peut régler un document (paiement simple), une partie d'un
+document (versement d'un paiement partiel) ou plusieurs documents (paiement
+groupé). Plutôt que des listes d'IDs jointes par des virgules
+(GROUPED_INVOICE_IDS, related_expense_id "6755,6756,6758"), chaque générateur
+émet aussi une table plusieurs-à-plusieurs typée :
+
+    STATEMENT_ID  DOCUMENT_TYPE  DOCUMENT_ID  ALLOCATED_AMOUNT
+    int64         category       int64        float64
+
+Une ligne par couple (relevé, document) avec le montant affecté au document :
+les jointures aval sont des jointures entières, sans analyse de texte.
+exploded_view reconstruit la vue « une ligne par document » des relevés ;
+explode_id_lists reste disponible pour les anciens fichiers à listes d'IDs.
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+LINK_COLUMNS = ['STATEMENT_ID', 'DOCUMENT_TYPE', 'DOCUMENT_ID', 'ALLOCATED_AMOUNT']
+DOCUMENT_TYPES = ['INVOICE', 'EXPENSE']
+
+
+def link_frame(statement_ids, document_type: str, document_ids, allocated_amounts) -> pd.DataFrame:
+    """Liens d'un lot de relevés vers des documents de type document_type (une ligne par lien)."""
+    if document_type not in DOCUMENT_TYPES:
+        raise ValueError(f"Type de document inconnu: {document_type}")
+    statement_ids = np.asarray(statement_ids, dtype=np.int64)
+    return pd.DataFrame({
+        'STATEMENT_ID': statement_ids,
+        'DOCUMENT_TYPE': pd.Categorical.from_codes(np.full(len(statement_ids), DOCUMENT_TYPES.index(document_type)),
+                                                   categories=DOCUMENT_TYPES),
+        'DOCUMENT_ID': np.asarray(document_ids, dtype=np.int64),
+        'ALLOCATED_AMOUNT': np.asarray(allocated_amounts, dtype=np.float64)
+    }, columns=LINK_COLUMNS)
+
+
+def concat_links(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatène des lots de liens en gardant les types (DOCUMENT_TYPE catégoriel)."""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return link_frame([], DOCUMENT_TYPES[0], [], [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def related_links(statements: pd.DataFrame, related_columns: Dict[str, str],
+                  amount_columns: Sequence[str] = ('CREDIT', 'DEBIT'),
+                  statement_id: str = 'STATEMENT_ID') -> pd.DataFrame:
+    """Liens des relevés à un seul document par type (RELATED_INVOICE_ID, RELATED_EXPENSE_ID...).
+
+    Args:
+        statements: Relevés (ex: BANK_STATEMENT de AccountingDatasetGenerator).
+        related_columns: Colonne d'ID lié par DOCUMENT_TYPE, ex: {'INVOICE': 'RELATED_INVOICE_ID'}.
+        amount_columns: Colonnes du montant affecté (première renseignée).
+        statement_id: Colonne d'ID de statements.
+    """
+    amounts = pd.to_numeric(statements[amount_columns[0]]).to_numpy(dtype=np.float64)
+    for column in amount_columns[1:]:
+        amounts = np.where(np.isnan(amounts), pd.to_numeric(statements[column]).to_numpy(dtype=np.float64), amounts)
+    statement_ids = statements[statement_id].to_numpy()
+    frames = []
+    for document_type, column in related_columns.items():
+        related = statements[column].notna().to_numpy()
+        frames.append(link_frame(statement_ids[related], document_type,
+                                 statements[column].to_numpy()[related], amounts[related]))
+    return concat_links(frames).sort_values('STATEMENT_ID', kind='stable', ignore_index=True)
+
+
+def exploded_view(statements: pd.DataFrame, links: pd.DataFrame, document_column: str,
+                  statement_id: str = 'STATEMENT_ID') -> pd.DataFrame:
+    """Relevés répétés une fois par document lié, l'ID du document dans document_column.
+
+    Jointure entière par hachage sur l'ID de relevé ; les relevés sans lien
+    n'apparaissent pas. ALLOCATED_AMOUNT donne la part du relevé affectée au document.
+    """
+    positions = pd.Index(statements[statement_id]).get_indexer(links['STATEMENT_ID'])
+    found = positions >= 0
+    exploded = statements.iloc[positions[found]].reset_index(drop=True)
+    exploded[document_column] = links['DOCUMENT_ID'].to_numpy()[found]
+    exploded['ALLOCATED_AMOUNT'] = links['ALLOCATED_AMOUNT'].to_numpy()[found]
+    return exploded
+
+
+def explode_id_lists(frame: pd.DataFrame, ids_column: str, document_column: str) -> pd.DataFrame:
+    """Déplie une colonne de listes d'IDs ("6755,6756,6758") : une ligne par ID, en float.
+
+    Pour les fichiers sans table de liens. Toutes les listes sont découpées en
+    un seul split sur leur concaténation ; une valeur vide donne un ID NaN.
+    """
+    texts = frame[ids_column].astype(str).to_numpy(dtype=object)
+    counts = np.fromiter((text.count(',') + 1 for text in texts), dtype=np.int64, count=len(texts))
+    ids = pd.to_numeric(pd.Series(",".join(texts).split(",") if len(texts) else [], dtype=object).str.strip(),
+                        errors='coerce')
+    exploded = frame.iloc[np.repeat(np.arange(len(frame)), counts)].reset_index(drop=True)
+    exploded[document_column] = ids.to_numpy(dtype=np.float64)
+    return exploded
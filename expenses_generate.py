@@ -0,0 +1,876 @@
+"""
+Génération des dépenses et de leurs transactions bancaires
+==========================================================
+
+Version module des scénarios du notebook expences_transaction_generate.ipynb :
+
+- generate_transaction_expenses_matched : une transaction par dépense ;
+- generate_unmatched_transactions_expenses : transactions rendues difficiles à apparier ;
+- generate_partial_payment_expenses : 2 à 5 paiements partiels par dépense ;
+- generate_grouped_payment_expenses : plusieurs dépenses réglées en une transaction.
+
+Chaque colonne est tirée en une fois sous forme de tableau NumPy (type de
+paiement, catégorie, montant, libellés, dates). Les libellés sont rendus par
+groupe de lignes (même catégorie / moyen de paiement, même modèle) : le modèle
+est découpé une fois en segments, concaténés sur tout le groupe.
+"""
+
+import os
+from itertools import combinations
+from string import Formatter
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from date_windows import day_offsets, random_dates
+from document_links import concat_links, link_frame
+from installments import split_installments
+from payment_groups import group_payments
+from partitioned_writer import write_csv_files
+from stage_metrics import advance, measured
+from value_pools import FakerValuePool
+
+RNG = np.random.default_rng()
+VALUE_POOLS = FakerValuePool(locale='fr_FR')
+
+EXPENSE_CATEGORIES = [
+    'Divertissement',
+    'Services_Publiques',
+    'Abonnements',
+    'Licences_Logicielles',
+    'Services_Cloud',
+    'Outils_RH',
+    'Marketing',
+    'Fournitures_Bureau',
+    'Équipement',
+    'Déplacements',
+    'Formations',
+    'Juridique_Conformité',
+    'Assurances',
+    'Frais_Bancaires',
+    'Conseil',
+    'Maintenance'
+]
+
+PAYMENT_TYPES = ['mensuel', 'trimestriel', 'annuel', 'divers']
+
+PAYMENT_TYPE_WEIGHTS = {
+    'mensuel': 0.45,
+    'trimestriel': 0.15,
+    'annuel': 0.25,
+    'divers': 0.15
+}
+
+TITLE_TEMPLATES = {
+    'Divertissement': ['Événement de cohésion', 'Dîner client', 'Fête d’entreprise', 'Célébration annuelle', 'Déjeuner d’équipe'],
+    'Services_Publiques': ['Facture électricité', 'Abonnement Internet', 'Téléphonie entreprise', 'Facture eau', 'Chauffage bureau'],
+    'Abonnements': ['Microsoft 365', 'Slack Premium', 'Zoom Pro', 'Adobe Creative Cloud', 'GitHub Entreprise'],
+    'Licences_Logicielles': ['Licence Windows Server', 'Base de données Oracle', 'Licence SAP', 'Licence Salesforce', 'Power BI Pro'],
+    'Services_Cloud': ['Hébergement AWS', 'Services Azure', 'Google Cloud Platform', 'DigitalOcean', 'Cloudflare'],
+    'Outils_RH': ['LinkedIn Recruiter', 'BambooHR', 'Workday', 'Logiciel ATS', 'Outil Performance'],
+    'Marketing': ['Google Ads', 'Marketing Facebook', 'Développement site web', 'Outils SEO', 'Création de contenu'],
+    'Fournitures_Bureau': ['Ramettes papier', 'Papeterie', 'Produits de nettoyage', 'Fournitures café', 'Accessoires de bureau'],
+    'Équipement': ['Achat ordinateur', 'Écran de travail', 'Chaise ergonomique', 'Matériel d’impression', 'Équipement réseau'],
+    'Déplacements': ['Voyage d’affaires', 'Billets d’avion', 'Hébergement hôtelier', 'Location de voiture', 'Déplacement conférence'],
+    'Formations': ['Formation technique', 'Certification professionnelle', 'Cours en ligne', 'Participation atelier', 'Développement compétences'],
+    'Juridique_Conformité': ['Consultation juridique', 'Audit de conformité', 'Révision contrat', 'Mise en conformité RGPD'],
+    'Assurances': ['Assurance responsabilité', 'Assurance cybersécurité', 'Assurance bureau', 'Assurance véhicule', 'Mutuelle santé'],
+    'Frais_Bancaires': ['Frais de transaction', 'Frais tenue de compte', 'Transfert international', 'Frais de change', 'Service bancaire'],
+    'Conseil': ['Conseil informatique', 'Conseil RH', 'Conseil stratégique', 'Audit technique', 'Analyse métier'],
+    'Maintenance': ['Maintenance serveur', 'Support logiciel', 'Réparation matériel', 'Assistance IT', 'Mise à niveau système']
+}
+
+AMOUNT_RANGES = {
+    'mensuel': {
+        'Services_Publiques': [200, 1500],
+        'Abonnements': [50, 800],
+        'Services_Cloud': [100, 2000],
+        'Outils_RH': [100, 1200],
+        'default': [150, 1000]
+    },
+    'trimestriel': {
+        'Licences_Logicielles': [1000, 8000],
+        'Formations': [500, 3000],
+        'Marketing': [800, 5000],
+        'default': [800, 4000]
+    },
+    'annuel': {
+        'Licences_Logicielles': [3000, 25000],
+        'Assurances': [2000, 15000],
+        'Juridique_Conformité': [1500, 12000],
+        'Équipement': [1000, 8000],
+        'default': [2000, 12000]
+    },
+    'divers': {
+        'Divertissement': [100, 2000],
+        'Déplacements': [300, 8000],
+        'Fournitures_Bureau': [50, 800],
+        'Équipement': [200, 5000],
+        'Conseil': [1000, 10000],
+        'Maintenance': [200, 3000],
+        'default': [100, 3000]
+    }
+}
+
+LABEL_TEMPLATES = {
+    'Divertissement': {
+        'mensuel': ['ÉVÉNEMENTS_EQUIPE', 'RELATIONS_CLIENTS', 'BIEN_ETRE_EMPLOYÉS'],
+        'trimestriel': ['PLANIFICATION_EVENEMENT', 'CÉLÉBRATION_TRIMESTRIELLE'],
+        'annuel': ['RETRAITE_ANNUELLE', 'FÊTE_FIN_ANNÉE'],
+        'divers': ['ÉVÉNEMENT_ENTREPRISE', 'REPAS_AFFAIRE', 'ACTIVITÉ_EQUIPE']
+    },
+    'Services_Publiques': {
+        'mensuel': ['SERVICES_UTILITAIRES', 'TÉLÉCOM', 'FRAIS_BUREAU'],
+        'trimestriel': ['RÉGLEMENT_FACTURE', 'ÉNERGIE'],
+        'annuel': ['CONTRAT_ANNUEL_UTILITÉ', 'FACTURE_ANNUELLE'],
+        'divers': ['FRAIS_EXCEPTIONS', 'SURCOÛT_UTILITÉ']
+    },
+    'Abonnements': {
+        'mensuel': ['ABONNEMENT_LOGICIEL', 'PLATEFORME_SAAS', 'OUTILS_NUMÉRIQUES'],
+        'trimestriel': ['LICENCE_3M', 'ABONNEMENT_TRIMESTRIEL'],
+        'annuel': ['LICENCE_ANNUELLE', 'ABONNEMENT_PLATEFORME'],
+        'divers': ['FRAIS_SUPPLÉMENTAIRES', 'MODULE_OPTIONNEL']
+    },
+    'Licences_Logicielles': {
+        'mensuel': ['LICENCE_MENSUELLE', 'SOUSCRIPTION_LOGICIEL'],
+        'trimestriel': ['LOGICIEL_PRO', 'PLATEFORME_TECHNIQUE'],
+        'annuel': ['LICENCE_ENTREPRISE', 'SUITE_LOGICIELLE'],
+        'divers': ['ACHAT_LOGICIEL', 'LICENCE_PONCTUELLE']
+    },
+    'Services_Cloud': {
+        'mensuel': ['HÉBERGEMENT_CLOUD', 'INFRA_SAAS'],
+        'trimestriel': ['SERVICES_HÉBERGEMENT'],
+        'annuel': ['CONTRAT_CLOUD_ANNUEL'],
+        'divers': ['STOCKAGE_SUPPLÉMENTAIRE']
+    },
+    'Outils_RH': {
+        'mensuel': ['LOGICIEL_RH', 'OUTILS_RECRUTEMENT'],
+        'trimestriel': ['PACK_RECRUTEMENT'],
+        'annuel': ['SYSTÈME_GESTION_RH'],
+        'divers': ['MODULE_FORMATION']
+    },
+    'Marketing': {
+        'mensuel': ['MARKETING_DIGITAL', 'OUTILS_COMMUNICATION'],
+        'trimestriel': ['FORFAIT_SEO', 'CAMPAGNE_PUB'],
+        'annuel': ['CONTRAT_BRANDING'],
+        'divers': ['PROJET_MARKETING']
+    },
+    'Fournitures_Bureau': {
+        'mensuel': ['FOURNITURES_MENSUELLES'],
+        'trimestriel': ['RÉAPPROVISIONNEMENT'],
+        'annuel': ['ACHAT_ANNUEL_FOURNITURES'],
+        'divers': ['MATÉRIEL_BUREAU']
+    },
+    'Équipement': {
+        'mensuel': ['LOCATION_MATÉRIEL'],
+        'trimestriel': ['REMPLACEMENT_TECH'],
+        'annuel': ['INVESTISSEMENT_INFRA'],
+        'divers': ['ACHAT_ÉQUIPEMENT']
+    },
+    'Déplacements': {
+        'mensuel': ['FRAIS_DÉPLACEMENT'],
+        'trimestriel': ['VOYAGE_RÉGIONAL'],
+        'annuel': ['VOYAGE_INTERNATIONAL'],
+        'divers': ['CONFÉRENCE_PRO']
+    },
+    'Formations': {
+        'mensuel': ['COURS_EMPLOYÉ', 'FORMATION_CONTINUE'],
+        'trimestriel': ['CERTIFICATION', 'ATELIER'],
+        'annuel': ['PROGRAMME_FORMATION'],
+        'divers': ['BOOTCAMP']
+    },
+    'Juridique_Conformité': {
+        'mensuel': ['SUIVI_JURIDIQUE'],
+        'trimestriel': ['AUDIT_CONFORMITÉ'],
+        'annuel': ['PROGRAMME_CONFORMITÉ'],
+        'divers': ['SOUTIEN_URGENT']
+    },
+    'Assurances': {
+        'mensuel': ['PRIME_MENSUELLE'],
+        'trimestriel': ['POLICE_RISQUE'],
+        'annuel': ['COUVERTURE_PRO'],
+        'divers': ['FRAIS_SINISTRE']
+    },
+    'Frais_Bancaires': {
+        'mensuel': ['FRAIS_BANQUE'],
+        'trimestriel': ['FRAIS_TRANSFERT'],
+        'annuel': ['FRAIS_ANNUELS'],
+        'divers': ['FRAIS_PONCTUELS']
+    },
+    'Conseil': {
+        'mensuel': ['SUPPORT_MENSUEL'],
+        'trimestriel': ['PLANIFICATION_STRATÉGIQUE'],
+        'annuel': ['CONTRAT_CONSEIL'],
+        'divers': ['AVIS_PRO']
+    },
+    'Maintenance': {
+        'mensuel': ['MAINTENANCE_SYSTÈME'],
+        'trimestriel': ['VÉRIFICATIONS_PLANIFIÉES'],
+        'annuel': ['PLAN_MAINTENANCE'],
+        'divers': ['CONTRAT_ENTRETIEN']
+    }
+}
+
+PAYMENT_METHODS = {
+    'mensuel': ['DIRECT_DEBIT', 'BANK_TRANSFER', 'CREDIT_CARD'],
+    'trimestriel': ['BANK_TRANSFER', 'CHECK', 'DIRECT_DEBIT'],
+    'annuel': ['BANK_TRANSFER', 'CHECK'],
+    'divers': ['CREDIT_CARD', 'BANK_TRANSFER', 'CASH', 'CHECK']
+}
+
+COMMENT_TEMPLATES = {
+    'Divertissement': ['Activité d’équipe pour renforcer la cohésion', 'Dîner client pour opportunité commerciale', 'Événement interne trimestriel', 'Déjeuner mensuel du personnel'],
+    'Services_Publiques': ['Facture électricité bureau Casablanca', 'Internet professionnel haut débit', 'Téléphonie équipe interne', 'Frais climatisation et chauffage'],
+    'Abonnements': ['Plateforme collaborative équipes à distance', 'Licences utilisateurs productivité', 'Outil vidéo pour réunions clients', 'Suite créative marketing'],
+    'Licences_Logicielles': ['Licence serveur IT', 'Base données projets clients', 'CRM pour suivi ventes', 'Outils décisionnels'],
+    'Services_Cloud': ['Hébergement scalable', 'Cloud computing développement produit', 'Sécurité des données', 'Développement agile'],
+    'Outils_RH': ['Plateforme recrutement', 'Système RH intégré', 'Outil évaluation performance', 'Formation continue en ligne'],
+    'Marketing': ['Campagne publicitaire en ligne', 'Développement site entreprise', 'SEO visibilité web', 'Création contenu réseaux sociaux'],
+    'Fournitures_Bureau': ['Papeterie et matériel', 'Produits hygiène', 'Snacks et café', 'Accessoires de bureau'],
+    'Équipement': ['Renouvellement matériel IT', 'Écrans HD', 'Mobilier ergonomique', 'Infrastructure réseau'],
+    'Déplacements': ['Voyage pour nouveau marché', 'Formation/conférence', 'Visite client', 'Formation externe hors site'],
+    'Formations': ['Certification IT', 'Cours en ligne', 'Atelier management', 'Développement leadership'],
+    'Juridique_Conformité': ['Conseil contrats', 'Audit conformité RGPD', 'Revue gouvernance', 'Appui réglementaire'],
+    'Assurances': ['Responsabilité civile', 'Cyber-risque', 'Assurance bureau', 'Protection juridique'],
+    'Frais_Bancaires': ['Frais de compte', 'Commission transfert', 'Change devises', 'Services carte entreprise'],
+    'Conseil': ['Conseil stratégique', 'Expertise technique', 'Accompagnement digital', 'Audit organisationnel'],
+    'Maintenance': ['Maintenance préventive', 'Support logiciel', 'Réparation équipement', 'Contrat maintenance systèmes']
+}
+
+# Catégories possibles de chaque type de paiement
+CATEGORY_CHOICES = {
+    'mensuel': ['Services_Publiques', 'Abonnements', 'Services_Cloud', 'Outils_RH', 'Frais_Bancaires'],
+    'trimestriel': ['Licences_Logicielles', 'Formations', 'Marketing', 'Juridique_Conformité'],
+    'annuel': ['Licences_Logicielles', 'Assurances', 'Juridique_Conformité', 'Équipement'],
+    'divers': ['Divertissement', 'Déplacements', 'Fournitures_Bureau', 'Équipement', 'Conseil', 'Maintenance']
+}
+
+# Fenêtre des dates de dépense (syntaxe Faker)
+EXPENSE_DATE_WINDOW = ('-12M', 'today')
+
+# Délai maximal (jours) entre une dépense et son premier paiement
+PAYMENT_DELAY_DAYS = {'mensuel': 5, 'trimestriel': 15, 'annuel': 15, 'divers': 10}
+
+# Écart (min, max) en jours entre deux paiements partiels successifs
+PARTIAL_STEP_DAYS = {'mensuel': (3, 7), 'trimestriel': (5, 14), 'annuel': (5, 14), 'divers': (3, 10)}
+
+# Libellés d'opération par scénario et moyen de paiement. Champs : title, title20 / title25
+# (titre tronqué), category, number (n° de dépense), number6 (6 derniers caractères),
+# part / parts (rang et nombre de versements), count (taille du groupe)
+OPERATION_TEMPLATES = {
+    'matched': {
+        'DIRECT_DEBIT': ["PRLV {title}", "PRÉLÈVEMENT AUTO {category}", "RÉCURRENCE {title25}"],
+        'BANK_TRANSFER': ["VIREMENT {number}", "TRANSFERT {category}", "VIR REF {number}"],
+        'CREDIT_CARD': ["CB {title20}", "PAIEMENT CB {category}"],
+        'CHECK': ["CHÈQUE {number}", "CHÈQUE N°{number6}"],
+        'CASH': ["ESPECES {title25}", "CAISSE {category}"]
+    },
+    'unmatched': {
+        'DIRECT_DEBIT': ["DD {title}", "PRÉLÈVEMENT AUTO {category}", "RÉCURRENCE {title25}"],
+        'BANK_TRANSFER': ["VIREMENT  {number}", "TRANSFERT  {category}", "VIR REF {number}"],
+        'CREDIT_CARD': ["CB  {title20}", "PAIEMENT CB {category}"],
+        'CHECK': ["CHÈQUE  {number}", "CHÈQUE N° #{number6}"],
+        'CASH': ["ESPECES  {title25}", "CAISSE  {category}"]
+    },
+    'partial': {
+        'DIRECT_DEBIT': ["PRÉLÈVEMENT PARTIEL {title} {part}/{parts}",
+                         "PRÉLÈVEMENT AUTOMATIQUE {category} PARTIE {part}",
+                         "RÉCURRENCE PARTIE {part}/{parts}"],
+        'BANK_TRANSFER': ["VIREMENT PARTIE {number}-{part}", "TRANSFERT {category} PARTIE {part}",
+                          "VIREMENT PARTIEL {number} {part}/{parts}"],
+        'CREDIT_CARD': ["CARTE PARTIE {title20} {part}", "PAIEMENT CB {category} PARTIE {part}"],
+        'CHECK': ["CHÈQUE PARTIE {number} {part}", "CHÈQUE N°{number6} PARTIE {part}"],
+        'CASH': ["ESPECES PARTIE {title25} {part}", "CAISSE {category} PARTIE {part}"]
+    },
+    'grouped': {
+        'DIRECT_DEBIT': ["PRELEVEMENT GROUPE {count} DEPENSES", "PRELEVEMENT AUTO {category} GROUPE",
+                         "RECURRENCE LOT {title25}"],
+        'BANK_TRANSFER': ["VIREMENT GROUPE {number}", "TRANSFERT {category} LOT", "VIR GROUPE {count} ELEMENTS"],
+        'CREDIT_CARD': ["CARTE GROUPE {title20}", "PAIEMENT CB {category} LOT"],
+        'CHECK': ["CHEQUE GROUPE {number}", "CHEQUE N°{number6} GROUPE"],
+        'CASH': ["ESPECES GROUPE {title25}", "PETITE CAISSE {category} LOT"]
+    }
+}
+
+# Registre des stratégies de difficulté des transactions non appariées (voir unmatched_strategy),
+# appliquées dans l'ordre d'enregistrement : nom -> {'label', 'apply', 'keeps_operation_label'}
+UNMATCHED_STRATEGIES: Dict[str, Dict] = {}
+
+# Paramètres des stratégies enregistrées plus bas
+AMOUNT_FACTORS = [0.3, 0.5, 1.7, 2.1, 3.2]
+GENERIC_OPERATION_LABELS = ["OPERATION DIVERSE", "PAIEMENT AUTOMATIQUE", "PRELEVEMENT SEPA", "DECAISSEMENT",
+                            "CARTE BANCAIRE", "VIREMENT EXTERNE"]
+# '???-###' : référence aléatoire (fake.lexify)
+GENERIC_ADDITIONAL_LABELS = ["REF MANQUANTE", "OPERATION MANUELLE", "AUCUNE REFERENCE", "???-###", "N/D"]
+FOREIGN_CURRENCIES = ["USD", "GBP", "CHF", "CAD", "EUR"]
+WRONG_REFERENCE_YEARS = [2020, 2021, 2022, 2026, 2027]
+
+EXPENSE_COLUMNS = ['expense_id', 'title', 'amount', 'label', 'comments', 'expense_date', 'type', 'category',
+                   'expense_number', 'status']
+TRANSACTION_COLUMNS = ['statement_id', 'statement_date', 'operation_label', 'additional_label', 'debit', 'credit',
+                       'comments', 'related_invoice_id', 'related_expense_id', 'value_date', 'source_filename']
+
+# Fichiers (dépenses, transactions) de chaque scénario, noms repris du notebook
+SCENARIO_FILES = {
+    'matched': ('expenses_matched.csv', 'bank_transactions_matched.csv'),
+    'unmatched': ('expenses_unmatched.csv', 'bank_transactions_unmatched.csv'),
+    'partial': ('expenses_partial_payments.csv', 'bank_transactiosns_partial_payments.csv'),
+    'grouped': ('expenses_grouped_paymets.csv', 'bank_transactions_grouped_payments.csv')
+}
+# Table de liens transaction -> dépense de chaque scénario (voir document_links)
+LINK_FILES = {scenario: f'statement_links_{scenario}.csv' for scenario in SCENARIO_FILES}
+
+
+def _groups(*keys):
+    """(valeur, positions) de chaque valeur distincte de keys, en un seul tri.
+
+    Avec plusieurs tableaux de clés, la valeur est le tuple des clés de la combinaison.
+    """
+    codes, uniques = pd.factorize(np.asarray(keys[0], dtype=object))
+    values = list(uniques) if len(keys) == 1 else [(value,) for value in uniques]
+    for key in keys[1:]:
+        key_codes, key_uniques = pd.factorize(np.asarray(key, dtype=object))
+        codes = codes * len(key_uniques) + key_codes
+        values = [value + (key_value,) for value in values for key_value in key_uniques]
+    order = np.argsort(codes, kind='stable')
+    bounds = np.cumsum(np.bincount(codes, minlength=len(values)))[:-1]
+    return ((value, rows) for value, rows in zip(values, np.split(order, bounds)) if len(rows))
+
+
+def _text(values) -> np.ndarray:
+    """Entiers -> chaînes (objets Python), formatés une fois par valeur distincte."""
+    uniques, inverse = np.unique(np.asarray(values), return_inverse=True)
+    return uniques.astype(str).astype(object)[inverse]
+
+
+def _mapped(values, function) -> np.ndarray:
+    """function appliquée une fois par valeur distincte de values (chaînes peu variées)."""
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+    return np.array([function(value) for value in uniques] + [None], dtype=object)[codes]
+
+
+def choose_by_key(options_by_key: Dict, *keys) -> np.ndarray:
+    """Tire pour chaque ligne une valeur de options_by_key[clé de la ligne], groupe par groupe.
+
+    Avec plusieurs tableaux de clés, options_by_key est un dictionnaire imbriqué
+    (options_by_key[clé1][clé2]...).
+    """
+    chosen = np.empty(len(keys[0]), dtype=object)
+    for key, rows in _groups(*keys):
+        options = options_by_key
+        for part in (key if len(keys) > 1 else (key,)):
+            options = options[part]
+        options = np.asarray(options, dtype=object)
+        chosen[rows] = options[RNG.integers(0, len(options), len(rows))]
+    return chosen
+
+
+def render_template(template: str, fields: Dict[str, np.ndarray], rows: np.ndarray) -> np.ndarray:
+    """Rend un modèle '{champ}' sur les lignes rows : chaque segment est concaténé sur tout le groupe."""
+    rendered = np.full(len(rows), '', dtype=object)
+    for literal, field, _, _ in Formatter().parse(template):
+        if literal:
+            rendered = rendered + literal
+        if field is not None:
+            rendered = rendered + fields[field][rows]
+    return rendered
+
+
+def render_by_key(templates_by_key: Dict[str, List[str]], keys, fields: Dict[str, np.ndarray]) -> np.ndarray:
+    """Tire un modèle par ligne parmi templates_by_key[clé] et le rend par groupe (clé, modèle)."""
+    rendered = np.empty(len(keys), dtype=object)
+    for key, rows in _groups(keys):
+        templates = templates_by_key[key]
+        for pick, picked in _groups(RNG.integers(0, len(templates), len(rows))):
+            rendered[rows[picked]] = render_template(templates[pick], fields, rows[picked])
+    return rendered
+
+
+def label_fields(expenses: Dict[str, np.ndarray], **extra) -> Dict[str, np.ndarray]:
+    """Champs des modèles de libellés (voir OPERATION_TEMPLATES) pour des lignes de dépenses."""
+    titles = expenses['title']
+    numbers = expenses['expense_number']
+    fields = {
+        'title': titles,
+        'title20': _mapped(titles, lambda title: title[:20]),
+        'title25': _mapped(titles, lambda title: title[:25]),
+        'category': expenses['category'],
+        'number': numbers,
+        'number6': np.array([number[-6:] for number in numbers], dtype=object)
+    }
+    fields.update({name: _text(values) for name, values in extra.items()})
+    return fields
+
+
+def payment_delays(payment_types) -> np.ndarray:
+    """Délai aléatoire entre une dépense et son paiement, borné selon le type (PAYMENT_DELAY_DAYS)."""
+    high = _mapped(payment_types, PAYMENT_DELAY_DAYS.get).astype(np.int64)
+    return day_offsets(RNG, 0, high, len(high))
+
+
+def daily_filenames(prefix: str, dates) -> np.ndarray:
+    """Nom du fichier d'export quotidien (prefix_AAAAMMJJ.csv) de chaque date, formaté une fois par jour."""
+    days, inverse = np.unique(np.asarray(dates, dtype='datetime64[D]'), return_inverse=True)
+    names = np.array([f"{prefix}_{str(day).replace('-', '')}.csv" for day in days], dtype=object)
+    return names[inverse]
+
+
+def take(expenses: Dict[str, np.ndarray], rows) -> Dict[str, np.ndarray]:
+    """Lignes rows de chaque colonne des dépenses."""
+    return {name: values[rows] for name, values in expenses.items()}
+
+
+def expense_columns(number_rows: int, comment_rate: float = 1.0, always_paid: bool = False,
+                    first_id: int = 1) -> Dict[str, np.ndarray]:
+    """Colonnes (EXPENSE_COLUMNS) des dépenses first_id.., chacune tirée en un tableau.
+
+    Args:
+        number_rows: Nombre de dépenses.
+        comment_rate: Part des dépenses commentées, les autres ont un commentaire vide.
+        always_paid: Toutes les dépenses au statut 'paid' ; sinon 85% sont payées,
+            plus 75% des restantes hors types mensuel et trimestriel.
+        first_id: Identifiant de la première dépense (génération par blocs).
+    """
+    ids = np.arange(first_id, first_id + number_rows)
+    payment_types = RNG.choice(np.array(list(PAYMENT_TYPE_WEIGHTS), dtype=object), number_rows,
+                               p=list(PAYMENT_TYPE_WEIGHTS.values()))
+    categories = choose_by_key(CATEGORY_CHOICES, payment_types)
+
+    # Bornes de montant du couple (type, catégorie), 'default' sinon
+    low, high = np.empty(number_rows), np.empty(number_rows)
+    for (payment_type, category), rows in _groups(payment_types, categories):
+        ranges = AMOUNT_RANGES[payment_type]
+        low[rows], high[rows] = ranges.get(category, ranges['default'])
+
+    dates = random_dates(RNG, *EXPENSE_DATE_WINDOW, number_rows)
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    comments = choose_by_key(COMMENT_TEMPLATES, categories)
+    if comment_rate < 1:
+        comments = np.where(RNG.random(number_rows) < comment_rate, comments, "")
+    if always_paid:
+        status = np.full(number_rows, 'paid', dtype=object)
+    else:
+        paid = RNG.random(number_rows) < 0.85
+        paid |= ~np.isin(payment_types, ['mensuel', 'trimestriel']) & (RNG.random(number_rows) < 0.75)
+        status = np.where(paid, 'paid', 'unpaid').astype(object)
+
+    return {
+        'expense_id': ids,
+        'title': choose_by_key(TITLE_TEMPLATES, categories),
+        'amount': np.round(RNG.uniform(low, high), 2),
+        'label': choose_by_key(LABEL_TEMPLATES, categories, payment_types),
+        'comments': comments,
+        'expense_date': dates,
+        'type': payment_types,
+        'category': categories,
+        'expense_number': "EXP" + _text(years) + np.char.zfill(ids.astype(str), 5).astype(object),
+        'status': status
+    }
+
+
+def transaction_frame(statement_dates, filename_prefix: str, first_id: int = 1, **columns) -> pd.DataFrame:
+    """Table des transactions (colonnes TRANSACTION_COLUMNS) : colonnes communes + colonnes du scénario."""
+    block = {
+        'statement_id': np.arange(first_id, first_id + len(statement_dates)),
+        'statement_date': statement_dates,
+        'debit': np.nan,
+        'credit': np.nan,
+        'comments': "",
+        'related_invoice_id': None,
+        'value_date': statement_dates,
+        'source_filename': daily_filenames(filename_prefix, statement_dates)
+    }
+    block.update(columns)
+    return pd.DataFrame(block, index=pd.RangeIndex(len(statement_dates)), columns=TRANSACTION_COLUMNS)
+
+
+def transaction_links(df_transactions: pd.DataFrame) -> pd.DataFrame:
+    """Liens des transactions à une seule dépense : montant débité, ou crédité pour un remboursement."""
+    amounts = df_transactions['debit'].to_numpy(dtype=np.float64)
+    amounts = np.where(np.isnan(amounts), df_transactions['credit'].to_numpy(dtype=np.float64), amounts)
+    return link_frame(df_transactions['statement_id'], 'EXPENSE', df_transactions['related_expense_id'], amounts)
+
+
+def save_scenario(scenario: str, df_expenses, df_transactions, output_dir: Optional[str] = 'expenses_output',
+                  links=None) -> Dict[str, int]:
+    """Écrit les dépenses, transactions et liens d'un scénario (SCENARIO_FILES, LINK_FILES).
+
+    Chaque table est un DataFrame ou une liste de blocs ; rien n'est écrit si output_dir est None.
+    """
+    if output_dir is None:
+        return {}
+    os.makedirs(output_dir, exist_ok=True)
+    expenses_file, transactions_file = SCENARIO_FILES[scenario]
+    jobs = {
+        os.path.join(output_dir, expenses_file): df_expenses,
+        os.path.join(output_dir, transactions_file): df_transactions
+    }
+    if links is not None:
+        jobs[os.path.join(output_dir, LINK_FILES[scenario])] = links
+    return write_csv_files(jobs, encoding='utf-8')
+
+
+def print_summary(df_expenses: pd.DataFrame, df_transactions: pd.DataFrame, details: List[str] = ()):
+    """Résumé commun des scénarios : volumes, types de paiement, catégories, montants moyens."""
+    total = len(df_expenses)
+    print("\n✅ Génération terminée !")
+    print("📊 Statistiques :")
+    print(f"   - Dépenses générées : {total}")
+    print(f"   - Transactions bancaires : {len(df_transactions)}")
+    for line in details:
+        print(f"   - {line}")
+    print(f"   - Transactions créditées (remboursements) : {int(df_transactions['credit'].notna().sum())}")
+    print("\n💳 Répartition par type de paiement :")
+    for payment_type, count in df_expenses['type'].value_counts().items():
+        print(f"   - {payment_type.capitalize()} : {count} ({count / max(total, 1):.1%})")
+    print("\n🏷️ Top 5 catégories :")
+    for category, count in df_expenses['category'].value_counts().head().items():
+        print(f"   - {category} : {count} ({count / max(total, 1):.1%})")
+    means = df_expenses.groupby('type')['amount'].mean()
+    print("\n💰 Montants moyens :")
+    print(f"   - Mensuel : {means.get('mensuel', np.nan):.2f} MAD")
+    print(f"   - Annuel : {means.get('annuel', np.nan):.2f} MAD")
+    print(f"   - Total dépenses : {df_expenses['amount'].sum():.2f} MAD")
+
+
+@measured('expenses')
+def generate_transaction_expenses_matched(number_rows: int, matched_percentage: float,
+                                          output_dir: Optional[str] = 'expenses_output',
+                                          with_links: bool = False) -> Tuple[pd.DataFrame, ...]:
+    """Dépenses et leur transaction bancaire correspondante (une par dépense appariée).
+
+    Args:
+        number_rows: Nombre de dépenses à générer.
+        matched_percentage: Part des dépenses qui ont une transaction bancaire.
+        output_dir: Dossier des CSV (SCENARIO_FILES['matched']), None pour ne rien écrire.
+        with_links: Retourne aussi la table de liens transaction -> dépense.
+    """
+    print(f"🚀 Génération de {number_rows} dépenses et de leurs transactions appariées...")
+    expenses = expense_columns(number_rows, always_paid=True)
+
+    # Dépenses appariées, dans un ordre aléatoire
+    matched = take(expenses, RNG.permutation(number_rows)[:int(number_rows * matched_percentage)])
+    payment_types = matched['type']
+    amounts = matched['amount']
+    statement_dates = matched['expense_date'] + payment_delays(payment_types)
+
+    # Variation du montant (frais, taxes, remises) : 20% des annuels / trimestriels à ±4%, 15% des autres à ±2%
+    long_term = np.isin(payment_types, ['annuel', 'trimestriel'])
+    spread = np.where(long_term, 0.04, 0.02)
+    varied = RNG.random(len(amounts)) < np.where(long_term, 0.2, 0.15)
+    variation = np.where(varied, amounts * RNG.uniform(-spread, spread), 0.0)
+
+    methods = choose_by_key(PAYMENT_METHODS, payment_types)
+    numbers = matched['expense_number']
+    df_transactions = transaction_frame(
+        statement_dates, 'bank_export',
+        operation_label=render_by_key(OPERATION_TEMPLATES['matched'], methods, label_fields(matched)),
+        additional_label="REF: " + numbers + " - " + _mapped(payment_types, str.upper),
+        debit=np.round(amounts + variation, 2),
+        comments="Paiement depense " + numbers,
+        related_expense_id=matched['expense_id']
+    )
+
+    df_expenses = pd.DataFrame(expenses, columns=EXPENSE_COLUMNS)
+    df_links = transaction_links(df_transactions)
+    save_scenario('matched', df_expenses, df_transactions, output_dir, df_links)
+    print_summary(df_expenses, df_transactions, [
+        f"Transactions liées : {int(df_transactions['related_expense_id'].notna().sum())}"
+    ])
+    return (df_expenses, df_transactions, df_links) if with_links else (df_expenses, df_transactions)
+
+
+def unmatched_strategy(name: str, label: str, keeps_operation_label: bool = False) -> Callable:
+    """Enregistre une stratégie de difficulté dans UNMATCHED_STRATEGIES (décorateur).
+
+    La stratégie apply(expenses, transactions, rows) modifie en place les colonnes
+    de transactions (debit, statement_date, operation_label, additional_label) sur
+    les positions rows, toutes tirées en une fois.
+
+    Args:
+        name: Nom de la stratégie.
+        label: Libellé du résumé.
+        keeps_operation_label: Le libellé d'opération posé par la stratégie n'est pas
+            remplacé par celui du moyen de paiement.
+    """
+    def register(apply: Callable) -> Callable:
+        UNMATCHED_STRATEGIES[name] = {'label': label, 'apply': apply, 'keeps_operation_label': keeps_operation_label}
+        return apply
+    return register
+
+
+@unmatched_strategy('different_amounts', "Montants différents")
+def _different_amounts(expenses, transactions, rows):
+    k = len(rows)
+    transactions['debit'][rows] = np.round(expenses['amount'][rows] * RNG.choice(AMOUNT_FACTORS, k)
+                                           + RNG.uniform(-100, 100, k), 2)
+
+
+@unmatched_strategy('different_dates', "Dates différentes")
+def _different_dates(expenses, transactions, rows):
+    # Décalage de 100 à 300 jours, avant ou après la dépense
+    shifts = day_offsets(RNG, 100, 300, len(rows))
+    dates = expenses['expense_date'][rows]
+    transactions['statement_date'][rows] = np.where(RNG.random(len(rows)) < 0.5, dates + shifts, dates - shifts)
+
+
+@unmatched_strategy('generic_labels', "Libellés génériques", keeps_operation_label=True)
+def _generic_labels(expenses, transactions, rows):
+    k = len(rows)
+    transactions['operation_label'][rows] = RNG.choice(np.array(GENERIC_OPERATION_LABELS, dtype=object), k)
+    labels = RNG.choice(np.array(GENERIC_ADDITIONAL_LABELS, dtype=object), k)
+    transactions['additional_label'][rows] = np.where(labels == "???-###",
+                                                      VALUE_POOLS.draw('lexify', k, RNG, text='???-###'), labels)
+
+
+@unmatched_strategy('foreign_transactions', "Transactions étrangères")
+def _foreign_transactions(expenses, transactions, rows):
+    k = len(rows)
+    rates = RNG.uniform(0.75, 1.45, k)
+    transactions['debit'][rows] = np.round(expenses['amount'][rows] * rates, 2)
+    transactions['operation_label'][rows] = ("CARTE ETRANGERE "
+                                             + RNG.choice(np.array(FOREIGN_CURRENCIES, dtype=object), k))
+    transactions['additional_label'][rows] = ("TAUX " + np.char.mod('%.4f', rates).astype(object) + " - "
+                                              + VALUE_POOLS.draw('city', k, RNG).astype(object))
+
+
+@unmatched_strategy('complex_references', "Références complexes")
+def _complex_references(expenses, transactions, rows):
+    k = len(rows)
+    wrong_refs = "EXP" + _text(RNG.choice(WRONG_REFERENCE_YEARS, k)) + _text(RNG.integers(50000, 100000, k))
+    transactions['operation_label'][rows] = "DD REF " + wrong_refs
+    transactions['additional_label'][rows] = ("ERREUR REF - "
+                                              + VALUE_POOLS.draw('lexify', k, RNG, text='???###').astype(object))
+
+
+def select_strategies(size: int, min_count: int = 1, max_count: int = 4) -> np.ndarray:
+    """Masque (size, stratégies du registre) de min_count à max_count stratégies distinctes par ligne.
+
+    Comme random.sample : nombre uniforme, puis sous-ensemble uniforme parmi ceux
+    de ce nombre, tiré comme un indice dans la table des sous-ensembles (un octet
+    par ligne et par stratégie, sans tri).
+    """
+    count = len(UNMATCHED_STRATEGIES)
+    max_count = min(max_count, count)
+    subsets = {k: list(combinations(range(count), k)) for k in range(min_count, max_count + 1)}
+    masks = np.zeros((sum(len(combos) for combos in subsets.values()), count), dtype=bool)
+    first, number = np.zeros(max_count + 1, dtype=np.int64), np.zeros(max_count + 1, dtype=np.int64)
+    position = 0
+    for k, combos in subsets.items():
+        first[k], number[k] = position, len(combos)
+        for combo in combos:
+            masks[position, list(combo)] = True
+            position += 1
+    sizes = RNG.integers(min_count, max_count + 1, size)
+    return masks[first[sizes] + (RNG.random(size) * number[sizes]).astype(np.int64)]
+
+
+def apply_strategies(expenses: Dict[str, np.ndarray], transactions: Dict[str, np.ndarray], selected: np.ndarray):
+    """Applique chaque stratégie du registre aux lignes de son masque, dans l'ordre du registre.
+
+    Quand deux stratégies modifient le même champ, la dernière enregistrée l'emporte.
+    Le libellé d'opération est ensuite remplacé par celui du moyen de paiement, sauf
+    sur les lignes d'une stratégie keeps_operation_label.
+    """
+    strategies = list(UNMATCHED_STRATEGIES.values())
+    for index, strategy in enumerate(strategies):
+        rows = np.flatnonzero(selected[:, index])
+        if len(rows):
+            strategy['apply'](expenses, transactions, rows)
+
+    kept = [index for index, strategy in enumerate(strategies) if strategy['keeps_operation_label']]
+    specific = np.flatnonzero(~selected[:, kept].any(axis=1))
+    methods = choose_by_key(PAYMENT_METHODS, expenses['type'][specific])
+    transactions['operation_label'][specific] = render_by_key(OPERATION_TEMPLATES['unmatched'], methods,
+                                                              label_fields(take(expenses, specific)))
+
+
+def unmatched_chunk(first_id: int, size: int) -> Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]:
+    """Dépenses first_id.. et leurs transactions non appariées, avec le masque des stratégies appliquées."""
+    expenses = expense_columns(size, comment_rate=0.5, first_id=first_id)
+    transactions = {
+        'debit': expenses['amount'].copy(),
+        'statement_date': expenses['expense_date'] + payment_delays(expenses['type']),
+        'operation_label': "DD " + expenses['title'],
+        'additional_label': "REF: " + expenses['expense_number']
+    }
+    selected = select_strategies(size)
+    apply_strategies(expenses, transactions, selected)
+
+    # Remboursements occasionnels : montant passé au crédit
+    refunds = RNG.random(size) < 0.12
+    debit, operation_labels = transactions['debit'], transactions['operation_label']
+    operation_labels[refunds] = "REMBOURSEMENT - " + operation_labels[refunds]
+    sentences = VALUE_POOLS.draw('sentence', size, RNG).astype(object)
+    df_transactions = transaction_frame(
+        transactions['statement_date'], 'export_bancaire', first_id=first_id,
+        operation_label=operation_labels,
+        additional_label=transactions['additional_label'],
+        debit=np.where(refunds, np.nan, debit),
+        credit=np.where(refunds, debit, np.nan),
+        comments=np.where(RNG.random(size) < 0.25, sentences, ""),
+        related_expense_id=expenses['expense_id'],
+        value_date=transactions['statement_date'] + day_offsets(RNG, -2, 2, size)
+    )
+    return pd.DataFrame(expenses, columns=EXPENSE_COLUMNS), df_transactions, selected
+
+
+@measured('expenses')
+def generate_unmatched_transactions_expenses(number_expenses: int, output_dir: Optional[str] = 'expenses_output',
+                                             chunk_size: int = 1_000_000,
+                                             with_links: bool = False) -> Tuple[pd.DataFrame, ...]:
+    """Dépenses et leur transaction bancaire rendue difficile à apparier.
+
+    Chaque transaction reçoit 1 à 4 stratégies du registre UNMATCHED_STRATEGIES
+    (select_strategies, apply_strategies). La génération se fait par blocs de
+    chunk_size lignes : seuls les DataFrames des blocs précédents restent en mémoire.
+
+    Args:
+        number_expenses: Nombre de dépenses à générer (= nombre de transactions).
+        output_dir: Dossier des CSV (SCENARIO_FILES['unmatched']), None pour ne rien écrire.
+        chunk_size: Nombre de lignes par bloc.
+        with_links: Retourne aussi la table de liens transaction -> dépense.
+    """
+    print(f"🚀 Génération de {number_expenses} dépenses avec leurs transactions bancaires NON APPARIÉES...")
+    expense_chunks, transaction_chunks, link_chunks = [], [], []
+    usage = np.zeros(len(UNMATCHED_STRATEGIES), dtype=np.int64)
+    per_transaction = np.zeros(len(UNMATCHED_STRATEGIES) + 1, dtype=np.int64)
+    for start in range(0, number_expenses, chunk_size):
+        df_expenses, df_transactions, selected = unmatched_chunk(start + 1, min(chunk_size, number_expenses - start))
+        expense_chunks.append(df_expenses)
+        transaction_chunks.append(df_transactions)
+        link_chunks.append(transaction_links(df_transactions))
+        usage += selected.sum(axis=0)
+        per_transaction += np.bincount(selected.sum(axis=1), minlength=len(per_transaction))
+        advance(len(df_expenses), number_expenses)
+
+    save_scenario('unmatched', expense_chunks, transaction_chunks, output_dir, link_chunks)
+    df_expenses = pd.concat(expense_chunks, ignore_index=True) if expense_chunks else \
+        pd.DataFrame(columns=EXPENSE_COLUMNS)
+    df_transactions = pd.concat(transaction_chunks, ignore_index=True) if transaction_chunks else \
+        pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+    n = max(number_expenses, 1)
+    print_summary(df_expenses, df_transactions)
+    print("   - Utilisation des stratégies par transaction :")
+    for strategy, count in zip(UNMATCHED_STRATEGIES.values(), usage.tolist()):
+        if count:
+            print(f"     • {strategy['label']} : {count} fois ({count / n:.1%})")
+    print("\n📊 Répartition des stratégies par transaction :")
+    for number, count in enumerate(per_transaction.tolist()):
+        if count:
+            print(f"     • {number} stratégie{'s' if number > 1 else ''} : {count} transactions ({count / n:.1%})")
+    if with_links:
+        return df_expenses, df_transactions, concat_links(link_chunks)
+    return df_expenses, df_transactions
+
+
+@measured('expenses')
+def generate_partial_payment_expenses(number_rows: int, matched_percentage: float = 1,
+                                      output_dir: Optional[str] = 'expenses_output',
+                                      with_links: bool = False) -> Tuple[pd.DataFrame, ...]:
+    """Dépenses réglées en plusieurs transactions partielles (2 à 5 par dépense).
+
+    Args:
+        number_rows: Nombre de dépenses à générer.
+        matched_percentage: Part des dépenses qui ont des transactions bancaires.
+        output_dir: Dossier des CSV (SCENARIO_FILES['partial']), None pour ne rien écrire.
+        with_links: Retourne aussi la table de liens transaction -> dépense.
+    """
+    print(f"🚀 Génération de {number_rows} dépenses avec paiements partiels (2-5 transactions par dépense)...")
+    expenses = expense_columns(number_rows, comment_rate=0.5)
+    nb_partial = int(number_rows * matched_percentage)
+    partial = take(expenses, RNG.permutation(number_rows)[:nb_partial])
+
+    # 2 à 5 versements par dépense, chacun 10 à 60% du reste : premier sous PAYMENT_DELAY_DAYS,
+    # puis un écart PARTIAL_STEP_DAYS par rang
+    payment_types = partial['type']
+    step_low = _mapped(payment_types, lambda payment_type: PARTIAL_STEP_DAYS[payment_type][0]).astype(np.int64)
+    step_high = _mapped(payment_types, lambda payment_type: PARTIAL_STEP_DAYS[payment_type][1]).astype(np.int64)
+    installments = split_installments(
+        partial['amount'], RNG.integers(2, 6, nb_partial), RNG, rule='share', share_range=(0.1, 0.6),
+        first_days=(0, _mapped(payment_types, PAYMENT_DELAY_DAYS.get).astype(np.int64)),
+        step_days=(step_low, step_high)
+    )
+    rows = installments.rows
+    statement_dates = partial['expense_date'][rows] + installments.offsets
+
+    # Champs des dépenses répétés par versement
+    fields = {name: values[rows] for name, values in label_fields(partial).items()}
+    fields.update(part=_text(installments.numbers), parts=_text(installments.counts))
+    markers = installments.labels
+    methods = choose_by_key(PAYMENT_METHODS, payment_types[rows])
+    df_transactions = transaction_frame(
+        statement_dates, 'export_bancaire',
+        operation_label=render_by_key(OPERATION_TEMPLATES['partial'], methods, fields),
+        additional_label="REF: " + fields['number'] + "-P" + fields['part'] + " - PARTIEL " + markers,
+        debit=installments.amounts,
+        comments="Paiement partiel " + fields['part'] + " de " + fields['parts'],
+        related_expense_id=partial['expense_id'][rows],
+        value_date=statement_dates + day_offsets(RNG, -2, 2, len(rows))
+    )
+
+    df_expenses = pd.DataFrame(expenses, columns=EXPENSE_COLUMNS)
+    df_links = transaction_links(df_transactions)
+    save_scenario('partial', df_expenses, df_transactions, output_dir, df_links)
+    print_summary(df_expenses, df_transactions, [
+        f"Dépenses avec paiements partiels : {nb_partial}",
+        f"Moyenne transactions par dépense : {len(rows) / max(nb_partial, 1):.1f}"
+    ])
+    return (df_expenses, df_transactions, df_links) if with_links else (df_expenses, df_transactions)
+
+
+@measured('expenses')
+def generate_grouped_payment_expenses(number_rows: int, matched_percentage: float = 1,
+                                      group_size_range: Tuple[int, int] = (2, 6),
+                                      group_size_distribution: str = 'hazard',
+                                      output_dir: Optional[str] = 'expenses_output',
+                                      with_links: bool = False) -> Tuple[pd.DataFrame, ...]:
+    """Dépenses réglées par groupes en une seule transaction (plusieurs dépenses = 1 transaction).
+
+    Args:
+        number_rows: Nombre de dépenses à générer.
+        matched_percentage: Part des dépenses groupées en transactions.
+        group_size_range: Taille min et max des groupes de dépenses.
+        group_size_distribution: Distribution des tailles (payment_groups.GROUP_SIZE_DISTRIBUTIONS) ;
+            'hazard' reproduit la règle du notebook (randint retiré à chaque dépense).
+        output_dir: Dossier des CSV (SCENARIO_FILES['grouped']), None pour ne rien écrire.
+        with_links: Retourne aussi la table de liens transaction -> dépense (une ligne par dépense groupée).
+    """
+    print(f"🚀 Génération de {number_rows} dépenses avec paiements groupés "
+          f"({group_size_range[0]}-{group_size_range[1]} dépenses par transaction)...")
+    expenses = expense_columns(number_rows)
+
+    # Groupes de dépenses consécutives dans un ordre aléatoire
+    order = RNG.permutation(number_rows)[:int(number_rows * matched_percentage)]
+    groups = group_payments(len(order), RNG, group_size_range, group_size_distribution)
+    grouped = take(expenses, order[:groups.members])
+    sizes = groups.sizes
+
+    # Attributs de la première dépense, payée après la date la plus récente du groupe
+    first = take(grouped, groups.starts)
+    payment_types = first['type']
+    statement_dates = groups.latest(grouped['expense_date']) + payment_delays(payment_types)
+
+    methods = choose_by_key(PAYMENT_METHODS, payment_types)
+    df_transactions = transaction_frame(
+        statement_dates, 'export_bancaire',
+        operation_label=render_by_key(OPERATION_TEMPLATES['grouped'], methods, label_fields(first, count=sizes)),
+        additional_label="GROUPE REF: " + groups.join(grouped['expense_number'], limit=3),
+        debit=groups.totals(grouped['amount']),
+        comments="Paiement groupé de " + _text(sizes) + " dépenses",
+        related_expense_id=groups.join(_text(grouped['expense_id']), separator=","),
+        value_date=statement_dates + day_offsets(RNG, -2, 2, len(sizes))
+    )
+
+    df_expenses = pd.DataFrame(expenses, columns=EXPENSE_COLUMNS)
+    df_links = link_frame(df_transactions['statement_id'].to_numpy()[groups.group_ids], 'EXPENSE',
+                          grouped['expense_id'], grouped['amount'])
+    save_scenario('grouped', df_expenses, df_transactions, output_dir, df_links)
+    print_summary(df_expenses, df_transactions, [
+        f"Dépenses dans des groupes : {groups.members}",
+        f"Nombre de transactions groupées : {len(sizes)}",
+        f"Taille moyenne des groupes : {groups.members / max(len(sizes), 1):.1f}"
+    ])
+    return (df_expenses, df_transactions, df_links) if with_links else (df_expenses, df_transactions)
@@ -0,0 +1,113 @@
+"""
+Découpage vectorisé des paiements partiels
+==========================================
+
+split_installments découpe en un seul lot des totaux (factures, dépenses) en
+versements : une ligne par versement, montants au centime qui somment
+exactement au total, décalages de dates et marqueur "i/n".
+
+Deux règles de découpage :
+
+- 'equal' : parts égales au centime près, part i = ⌊(i+1)·T/n⌋ - ⌊i·T/n⌋ ;
+- 'share' : chaque versement prend une fraction uniforme (share_range) du
+  reste. Le reste avant le versement i vaut T·∏(1 - u_j), calculé pour
+  toutes les lignes par une somme cumulée de log(1 - u) par groupe, puis
+  arrondi au centime : les versements sont les différences de ces restes et
+  se télescopent exactement vers le total.
+
+Aucune boucle sur les rangs ni sur les lignes : le coût ne dépend que du
+nombre total de versements.
+"""
+
+from typing import Tuple, Union
+
+import numpy as np
+
+Days = Union[int, Tuple[int, int], Tuple[np.ndarray, np.ndarray]]
+
+
+class Installments:
+    """Versements à plat : positions du total d'origine, rang, nombre, montant, décalage, marqueur."""
+
+    def __init__(self, rows: np.ndarray, ranks: np.ndarray, counts: np.ndarray, cents: np.ndarray,
+                 offsets: np.ndarray):
+        self.rows = rows          # position du total découpé
+        self.ranks = ranks        # rang 0..n-1 du versement
+        self.counts = counts      # nombre de versements du total
+        self.cents = cents        # montant en centimes entiers
+        self.offsets = offsets    # décalage timedelta64[D] depuis la date de référence
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def amounts(self) -> np.ndarray:
+        """Montants en euros (arrondis au centime)."""
+        return self.cents / 100
+
+    @property
+    def numbers(self) -> np.ndarray:
+        """Numéro 1..n du versement."""
+        return self.ranks + 1
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Marqueur "i/n" de chaque versement, formaté une fois par couple (i, n)."""
+        width = int(self.counts.max()) + 1 if len(self) else 1
+        codes = self.ranks * width + self.counts
+        uniques, inverse = np.unique(codes, return_inverse=True)
+        texts = np.array([f"{code // width + 1}/{code % width}" for code in uniques.tolist()], dtype=object)
+        return texts[inverse]
+
+
+def _per_row(days: Days, counts: np.ndarray, rows: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """Tirage uniforme d'un nombre de jours par versement ; bornes scalaires ou par total."""
+    low, high = days if isinstance(days, tuple) else (days, days)
+    low, high = np.broadcast_to(low, counts.shape)[rows], np.broadcast_to(high, counts.shape)[rows]
+    return rng.integers(low, high + 1)
+
+
+def split_installments(totals, counts, rng: np.random.Generator, rule: str = 'equal',
+                       share_range: Tuple[float, float] = (0.1, 0.6), first_days: Days = 0,
+                       step_days: Days = 0) -> Installments:
+    """Découpe chaque total en counts versements.
+
+    Args:
+        totals: Montants à découper (euros).
+        counts: Nombre de versements de chaque total (>= 1).
+        rng: Générateur des tirages.
+        rule: 'equal' (parts égales au centime) ou 'share' (fraction du reste, share_range).
+        share_range: Bornes de la fraction du reste prise par chaque versement ('share').
+        first_days: Décalage du premier versement en jours : n, (min, max) ou tableaux par total.
+        step_days: Écart entre deux versements successifs, mêmes formes que first_days.
+
+    Returns:
+        Installments : une ligne par versement, dans l'ordre des totaux puis des rangs.
+        Le décalage du versement i vaut first + i * step, chaque terme tiré par versement.
+    """
+    totals_cents = np.round(np.asarray(totals, dtype=np.float64) * 100).astype(np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    rows = np.repeat(np.arange(len(counts)), counts)
+    starts = np.cumsum(counts) - counts
+    ranks = np.arange(len(rows)) - starts[rows]
+    totals_rows, counts_rows = totals_cents[rows], counts[rows]
+
+    if rule == 'equal':
+        # ⌊(i+1)·T/n⌋ - ⌊i·T/n⌋ : parts égales à un centime près, somme exacte
+        cents = (ranks + 1) * totals_rows // counts_rows - ranks * totals_rows // counts_rows
+    elif rule == 'share':
+        # Reste avant chaque versement : T * prod des (1 - u) des rangs précédents (0 pour le dernier)
+        low, high = share_range
+        log_keep = np.log1p(-rng.uniform(low, high, len(rows)))
+        log_keep[ranks == counts_rows - 1] = 0.0
+        cumulative = np.cumsum(log_keep)
+        before = cumulative - log_keep - (cumulative - log_keep)[starts][rows]
+        remaining = np.round(totals_rows * np.exp(before)).astype(np.int64)
+        following = np.append(remaining[1:], 0)
+        following[ranks == counts_rows - 1] = 0
+        cents = remaining - following
+    else:
+        raise ValueError(f"Règle de découpage inconnue: {rule}")
+
+    offsets = _per_row(first_days, counts, rows, rng) + ranks * _per_row(step_days, counts, rows, rng)
+    return Installments(rows, ranks, counts_rows, cents, offsets.astype('timedelta64[D]'))
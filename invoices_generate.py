@@ -1,10 +1,23 @@
 import os
+import numpy as np
 import pandas as pd
 import random
 from faker import Faker
 from datetime import datetime, timedelta
 from faker.providers import BaseProvider
 
+import tax_engine
+from tax_engine import compute_invoice_amounts
+from value_pools import FakerValuePool
+from columnar_export import ColumnarWriter
+from db_sink import DatabaseSink
+from date_windows import day_offsets
+from document_links import concat_links, link_frame
+from installments import split_installments
+from payment_groups import group_payments
+from partitioned_writer import partition_jobs, write_csv_files
+from stage_metrics import advance, measured
+
 # Création d'un provider custom pour les numéros de facture français
 class InvoiceProvider(BaseProvider):
     def invoice_number(self, year):
@@ -14,11 +27,20 @@ class InvoiceProvider(BaseProvider):
 fake = Faker('fr_FR')
 fake.add_provider(InvoiceProvider)
 os.makedirs('invoices_output', exist_ok=True)
+RNG = np.random.default_rng()
+VALUE_POOLS = FakerValuePool(locale='fr_FR')
 
 # Paramètres
 NUM_INVOICES = 80000
+PROGRESS_ROWS = 10000  # Factures générées entre deux mises à jour de la progression
+OUTPUT_FORMAT = 'csv'  # 'csv', 'parquet' ou 'arrow'
 CLIENT_IDS = list(range(1, 101))
 CLIENT_TYPES = {cid: random.choice(['PUBLIC', 'PRIVE']) for cid in CLIENT_IDS}
+# Régimes fiscaux : TVA 20% pour tous, RAS uniquement pour les clients publics
+TAX_RULES = {
+    'PUBLIC': tax_engine.TAX_RULES['PUBLIC'],
+    'PRIVE': {'tva_rates': [0.20], 'tva_weights': None, 'ras_5p': 0.0, 'ras_tva': 0.0}
+}
 STATUS_DISTRIBUTION = {
     'DRAFT': 0.1,
     'SENT': 0.3,
@@ -26,6 +48,9 @@ STATUS_DISTRIBUTION = {
     'CANCELLED': 0.05,
     'OVERDUE': 0.15
 }
+# Paiements groupés : tailles des groupes (min, max) et distribution (payment_groups.GROUP_SIZE_DISTRIBUTIONS)
+GROUP_SIZE_RANGE = (3, 3)
+GROUP_SIZE_DISTRIBUTION = 'uniform'
 
 # Fonction principale de génération d'une facture
 def generate_invoice_base_data():
@@ -36,19 +61,6 @@ def generate_invoice_base_data():
     quantity = random.randint(1, 20)
     pu = round(random.uniform(50, 2000), 2)
     total_ht = round(pu * quantity, 2)
-    
-    if client_type == "PUBLIC":
-        montant_tva = round(total_ht * 0.2, 2)
-        amount_ttc = round(total_ht * 1.2, 2)
-        ras_5p = round(total_ht * 0.05, 2)
-        ras_tva = round(total_ht * 0.2 * 0.75, 2)
-        amount_to_pay = round(amount_ttc - ras_5p - ras_tva, 2)
-    else:
-        montant_tva = round(total_ht * 0.2, 2)
-        amount_ttc = round(total_ht * 1.2, 2)
-        ras_5p = 0
-        ras_tva = 0
-        amount_to_pay = amount_ttc
 
     label = random.choice([
         "Développement logiciel", "Consulting IT", "Maintenance SaaS",
@@ -61,11 +73,6 @@ def generate_invoice_base_data():
         'CLIENT_ID': client_id,
         'CLIENT_TYPE': client_type,
         'TOTAL_HT': total_ht,
-        'MONTANT_TVA': montant_tva,
-        'AMOUNT_TTC': amount_ttc,
-        'RAS_5P': ras_5p,
-        'RAS_TVA': ras_tva,
-        'AMOUNT_TO_PAY': amount_to_pay,
         'PU': pu,
         'QUANTITY': quantity,
         'ELECTRONIC_DATE': invoice_date + timedelta(days=random.randint(0, 2)),
@@ -77,9 +84,12 @@ def generate_invoice_base_data():
         'INVOICE_YEAR': invoice_date.year
     }
 
+@measured('invoices')
 def generate_all_invoices(num_invoices):
     invoices = []
     for i in range(num_invoices):
+        if i and i % PROGRESS_ROWS == 0:
+            advance(PROGRESS_ROWS, num_invoices)
         base_data = generate_invoice_base_data()
         status = random.choices(
             list(STATUS_DISTRIBUTION.keys()),
@@ -96,8 +106,17 @@ def generate_all_invoices(num_invoices):
             'INVOICE_NUMBER': fake.invoice_number(base_data['INVOICE_YEAR'])
         }
         invoices.append(invoice_data)
-    return pd.DataFrame(invoices)
+    df_invoices = pd.DataFrame(invoices)
 
+    # Montants TVA / RAS calculés en une passe pour toutes les factures
+    amounts = compute_invoice_amounts(df_invoices['TOTAL_HT'], df_invoices['CLIENT_TYPE'], TAX_RULES)
+    position = df_invoices.columns.get_loc('TOTAL_HT') + 1
+    for col in ['MONTANT_TVA', 'AMOUNT_TTC', 'RAS_5P', 'RAS_TVA', 'AMOUNT_TO_PAY']:
+        df_invoices.insert(position, col, amounts[col])
+        position += 1
+    return df_invoices
+
+@measured('invoices', rows=lambda splits: sum(map(len, splits.values())))
 def split_invoices(df_invoices):
     paid_mask = df_invoices['STATUS'] == 'PAID'
     df_paid = df_invoices[paid_mask].copy()
@@ -116,147 +135,196 @@ def split_invoices(df_invoices):
         'non_paid': df_invoices[~paid_mask]
     }
 
-def generate_bank_statements(invoice_splits):
-    statements = []
-    statement_id = 1
-    for _, row in invoice_splits['matched'].iterrows():
-        statements.append({
-            'STATEMENT_ID': statement_id,
-            'STATEMENT_DATE': row['PAYMENT_DATE'],
-            'OPERATION_LABEL': "VIREMENT RECU",
-            'ADDITIONAL_LABEL': f"REF: {row['INVOICE_NUMBER']} - {row['LABEL']}",
-            'DEBIT': None,
-            'CREDIT': row['AMOUNT_TO_PAY'],
-            'COMMENTS': f"Paiement facture {row['INVOICE_NUMBER']}",
-            'RELATED_INVOICE_ID': row['INVOICE_ID'],
-            'CREATED_AT': datetime.now(),
-            'SOURCE_FILENAME': f"releve_{row['PAYMENT_DATE'].strftime('%Y%m')}.csv",
-            'FILE_BLOB': None,
-            'MIME_TYPE': 'text/csv',
-            'RELATED_EXPENSE_ID': None,
-            'VALUE_DATE': row['PAYMENT_DATE'],
-            'MATCH_TYPE': 'MATCHED'
-        })
-        statement_id += 1
+# Colonnes des relevés, dans l'ordre du CSV
+STATEMENT_COLUMNS = [
+    'STATEMENT_ID', 'STATEMENT_DATE', 'OPERATION_LABEL', 'ADDITIONAL_LABEL', 'DEBIT', 'CREDIT', 'COMMENTS',
+    'RELATED_INVOICE_ID', 'CREATED_AT', 'SOURCE_FILENAME', 'FILE_BLOB', 'MIME_TYPE', 'RELATED_EXPENSE_ID',
+    'VALUE_DATE', 'MATCH_TYPE', 'GROUPED_INVOICE_IDS', 'ACTUAL_INVOICE_ID'
+]
+
+def monthly_filenames(dates):
+    """Nom du relevé mensuel (releve_AAAAMM.csv) de chaque date, formaté une fois par mois."""
+    months = np.asarray(dates, dtype='datetime64[D]').astype('datetime64[M]')
+    unique_months, inverse = np.unique(months, return_inverse=True)
+    names = np.array([f"releve_{str(month).replace('-', '')}.csv" for month in unique_months], dtype=object)
+    return names[inverse]
 
-    for _, row in invoice_splits['partial'].iterrows():
-        partial_payments = random.randint(2, 4)
-        remaining = row['AMOUNT_TO_PAY']
-        for i in range(partial_payments):
-            amount = round(remaining / (partial_payments - i), 2) if i != partial_payments - 1 else remaining
-            remaining -= amount
-            payment_date = row['PAYMENT_DATE'] + timedelta(days=random.randint(0, 30))
-            statements.append({
-                'STATEMENT_ID': statement_id,
-                'STATEMENT_DATE': payment_date,
-                'OPERATION_LABEL': "VIREMENT RECU",
-                'ADDITIONAL_LABEL': f"PAIEMENT PARTIEL {i+1}/{partial_payments} - REF: {row['INVOICE_NUMBER']}",
-                'DEBIT': None,
-                'CREDIT': amount,
-                'COMMENTS': f"Paiement partiel {i+1} facture {row['INVOICE_NUMBER']}",
-                'RELATED_INVOICE_ID': row['INVOICE_ID'],
-                'CREATED_AT': datetime.now(),
-                'SOURCE_FILENAME': f"releve_{payment_date.strftime('%Y%m')}.csv",
-                'FILE_BLOB': None,
-                'MIME_TYPE': 'text/csv',
-                'RELATED_EXPENSE_ID': None,
-                'VALUE_DATE': payment_date,
-                'MATCH_TYPE': 'PARTIAL'
-            })
-            statement_id += 1
+def statement_block(match_type, statement_dates, created_at, **columns):
+    """Bloc de relevés d'un MATCH_TYPE : colonnes communes + colonnes spécifiques."""
+    block = {
+        'STATEMENT_DATE': statement_dates,
+        'OPERATION_LABEL': "VIREMENT RECU",
+        'DEBIT': np.nan,
+        'CREDIT': np.nan,
+        'RELATED_INVOICE_ID': np.nan,
+        'CREATED_AT': created_at,
+        'SOURCE_FILENAME': monthly_filenames(statement_dates),
+        'FILE_BLOB': None,
+        'MIME_TYPE': 'text/csv',
+        'RELATED_EXPENSE_ID': np.nan,
+        'VALUE_DATE': statement_dates,
+        'MATCH_TYPE': match_type
+    }
+    block.update(columns)
+    return pd.DataFrame(block, index=pd.RangeIndex(len(statement_dates)))
+
+def payment_dates(invoices):
+    return pd.to_datetime(invoices['PAYMENT_DATE']).to_numpy().astype('datetime64[D]')
+
+def statement_links(statements, grouped_links):
+    """Table de liens des relevés : un lien par RELATED_INVOICE_ID / RELATED_EXPENSE_ID, sauf
+    les paiements groupés dont les liens (un par facture) sont fournis par grouped_links."""
+    statement_ids = statements['STATEMENT_ID'].to_numpy()
+    invoice_rows = ((statements['MATCH_TYPE'] != 'GROUPED') & statements['RELATED_INVOICE_ID'].notna()).to_numpy()
+    expense_rows = statements['RELATED_EXPENSE_ID'].notna().to_numpy()
+    links = concat_links([
+        link_frame(statement_ids[invoice_rows], 'INVOICE', statements['RELATED_INVOICE_ID'].to_numpy()[invoice_rows],
+                   statements['CREDIT'].to_numpy()[invoice_rows]),
+        grouped_links,
+        link_frame(statement_ids[expense_rows], 'EXPENSE', statements['RELATED_EXPENSE_ID'].to_numpy()[expense_rows],
+                   statements['DEBIT'].to_numpy()[expense_rows])
+    ])
+    return links.sort_values('STATEMENT_ID', kind='stable', ignore_index=True)
 
-    grouped_invoices = invoice_splits['grouped']
-    chunks = [grouped_invoices[i:i+3] for i in range(0, len(grouped_invoices), 3)]
-    for chunk in chunks:
-        total = chunk['AMOUNT_TO_PAY'].sum()
-        refs = ", ".join(chunk['INVOICE_NUMBER'])
-        invoice_ids = ",".join([str(x) for x in chunk['INVOICE_ID']])
-        payment_date = chunk.iloc[0]['PAYMENT_DATE'] + timedelta(days=random.randint(0, 5))
-        statements.append({
-            'STATEMENT_ID': statement_id,
-            'STATEMENT_DATE': payment_date,
-            'OPERATION_LABEL': "VIREMENT RECU",
-            'ADDITIONAL_LABEL': f"PAIEMENT GROUPE {len(chunk)} FACTURES",
-            'DEBIT': None,
-            'CREDIT': total,
-            'COMMENTS': f"Paiement groupé factures: {refs}",
-            'RELATED_INVOICE_ID': chunk.iloc[0]['INVOICE_ID'],
-            'CREATED_AT': datetime.now(),
-            'SOURCE_FILENAME': f"releve_{payment_date.strftime('%Y%m')}.csv",
-            'FILE_BLOB': None,
-            'MIME_TYPE': 'text/csv',
-            'RELATED_EXPENSE_ID': None,
-            'VALUE_DATE': payment_date,
-            'MATCH_TYPE': 'GROUPED',
-            'GROUPED_INVOICE_IDS': invoice_ids
-        })
-        statement_id += 1
+@measured('invoices')
+def generate_bank_statements(invoice_splits, with_links=False):
+    """Relevés bancaires des factures par MATCH_TYPE ; avec with_links=True, retourne aussi
+    la table de liens relevé -> document (voir document_links)."""
+    # Une seule date de création pour tout le lot de relevés
+    created_at = pd.Timestamp(datetime.now())
+    blocks = []
+
+    matched = invoice_splits['matched']
+    numbers = matched['INVOICE_NUMBER'].astype(str)
+    blocks.append(statement_block(
+        'MATCHED', payment_dates(matched), created_at,
+        ADDITIONAL_LABEL=("REF: " + numbers + " - " + matched['LABEL']).to_numpy(),
+        CREDIT=matched['AMOUNT_TO_PAY'].to_numpy(),
+        COMMENTS=("Paiement facture " + numbers).to_numpy(),
+        RELATED_INVOICE_ID=matched['INVOICE_ID'].to_numpy()
+    ))
+
+    # Paiements partiels : 2 à 4 versements égaux au centime par facture, payés sous 30 jours
+    partial = invoice_splits['partial']
+    installments = split_installments(partial['AMOUNT_TO_PAY'], RNG.integers(2, 5, len(partial)), RNG,
+                                      rule='equal', first_days=(0, 30))
+    rows = installments.rows
+    numbers = partial['INVOICE_NUMBER'].astype(str).to_numpy(dtype=object)[rows]
+    blocks.append(statement_block(
+        'PARTIAL', payment_dates(partial)[rows] + installments.offsets, created_at,
+        ADDITIONAL_LABEL="PAIEMENT PARTIEL " + installments.labels + " - REF: " + numbers,
+        CREDIT=installments.amounts,
+        COMMENTS=("Paiement partiel " + installments.numbers.astype(str).astype(object) + " facture " + numbers),
+        RELATED_INVOICE_ID=partial['INVOICE_ID'].to_numpy()[rows]
+    ))
+
+    # Paiements groupés : factures consécutives par groupes de taille GROUP_SIZE_RANGE,
+    # payés après la facture la plus récente du groupe ; le dernier groupe garde le reste
+    grouped = invoice_splits['grouped']
+    groups = group_payments(len(grouped), RNG, GROUP_SIZE_RANGE, GROUP_SIZE_DISTRIBUTION, min_tail=1)
+    # Un lien par facture du groupe, vers le relevé du groupe (IDs attribués dans l'ordre des blocs)
+    grouped_links = link_frame(sum(map(len, blocks)) + 1 + groups.group_ids, 'INVOICE',
+                               grouped['INVOICE_ID'].to_numpy()[:groups.members],
+                               grouped['AMOUNT_TO_PAY'].to_numpy()[:groups.members])
+    sizes = pd.Series(groups.sizes).astype(str).to_numpy(dtype=object)
+    blocks.append(statement_block(
+        'GROUPED', groups.latest(payment_dates(grouped)) + day_offsets(RNG, 0, 5, len(groups)), created_at,
+        ADDITIONAL_LABEL="PAIEMENT GROUPE " + sizes + " FACTURES",
+        CREDIT=groups.totals(grouped['AMOUNT_TO_PAY']),
+        COMMENTS="Paiement groupé factures: " + groups.join(grouped['INVOICE_NUMBER'].astype(str)),
+        RELATED_INVOICE_ID=groups.first(grouped['INVOICE_ID']),
+        GROUPED_INVOICE_IDS=groups.join(grouped['INVOICE_ID'].astype(str), separator=",")
+    ))
+
+    # Libellés des virements sans référence : tirés des lots Faker en une fois
+    unmatched = invoice_splits['unmatched']
+    unmatched_companies = VALUE_POOLS.draw('company', len(unmatched), RNG)
+    unmatched_refs = VALUE_POOLS.draw('bothify', len(unmatched), RNG, text='????#####')
+    blocks.append(statement_block(
+        'UNMATCHED', payment_dates(unmatched), created_at,
+        ADDITIONAL_LABEL=pd.Series(unmatched_companies, dtype=str).str.upper().to_numpy(),
+        CREDIT=unmatched['AMOUNT_TO_PAY'].to_numpy(),
+        COMMENTS=("Virement sans référence claire - " + pd.Series(unmatched_refs, dtype=str)).to_numpy(),
+        RELATED_INVOICE_ID=unmatched['INVOICE_ID'].to_numpy(),
+        ACTUAL_INVOICE_ID=unmatched['INVOICE_ID'].to_numpy()
+    ))
+
+    # Dépenses : 200 débits sur les deux dernières années
+    nb_expenses = 200
+    today = np.datetime64(datetime.now().date(), 'D')
+    expense_dates = today - np.timedelta64(730, 'D') + day_offsets(RNG, 0, 729, nb_expenses)
+    blocks.append(statement_block(
+        'EXPENSE', expense_dates, created_at,
+        OPERATION_LABEL=RNG.choice(['PRELEVEMENT', 'VIREMENT EMIS', 'CHEQUE'], nb_expenses),
+        ADDITIONAL_LABEL=RNG.choice([
+            'ELECTRICITE', 'TELEPHONIE', 'FOURNITURES BUREAU',
+            'SALAIRES', 'CHARGES SOCIALES', 'LOYER'
+        ], nb_expenses),
+        DEBIT=np.round(RNG.uniform(100, 5000, nb_expenses), 2),
+        COMMENTS=VALUE_POOLS.draw('sentence', nb_expenses, RNG, nb_words=6),
+        RELATED_EXPENSE_ID=RNG.integers(1, 51, nb_expenses)
+    ))
+
+    statements = pd.concat(blocks, ignore_index=True)
+    statements.insert(0, 'STATEMENT_ID', np.arange(1, len(statements) + 1))
+    statements = statements.reindex(columns=STATEMENT_COLUMNS)
+    if not with_links:
+        return statements
+    return statements, statement_links(statements, grouped_links)
+
+# Fichier CSV de chaque catégorie de factures
+INVOICE_FILES = {
+    'matched': 'invoices_matched.csv',
+    'partial': 'invoices_partial_payments.csv',
+    'grouped': 'invoices_grouped_payments.csv',
+    'unmatched': 'invoices_unmatched.csv',
+    'non_paid': 'invoices_non_paid.csv'
+}
 
-    for _, row in invoice_splits['unmatched'].iterrows():
-        statements.append({
-            'STATEMENT_ID': statement_id,
-            'STATEMENT_DATE': row['PAYMENT_DATE'],
-            'OPERATION_LABEL': "VIREMENT RECU",
-            'ADDITIONAL_LABEL': fake.company().upper(),
-            'DEBIT': None,
-            'CREDIT': row['AMOUNT_TO_PAY'],
-            'COMMENTS': f"Virement sans référence claire - {fake.bothify(text='????#####')}",
-            'RELATED_INVOICE_ID': row['INVOICE_ID'],
-            'CREATED_AT': datetime.now(),
-            'SOURCE_FILENAME': f"releve_{row['PAYMENT_DATE'].strftime('%Y%m')}.csv",
-            'FILE_BLOB': None,
-            'MIME_TYPE': 'text/csv',
-            'RELATED_EXPENSE_ID': None,
-            'VALUE_DATE': row['PAYMENT_DATE'],
-            'MATCH_TYPE': 'UNMATCHED',
-            'ACTUAL_INVOICE_ID': row['INVOICE_ID']
-        })
-        statement_id += 1
+@measured('invoices')
+def save_datasets(invoice_splits, bank_statements, output_dir='invoices_output', links=None):
+    # all_invoices.csv est écrit à partir des catégories, sans concaténation
+    jobs = {os.path.join(output_dir, 'all_invoices.csv'): [invoice_splits[name] for name in INVOICE_FILES]}
+    if links is not None:
+        jobs[os.path.join(output_dir, 'statement_links.csv')] = links
+    for name, filename in INVOICE_FILES.items():
+        jobs[os.path.join(output_dir, filename)] = invoice_splits[name]
+    # Relevés découpés par MATCH_TYPE en un seul passage
+    jobs.update(partition_jobs(
+        bank_statements, 'MATCH_TYPE',
+        lambda match_type: os.path.join(output_dir, f'bank_statements_{match_type.lower()}.csv'),
+        all_path=os.path.join(output_dir, 'bank_statements_all.csv')
+    ))
+    return write_csv_files(jobs)
 
-    for _ in range(200):
-        expense_date = fake.date_between(start_date='-2y', end_date='today')
-        statements.append({
-            'STATEMENT_ID': statement_id,
-            'STATEMENT_DATE': expense_date,
-            'OPERATION_LABEL': random.choice(['PRELEVEMENT', 'VIREMENT EMIS', 'CHEQUE']),
-            'ADDITIONAL_LABEL': random.choice([
-                'ELECTRICITE', 'TELEPHONIE', 'FOURNITURES BUREAU', 
-                'SALAIRES', 'CHARGES SOCIALES', 'LOYER'
-            ]),
-            'DEBIT': round(random.uniform(100, 5000), 2),
-            'CREDIT': None,
-            'COMMENTS': fake.sentence(nb_words=6),
-            'RELATED_INVOICE_ID': None,
-            'CREATED_AT': datetime.now(),
-            'SOURCE_FILENAME': f"releve_{expense_date.strftime('%Y%m')}.csv",
-            'FILE_BLOB': None,
-            'MIME_TYPE': 'text/csv',
-            'RELATED_EXPENSE_ID': random.randint(1, 50),
-            'VALUE_DATE': expense_date,
-            'MATCH_TYPE': 'EXPENSE'
-        })
-        statement_id += 1
+@measured('invoices')
+def save_datasets_columnar(invoice_splits, bank_statements, output_dir='invoices_output', fmt='parquet',
+                           links=None):
+    """Écrit les factures (partitionnées par INVOICE_YEAR) et les relevés (par MATCH_TYPE) en Parquet / Arrow.
 
-    return pd.DataFrame(statements)
+    Les catégories sont écrites l'une après l'autre dans la même table, sans
+    concaténation ; la catégorie d'une facture se retrouve par le MATCH_TYPE
+    de ses relevés.
+    """
+    partition_by = {'invoices': 'INVOICE_YEAR', 'bank_statements': 'MATCH_TYPE'}
+    with ColumnarWriter(output_dir, fmt=fmt, partition_by=partition_by) as writer:
+        for name in ['matched', 'partial', 'grouped', 'unmatched', 'non_paid']:
+            writer.write('invoices', invoice_splits[name])
+        writer.write('bank_statements', bank_statements)
+        if links is not None:
+            writer.write('statement_links', links)
+    return writer.row_counts
 
-def save_datasets(invoice_splits, bank_statements):
-    all_invoices = pd.concat([
-        invoice_splits['matched'],
-        invoice_splits['partial'],
-        invoice_splits['grouped'],
-        invoice_splits['unmatched'],
-        invoice_splits['non_paid']
-    ], ignore_index=True)
-    all_invoices.to_csv('invoices_output/all_invoices.csv', index=False)
-    invoice_splits['matched'].to_csv('invoices_output/invoices_matched.csv', index=False)
-    invoice_splits['partial'].to_csv('invoices_output/invoices_partial_payments.csv', index=False)
-    invoice_splits['grouped'].to_csv('invoices_output/invoices_grouped_payments.csv', index=False)
-    invoice_splits['unmatched'].to_csv('invoices_output/invoices_unmatched.csv', index=False)
-    invoice_splits['non_paid'].to_csv('invoices_output/invoices_non_paid.csv', index=False)
-    bank_statements.to_csv('invoices_output/bank_statements_all.csv', index=False)
-    for match_type in bank_statements['MATCH_TYPE'].unique():
-        subset = bank_statements[bank_statements['MATCH_TYPE'] == match_type]
-        subset.to_csv(f'invoices_output/bank_statements_{match_type.lower()}.csv', index=False)
+@measured('invoices')
+def save_to_database(invoice_splits, bank_statements, sink: DatabaseSink, links=None):
+    """Écrit les factures, les relevés puis les liens directement en base via sink, retourne le débit par table."""
+    for name in ['matched', 'partial', 'grouped', 'unmatched', 'non_paid']:
+        sink.write('invoices', invoice_splits[name])
+    sink.write('bank_statements', bank_statements)
+    if links is not None:
+        sink.write('statement_links', links)
+    sink.flush()
+    return sink.report()
 
 def main():
     print("Génération des factures de base...")
@@ -266,10 +334,14 @@ def main():
     invoice_splits = split_invoices(df_invoices)
     
     print("Génération des relevés bancaires...")
-    bank_statements = generate_bank_statements(invoice_splits)
+    bank_statements, links = generate_bank_statements(invoice_splits, with_links=True)
     
     print("Sauvegarde des fichiers...")
-    save_datasets(invoice_splits, bank_statements)
+    if OUTPUT_FORMAT != 'csv':
+        save_datasets_columnar(invoice_splits, bank_statements, fmt=OUTPUT_FORMAT, links=links)
+        print(f"Génération terminée. Tables {OUTPUT_FORMAT} créées dans invoices_output/invoices et invoices_output/bank_statements")
+        return
+    save_datasets(invoice_splits, bank_statements, links=links)
     
     print(f"""Génération terminée. Fichiers créés dans invoices_output/ :
     FACTURES :
@@ -282,6 +354,8 @@ def main():
     RELEVÉS BANCAIRES :
     - bank_statements_all.csv
     - par type : matched / partial / grouped / unmatched / expense
+    LIENS RELEVÉ -> DOCUMENT :
+    - statement_links.csv
     """)
 
 if __name__ == "__main__":
@@ -0,0 +1,181 @@
+"""
+Kit de chargement Oracle en masse
+=================================
+
+Deux voies de chargement des tables générées :
+
+- SQL*Loader : un fichier de contrôle .ctl par table CSV, en chargement
+  direct (DIRECT=TRUE), avec masques de dates et gestion des valeurs vides
+  (NULLIF ... = BLANKS, TRAILING NULLCOLS), plus un script load_data.sh qui
+  enchaîne les chargements dans l'ordre des clés étrangères.
+- Script SQL : InsertAllWriter écrit au fil de l'eau des lots
+  INSERT ALL ... SELECT 1 FROM DUAL au lieu d'une instruction par ligne.
+"""
+
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from stage_metrics import timed
+
+# Fichier CSV -> table Oracle, dans l'ordre des clés étrangères
+ORACLE_TABLES = {
+    'invoice_statuses': 'INVOICE_STATUSES',
+    'clients': 'CLIENTS',
+    'invoices': 'INVOICES',
+    'expenses': 'EXPENSES',
+    'bank_statements': 'BANK_STATEMENT',
+    'statement_links': 'STATEMENT_LINK'
+}
+
+# Colonnes chargées en DATE (format des CSV : '%Y-%m-%d')
+DATE_COLUMNS = {
+    'INVOICE_DATE', 'PAYMENT_DATE', 'ELECTRONIC_DATE', 'PHYSICAL_DATE', 'EXPECTED_PAYMENT_DATE',
+    'EXPENSE_DATE', 'STATEMENT_DATE', 'VALUE_DATE', 'CREATED_AT', 'UPDATED_AT'
+}
+DATE_MASK = 'YYYY-MM-DD'
+
+# Oracle refuse un INSERT ALL de plus de 999 colonnes au total (ORA-24335)
+INSERT_ALL_MAX_COLUMNS = 999
+
+
+def read_csv_header(csv_path: str) -> List[str]:
+    """Colonnes d'un CSV exporté (BOM utf-8-sig éventuel ignoré)."""
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        return f.readline().rstrip('\r\n').split(',')
+
+
+def control_file(oracle_table: str, csv_file: str, columns: List[str], rows_per_save: int = 100_000) -> str:
+    """Contenu d'un fichier de contrôle SQL*Loader en chargement direct pour un CSV avec en-tête."""
+    fields = []
+    for column in columns:
+        if column in DATE_COLUMNS:
+            fields.append(f'    {column} DATE "{DATE_MASK}" NULLIF {column}=BLANKS')
+        else:
+            # CHAR(4000) : SQL*Loader limite sinon les champs à 255 caractères
+            fields.append(f'    {column} CHAR(4000) NULLIF {column}=BLANKS')
+    return (
+        f"OPTIONS (DIRECT=TRUE, SKIP=1, ERRORS=0, ROWS={rows_per_save})\n"
+        "UNRECOVERABLE\n"
+        "LOAD DATA\n"
+        "CHARACTERSET AL32UTF8\n"
+        f"INFILE '{csv_file}'\n"
+        f"BADFILE '{os.path.splitext(csv_file)[0]}.bad'\n"
+        f"APPEND INTO TABLE {oracle_table}\n"
+        "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"'\n"
+        "TRAILING NULLCOLS\n"
+        "(\n" + ",\n".join(fields) + "\n)\n"
+    )
+
+
+def write_loader_kit(output_dir: str, tables: Optional[Dict[str, str]] = None) -> List[str]:
+    """Écrit un .ctl par CSV présent dans output_dir et le script load_data.sh.
+
+    Les colonnes sont lues dans l'en-tête de chaque CSV : le kit suit
+    exactement les fichiers exportés (export complet, streaming ou shardé).
+
+    Returns:
+        Chemins des fichiers de contrôle écrits.
+    """
+    tables = tables or ORACLE_TABLES
+    loader_dir = os.path.join(output_dir, 'loader')
+    os.makedirs(loader_dir, exist_ok=True)
+
+    control_paths = []
+    for table, oracle_table in tables.items():
+        csv_path = os.path.join(output_dir, f'{table}.csv')
+        if not os.path.exists(csv_path):
+            continue
+        control_path = os.path.join(loader_dir, f'{table}.ctl')
+        with open(control_path, 'w', encoding='utf-8') as f:
+            f.write(control_file(oracle_table, f'../{table}.csv', read_csv_header(csv_path)))
+        control_paths.append(control_path)
+
+    with open(os.path.join(loader_dir, 'load_data.sh'), 'w', encoding='utf-8') as f:
+        f.write("#!/bin/sh\n")
+        f.write("# Chargement SQL*Loader dans l'ordre des clés étrangères\n")
+        f.write("# Usage : ORACLE_USERID=user/password@service ./load_data.sh\n")
+        f.write("set -e\n")
+        f.write('cd "$(dirname "$0")"\n')
+        for control_path in control_paths:
+            name = os.path.splitext(os.path.basename(control_path))[0]
+            f.write(f'sqlldr userid="$ORACLE_USERID" control={name}.ctl log={name}.log\n')
+    return control_paths
+
+
+def _sql_literals(series: pd.Series) -> np.ndarray:
+    """Littéraux SQL Oracle d'une colonne (NULL pour les valeurs manquantes)."""
+    missing = series.isna().to_numpy()
+    if series.name in DATE_COLUMNS:
+        values = "DATE '" + pd.to_datetime(series).dt.strftime('%Y-%m-%d') + "'"
+    elif pd.api.types.is_bool_dtype(series):
+        values = series.astype(int).astype(str)
+    elif pd.api.types.is_numeric_dtype(series):
+        # Les IDs nullables arrivent en float (ex: 2689.0) : on garde l'entier
+        numbers = series.astype('float64')
+        integral = (numbers == np.floor(numbers)).to_numpy()
+        values = np.where(integral, numbers.fillna(0).astype('int64').astype(str), numbers.astype(str))
+        values = pd.Series(values, index=series.index)
+    else:
+        values = "'" + series.astype(str).str.replace("'", "''", regex=False) + "'"
+    return np.where(missing, 'NULL', values.to_numpy(dtype=object))
+
+
+class InsertAllWriter:
+    """Écrit un script SQL Oracle par lots INSERT ALL, bloc après bloc."""
+
+    def __init__(self, path: str, batch_size: int = 500, commit_every: int = 20):
+        """
+        Args:
+            path: Chemin du script SQL.
+            batch_size: Lignes par INSERT ALL (plafonné à 999 colonnes au total par lot).
+            commit_every: Nombre de lots entre deux COMMIT.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.commit_every = commit_every
+        self.row_counts = {}
+        self._batches_since_commit = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write("-- Script d'insertion pour Oracle DB (lots INSERT ALL)\n")
+        self._file.write("SET DEFINE OFF\n\n")
+
+    def comment(self, text: str):
+        """Ajoute une ligne de commentaire au script."""
+        self._file.write(f"-- {text}\n")
+
+    def write(self, oracle_table: str, frame: pd.DataFrame):
+        """Ajoute les lignes d'un bloc au script."""
+        if frame.empty:
+            return
+        columns = list(frame.columns)
+        rows_per_batch = max(1, min(self.batch_size, INSERT_ALL_MAX_COLUMNS // len(columns)))
+        into = f"  INTO {oracle_table} ({', '.join(columns)}) VALUES ("
+        literals = [_sql_literals(frame[column]) for column in columns]
+        rows = [into + ', '.join(values) + ')\n' for values in zip(*literals)]
+
+        with timed('io'):
+            for start in range(0, len(rows), rows_per_batch):
+                self._file.write("INSERT ALL\n")
+                self._file.writelines(rows[start:start + rows_per_batch])
+                self._file.write("SELECT 1 FROM DUAL;\n")
+                self._batches_since_commit += 1
+                if self._batches_since_commit >= self.commit_every:
+                    self._file.write("COMMIT;\n")
+                    self._batches_since_commit = 0
+        self.row_counts[oracle_table] = self.row_counts.get(oracle_table, 0) + len(frame)
+
+    def close(self):
+        """Valide le dernier lot et ferme le script."""
+        if self._file.closed:
+            return
+        self._file.write("COMMIT;\n")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,81 @@
+"""
+Écriture CSV partitionnée et parallèle
+======================================
+
+Remplace les séquences de to_csv écrites l'une après l'autre :
+
+- split_by découpe un DataFrame par valeur d'une clé en un seul passage
+  groupby (au lieu d'un filtre booléen par valeur, qui relit toute la table) ;
+- write_csv écrit un ou plusieurs DataFrames de mêmes colonnes dans un seul
+  fichier (dossier créé au besoin), en-tête une fois, via un tampon
+  d'écriture large : un fichier "all" se construit à partir des morceaux
+  existants sans pd.concat ;
+- write_csv_files écrit un lot de fichiers en parallèle sur un pool de threads.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+import pandas as pd
+
+from stage_metrics import timed
+
+BUFFER_SIZE = 1 << 20  # 1 Mo
+
+Frames = Union[pd.DataFrame, List[pd.DataFrame]]
+
+
+def split_by(frame: pd.DataFrame, key: str) -> Dict[object, pd.DataFrame]:
+    """Partitions d'un DataFrame par valeur de key, dans l'ordre d'apparition."""
+    return {value: part for value, part in frame.groupby(key, sort=False)}
+
+
+def write_csv(path: str, frames: Frames, encoding: str = 'utf-8', buffer_size: int = BUFFER_SIZE,
+              **to_csv_kwargs) -> int:
+    """Écrit un ou plusieurs DataFrames de mêmes colonnes dans un CSV, retourne le nombre de lignes."""
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+    columns = list(frames[0].columns)
+    for frame in frames[1:]:
+        if list(frame.columns) != columns:
+            raise ValueError(f"Colonnes différentes entre les morceaux de {path}")
+
+    to_csv_kwargs.setdefault('index', False)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    rows = 0
+    with open(path, 'w', encoding=encoding, newline='', buffering=buffer_size) as f:
+        for position, frame in enumerate(frames):
+            frame.to_csv(f, header=position == 0, **to_csv_kwargs)
+            rows += len(frame)
+    return rows
+
+
+def write_csv_files(jobs: Dict[str, Frames], max_workers: Optional[int] = None, **write_kwargs) -> Dict[str, int]:
+    """Écrit chaque fichier de jobs (chemin -> DataFrame(s)) en parallèle.
+
+    Returns:
+        Nombre de lignes écrites par chemin.
+    """
+    if not jobs:
+        return {}
+    with timed('io'), ThreadPoolExecutor(max_workers=max_workers or min(8, len(jobs))) as executor:
+        futures = {path: executor.submit(write_csv, path, frames, **write_kwargs) for path, frames in jobs.items()}
+        return {path: future.result() for path, future in futures.items()}
+
+
+def partition_jobs(frame: pd.DataFrame, key: str, path_for: Callable[[object], str],
+                   all_path: Optional[str] = None) -> Dict[str, Frames]:
+    """Fichiers d'un DataFrame partitionné par key (un par valeur, plus le fichier complet)."""
+    jobs = {path_for(value): part for value, part in split_by(frame, key).items()}
+    if all_path:
+        jobs[all_path] = frame
+    return jobs
+
+
+def write_partitioned(frame: pd.DataFrame, key: str, path_for: Callable[[object], str],
+                      all_path: Optional[str] = None, max_workers: Optional[int] = None,
+                      **write_kwargs) -> Dict[str, int]:
+    """Écrit un DataFrame partitionné par key (et le fichier complet all_path) en parallèle."""
+    return write_csv_files(partition_jobs(frame, key, path_for, all_path), max_workers=max_workers,
+                           **write_kwargs)
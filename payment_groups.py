@@ -0,0 +1,130 @@
+"""
+Regroupement vectorisé des paiements groupés
+============================================
+
+Un paiement groupé règle plusieurs documents consécutifs (factures, dépenses)
+en une seule transaction. group_payments tire les tailles des groupes selon
+une distribution configurable (GROUP_SIZE_DISTRIBUTIONS), puis les numéros de
+groupe par somme cumulée : chaque agrégat (total au centime, date la plus
+récente, premier document, liste des références) est ensuite une seule passe
+sur les lignes triées, sans découpage en sous-DataFrames.
+"""
+
+import math
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+def _uniform(sizes: np.ndarray) -> np.ndarray:
+    return np.ones(len(sizes))
+
+
+def _hazard(sizes: np.ndarray) -> np.ndarray:
+    # Groupe fermé dès que sa taille atteint un randint(min, max) retiré à chaque document :
+    # P(s) = h(s) * prod_{t<s} (1 - h(t)), h(s) = (s - min + 1) / (max - min + 1)
+    hazard = (sizes - sizes[0] + 1) / len(sizes)
+    return hazard * np.concatenate([[1.0], np.cumprod(1 - hazard)[:-1]])
+
+
+def _poisson(sizes: np.ndarray, mean: float = 3.0) -> np.ndarray:
+    return np.array([math.exp(size * math.log(mean) - mean - math.lgamma(size + 1)) for size in sizes.tolist()])
+
+
+def _geometric(sizes: np.ndarray, p: float = 0.5) -> np.ndarray:
+    return (1 - p) ** (sizes - sizes[0])
+
+
+# Poids relatifs des tailles min..max de chaque distribution (paramètres en mots-clés)
+GROUP_SIZE_DISTRIBUTIONS: Dict[str, Callable[..., np.ndarray]] = {
+    'uniform': _uniform,        # tailles équiprobables
+    'hazard': _hazard,          # règle du notebook : randint(min, max) retiré à chaque document
+    'poisson': _poisson,        # Poisson(mean) tronquée à [min, max]
+    'geometric': _geometric     # petits groupes fréquents, décroissance (1 - p) par document
+}
+
+
+def size_probabilities(size_range: Tuple[int, int], distribution: str = 'uniform', **params) -> np.ndarray:
+    """Probabilités des tailles size_range[0]..size_range[1] selon distribution."""
+    if distribution not in GROUP_SIZE_DISTRIBUTIONS:
+        raise ValueError(f"Distribution de taille inconnue: {distribution}")
+    sizes = np.arange(size_range[0], size_range[1] + 1)
+    weights = np.asarray(GROUP_SIZE_DISTRIBUTIONS[distribution](sizes, **params), dtype=np.float64)
+    return weights / weights.sum()
+
+
+class PaymentGroups:
+    """Groupes de documents consécutifs : taille, début et numéro de groupe de chaque document."""
+
+    def __init__(self, sizes: np.ndarray):
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.starts = np.cumsum(self.sizes) - self.sizes
+        self.group_ids = np.repeat(np.arange(len(self.sizes)), self.sizes)
+
+    def __len__(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def members(self) -> int:
+        """Nombre de documents couverts par les groupes (les premiers de la liste)."""
+        return len(self.group_ids)
+
+    def first(self, values) -> np.ndarray:
+        """Valeur du premier document de chaque groupe."""
+        return np.asarray(values)[self.starts]
+
+    def totals(self, amounts) -> np.ndarray:
+        """Somme des montants de chaque groupe, exacte au centime."""
+        cents = np.round(np.asarray(amounts, dtype=np.float64)[:self.members] * 100).astype(np.int64)
+        return np.bincount(self.group_ids, weights=cents, minlength=len(self)).round() / 100
+
+    def latest(self, dates) -> np.ndarray:
+        """Date la plus récente de chaque groupe (datetime64[D])."""
+        days = np.asarray(dates).astype('datetime64[D]')[:self.members].astype(np.int64)
+        if not len(self):
+            return np.empty(0, dtype='datetime64[D]')
+        return np.maximum.reduceat(days, self.starts).astype('datetime64[D]')
+
+    def join(self, texts, separator: str = ", ", limit: Optional[int] = None,
+             more: str = " +{} autres") -> np.ndarray:
+        """Textes des documents de chaque groupe joints par separator.
+
+        Au-delà de limit textes, les suivants sont résumés par more (formaté avec
+        leur nombre). Concaténation rang par rang sur tous les groupes assez
+        longs : une passe par rang, quel que soit le nombre de groupes.
+        """
+        texts = np.asarray(texts, dtype=object)
+        joined = texts[self.starts]
+        shown = np.minimum(self.sizes, limit) if limit is not None else self.sizes
+        for offset in range(1, int(shown.max()) if len(self) else 0):
+            longer = np.flatnonzero(shown > offset)
+            joined[longer] = joined[longer] + separator + texts[self.starts[longer] + offset]
+        hidden = self.sizes - shown
+        if hidden.any():
+            counts, inverse = np.unique(hidden, return_inverse=True)
+            suffixes = np.array([more.format(count) if count else "" for count in counts.tolist()], dtype=object)
+            joined = joined + suffixes[inverse]
+        return joined
+
+
+def group_payments(total: int, rng: np.random.Generator, size_range: Tuple[int, int] = (2, 6),
+                   distribution: str = 'uniform', min_tail: Optional[int] = None, **params) -> PaymentGroups:
+    """Découpe total documents consécutifs en groupes de taille tirée selon distribution.
+
+    Args:
+        total: Nombre de documents à grouper.
+        rng: Générateur des tirages.
+        size_range: Taille min et max des groupes.
+        distribution: Nom de la distribution des tailles (GROUP_SIZE_DISTRIBUTIONS).
+        min_tail: Taille minimale du dernier groupe, coupé par la fin des documents
+            (size_range[0] par défaut) ; en dessous, ses documents restent hors groupe.
+        **params: Paramètres de la distribution (mean, p...).
+    """
+    min_size, max_size = size_range
+    sizes = rng.choice(np.arange(min_size, max_size + 1), total // max(min_size, 1) + 1,
+                       p=size_probabilities(size_range, distribution, **params))
+    sizes = sizes[np.cumsum(sizes) <= total]
+    rest = total - int(sizes.sum())
+    if rest and rest >= (min_size if min_tail is None else min_tail):
+        sizes = np.append(sizes, rest)
+    return PaymentGroups(sizes)
@@ -0,0 +1,389 @@
+"""
+Lettrage de référence (baseline) et mesure de débit
+===================================================
+
+Les datasets servent à tester des systèmes de rapprochement automatique ;
+ReferenceMatcher en est la baseline livrée avec le projet, sur les sorties
+des trois générateurs (SOURCES) : BANK_STATEMENT / INVOICES / EXPENSES de
+AccountingDatasetGenerator, relevés de invoices_generate, transactions des
+scénarios de expenses_generate.
+
+Lettrage d'un lot de relevés, en trois passes :
+
+1. références : jetons de type numéro de document des libellés
+   (OPERATION_LABEL, ADDITIONAL_LABEL, COMMENTS) lus en une seule passe de
+   l'expression REFERENCE_PATTERN sur tous les libellés mis bout à bout, joints
+   par hachage aux INVOICE_NUMBER / EXPENSE_NUMBER (BlockingIndex). Un relevé
+   garde ses références si son montant ne dépasse pas leur total (tolérance
+   comprise) et si aucun document n'est daté après la fenêtre de dates ;
+2. somme de sous-ensemble : un paiement groupé qui annonce des documents non
+   cités (« +N autres », voir PaymentGroups.join) cherche, parmi les documents
+   encore libres de sa fenêtre de dates, N documents (N <= max_subset) dont la
+   somme au centime est le reste du relevé ;
+3. montant x date : les relevés sans lien prennent le document libre le
+   mieux noté parmi les candidats de l'index montant (searchsorted sur les
+   clés triées, voir BlockingIndex.amount_candidates), dans la tolérance ; un
+   document n'est attribué qu'au relevé le mieux noté.
+
+evaluate compare les liens prédits à la table de liens (document_links) :
+précision / rappel par MATCH_TYPE (un lien vers un relevé de MATCH_TYPE à
+étiquette 0 dans training_set.LABELS est un faux positif). matcher_baseline
+enchaîne index, lettrage et évaluation, et écrit le rapport avec le débit
+(relevés par seconde) à côté du dataset.
+"""
+
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from candidate_pairs import DOCUMENT_FIELDS, STATEMENT_FIELDS, BlockingIndex, _cents, _days
+from document_links import DOCUMENT_TYPES, related_links
+from training_set import LABELS, MATCH_TYPES
+
+# Documents annoncés mais non cités dans un libellé de paiement groupé
+HIDDEN_PATTERN = re.compile(r'\+(\d+) autres')
+
+# Colonnes et fenêtre de dates (date du document - date du relevé, en jours) de chaque générateur
+SOURCES = {
+    'accounting': {
+        'statements': {'id': 'STATEMENT_ID', 'amount': ['CREDIT', 'DEBIT'], 'date': 'STATEMENT_DATE',
+                       'text': ['OPERATION_LABEL', 'ADDITIONAL_LABEL', 'COMMENTS']},
+        'documents': {'INVOICE': DOCUMENT_FIELDS['INVOICE'],
+                      'EXPENSE': {'id': 'EXPENSE_ID', 'amount': 'AMOUNT', 'date': 'EXPENSE_DATE',
+                                  'reference': 'EXPENSE_NUMBER'}},
+        'related': {'INVOICE': 'RELATED_INVOICE_ID', 'EXPENSE': 'RELATED_EXPENSE_ID'},
+        'date_window': (-730, 0)
+    },
+    'invoices': {
+        'statements': STATEMENT_FIELDS['invoices'],
+        'documents': {'INVOICE': DOCUMENT_FIELDS['INVOICE']},
+        'related': {'INVOICE': 'RELATED_INVOICE_ID'},
+        'date_window': (-60, 5)
+    },
+    'expenses': {
+        'statements': STATEMENT_FIELDS['expenses'],
+        'documents': {'EXPENSE': DOCUMENT_FIELDS['EXPENSE']},
+        'related': {'EXPENSE': 'related_expense_id'},
+        'date_window': (-120, 5)
+    }
+}
+
+MATCH_METHODS = ['REFERENCE', 'SUBSET_SUM', 'AMOUNT_DATE']
+MATCH_COLUMNS = ['STATEMENT_ID', 'DOCUMENT_TYPE', 'DOCUMENT_ID', 'ALLOCATED_AMOUNT', 'METHOD']
+REPORT_COLUMNS = ['MATCH_TYPE', 'STATEMENTS', 'MATCHED_STATEMENTS', 'EXPECTED_LINKS', 'PREDICTED_LINKS',
+                  'CORRECT_LINKS', 'PRECISION', 'RECALL']
+
+
+def _texts(frame: pd.DataFrame, columns: List[str]) -> List[str]:
+    texts = frame[columns[0]].fillna('').astype(str)
+    for column in columns[1:]:
+        texts = texts + ' ' + frame[column].fillna('').astype(str)
+    return texts.tolist()
+
+
+def _subset_sum(cents: np.ndarray, target: int, size: int) -> Optional[np.ndarray]:
+    """Positions de size montants de cents (triés) dont la somme vaut target, ou None (size 1 ou 2)."""
+    if size == 1:
+        position = np.searchsorted(cents, target)
+        return np.array([position]) if position < len(cents) and cents[position] == target else None
+    complements = target - cents
+    positions = np.minimum(np.searchsorted(cents, complements), len(cents) - 1)
+    # Complément trouvé à une autre position (montant égal : la position suivante)
+    positions = np.where(positions == np.arange(len(cents)), np.minimum(positions + 1, len(cents) - 1), positions)
+    found = np.flatnonzero((cents[positions] == complements) & (positions != np.arange(len(cents))))
+    return np.array([found[0], positions[found[0]]]) if len(found) else None
+
+
+class ReferenceMatcher:
+    """Lettrage baseline des relevés d'un générateur : index des documents construit une fois."""
+
+    def __init__(self, documents: Dict[str, pd.DataFrame], source: str = 'accounting',
+                 date_window: Optional[Tuple[int, int]] = None, tolerance: float = 0.05,
+                 per_bucket: int = 4, max_subset: int = 2, subset_pool: int = 2000,
+                 chunk_size: int = 200_000, bucket_days: int = 30):
+        """
+        Args:
+            documents: Documents par DOCUMENT_TYPE, ex: {'INVOICE': invoices, 'EXPENSE': expenses}.
+            source: Générateur des tables (SOURCES) : colonnes et fenêtre de dates par défaut.
+            date_window: Écart admis (jours) entre la date du document et celle du relevé : [min, max].
+            tolerance: Écart relatif de montant admis (passes références et montant x date).
+            per_bucket: Candidats tirés par tranche de dates dans l'index montant.
+            max_subset: Nombre maximal de documents non cités cherchés par somme de sous-ensemble (1 ou 2).
+            subset_pool: Documents libres les plus récents de la fenêtre examinés par relevé groupé.
+            chunk_size: Relevés traités par bloc dans la passe montant x date (mémoire bornée).
+            bucket_days: Largeur des tranches de dates de l'index montant.
+        """
+        config = SOURCES[source]
+        self.source = source
+        self.fields = config['statements']
+        self.date_window = date_window or config['date_window']
+        self.tolerance = tolerance
+        self.per_bucket = per_bucket
+        self.max_subset = min(max_subset, 2)
+        self.subset_pool = subset_pool
+        self.chunk_size = chunk_size
+        started = time.perf_counter()
+        self.indexes = [BlockingIndex(frame, document_type, bucket_days, config['documents'][document_type])
+                        for document_type, frame in documents.items()]
+        self.by_day = [np.argsort(index.days, kind='stable') for index in self.indexes]
+        self.sorted_days = [index.days[by_day] for index, by_day in zip(self.indexes, self.by_day)]
+        # Code entier du numéro de chaque document (numéros en double possibles)
+        self.numbers = [pd.factorize(index.references['token'])[0] for index in self.indexes]
+        self.index_seconds = time.perf_counter() - started
+        self.match_seconds = 0.0
+        self.statements = 0
+
+    @property
+    def statements_per_second(self) -> float:
+        """Débit du dernier lettrage (relevés par seconde, index non compris)."""
+        return self.statements / self.match_seconds if self.match_seconds else 0.0
+
+    def match(self, statements: pd.DataFrame) -> pd.DataFrame:
+        """Liens prédits relevé -> document (colonnes MATCH_COLUMNS, METHOD : passe qui a trouvé le lien)."""
+        started = time.perf_counter()
+        n = len(statements)
+        cents = _cents(statements, self.fields['amount'])
+        days = _days(statements[self.fields['date']])
+        texts = _texts(statements, self.fields['text'])
+        claimed = [np.zeros(len(index), dtype=bool) for index in self.indexes]
+        # Liens trouvés par passe : (relevés, index, documents, code de MATCH_METHODS)
+        found: List[Tuple[np.ndarray, np.ndarray, np.ndarray, int]] = []
+
+        # 1. Références des libellés, jointes aux numéros des documents
+        rows, types, documents = [], [], []
+        for position, index in enumerate(self.indexes):
+            reference_rows, reference_documents = index.reference_candidates(texts)
+            rows.append(reference_rows)
+            types.append(np.full(len(reference_rows), position))
+            documents.append(reference_documents)
+        rows, types, documents = np.concatenate(rows), np.concatenate(types), np.concatenate(documents)
+        scale = max(map(len, self.indexes), default=0) + 1
+        _, first = np.unique((rows * len(self.indexes) + types) * scale + documents, return_index=True)
+        rows, types, documents = rows[first], types[first], documents[first]
+        document_cents = np.zeros(len(rows), dtype=np.int64)
+        document_days = np.zeros(len(rows), dtype=np.int64)
+        numbers = np.zeros(len(rows), dtype=np.int64)
+        for position, index in enumerate(self.indexes):
+            typed = types == position
+            document_cents[typed] = index.cents[documents[typed]]
+            document_days[typed] = index.days[documents[typed]]
+            numbers[typed] = self.numbers[position][documents[typed]]
+        # Numéro porté par plusieurs documents : le plus proche en date, puis en montant, du relevé
+        order = np.lexsort((np.abs(document_cents - cents[rows]), np.abs(document_days - days[rows]),
+                            numbers, types, rows))
+        keys = np.stack([rows[order], types[order], numbers[order]])
+        first = order[np.r_[True, (keys[:, 1:] != keys[:, :-1]).any(axis=0)]] if len(order) else order
+        first.sort()
+        rows, types, documents = rows[first], types[first], documents[first]
+        document_cents, document_days = document_cents[first], document_days[first]
+        hidden = pd.Series(texts, dtype=object).str.extract(HIDDEN_PATTERN)[0]
+        hidden = pd.to_numeric(hidden).fillna(0).to_numpy(dtype=np.int64) if n else np.zeros(0, dtype=np.int64)
+        referenced = np.bincount(rows, weights=document_cents, minlength=n).round().astype(np.int64)
+        latest = np.full(n, np.iinfo(np.int64).min)
+        np.maximum.at(latest, rows, document_days)
+        plausible = (((cents <= np.ceil(referenced * (1 + self.tolerance))) | (hidden > 0))
+                     & (latest <= days + self.date_window[1]))
+        kept = plausible[rows]
+        rows, types, documents = rows[kept], types[kept], documents[kept]
+        for position in range(len(self.indexes)):
+            claimed[position][documents[types == position]] = True
+        found.append((rows, types, documents, 0))
+        linked = np.zeros(n, dtype=bool)
+        linked[rows] = True
+
+        # 2. Somme de sous-ensemble sur les documents non cités des paiements groupés
+        residual = cents - np.where(linked, referenced, 0)
+        subset_rows = np.flatnonzero(linked & (hidden > 0) & (hidden <= self.max_subset) & (residual > 0))
+        rows, types, documents = [], [], []
+        for row in subset_rows.tolist():
+            for position, index in enumerate(self.indexes):
+                by_day, sorted_days = self.by_day[position], self.sorted_days[position]
+                low = np.searchsorted(sorted_days, days[row] + self.date_window[0], side='left')
+                high = np.searchsorted(sorted_days, days[row] + self.date_window[1], side='right')
+                pool = by_day[max(low, high - self.subset_pool):high]
+                pool = pool[~claimed[position][pool]]
+                pool = pool[np.argsort(index.cents[pool], kind='stable')]
+                subset = _subset_sum(index.cents[pool], int(residual[row]), int(hidden[row])) if len(pool) else None
+                if subset is not None:
+                    claimed[position][pool[subset]] = True
+                    rows.extend([row] * len(subset))
+                    types.extend([position] * len(subset))
+                    documents.extend(pool[subset].tolist())
+                    break
+        found.append((np.array(rows, dtype=np.int64), np.array(types, dtype=np.int64),
+                      np.array(documents, dtype=np.int64), 1))
+
+        # 3. Montant x date : meilleur document libre des relevés sans lien
+        pending = np.flatnonzero(~linked)
+        span = max(abs(self.date_window[0]), abs(self.date_window[1]), 1)
+        rows, types, documents, scores = [], [], [], []
+        for start in range(0, len(pending), self.chunk_size):
+            chunk = pending[start:start + self.chunk_size]
+            for position, index in enumerate(self.indexes):
+                candidate_rows, candidate_documents = index.amount_candidates(
+                    cents[chunk], days[chunk], self.date_window, self.tolerance, self.per_bucket)
+                free = ~claimed[position][candidate_documents]
+                candidate_rows, candidate_documents = chunk[candidate_rows[free]], candidate_documents[free]
+                relative_gap = (np.abs(cents[candidate_rows] - index.cents[candidate_documents])
+                                / np.maximum(index.cents[candidate_documents], 1))
+                day_gap = np.abs(index.days[candidate_documents] - days[candidate_rows])
+                rows.append(candidate_rows)
+                types.append(np.full(len(candidate_rows), position))
+                documents.append(candidate_documents)
+                scores.append(1 - relative_gap / self.tolerance + 0.5 * (1 - day_gap / span))
+        if rows:
+            rows, types, documents, scores = map(np.concatenate, (rows, types, documents, scores))
+            # Meilleur candidat de chaque relevé, puis meilleur relevé de chaque document
+            order = np.lexsort((-scores, rows))
+            best = order[np.r_[True, rows[order][1:] != rows[order][:-1]]] if len(order) else order
+            order = best[np.lexsort((-scores[best], documents[best], types[best]))]
+            keys = types[order] * scale + documents[order]
+            best = order[np.r_[True, keys[1:] != keys[:-1]]] if len(order) else order
+            found.append((rows[best], types[best], documents[best], 2))
+
+        predicted = self._links(statements, cents, found)
+        self.match_seconds = time.perf_counter() - started
+        self.statements = n
+        return predicted
+
+    def _links(self, statements: pd.DataFrame, cents: np.ndarray,
+               found: List[Tuple[np.ndarray, np.ndarray, np.ndarray, int]]) -> pd.DataFrame:
+        rows = np.concatenate([block[0] for block in found])
+        types = np.concatenate([block[1] for block in found])
+        documents = np.concatenate([block[2] for block in found])
+        methods = np.concatenate([np.full(len(block[0]), block[3]) for block in found])
+        order = np.argsort(rows, kind='stable')
+        rows, types, documents, methods = rows[order], types[order], documents[order], methods[order]
+
+        document_ids = np.zeros(len(rows), dtype=np.int64)
+        document_cents = np.zeros(len(rows), dtype=np.int64)
+        type_codes = np.zeros(len(rows), dtype=np.int64)
+        for position, index in enumerate(self.indexes):
+            typed = types == position
+            document_ids[typed] = index.ids[documents[typed]]
+            document_cents[typed] = index.cents[documents[typed]]
+            type_codes[typed] = DOCUMENT_TYPES.index(index.document_type)
+        # Montant affecté : le relevé entier s'il n'a qu'un document, sinon le montant du document
+        single = np.bincount(rows, minlength=len(cents))[rows] == 1
+        return pd.DataFrame({
+            'STATEMENT_ID': statements[self.fields['id']].to_numpy(dtype=np.int64)[rows],
+            'DOCUMENT_TYPE': pd.Categorical.from_codes(type_codes, categories=DOCUMENT_TYPES),
+            'DOCUMENT_ID': document_ids,
+            'ALLOCATED_AMOUNT': np.where(single, cents[rows], document_cents) / 100,
+            'METHOD': pd.Categorical.from_codes(methods, categories=MATCH_METHODS)
+        }, columns=MATCH_COLUMNS)
+
+
+def statement_match_types(statements: pd.DataFrame, match_type: Optional[str] = None,
+                          related: Optional[Dict[str, str]] = None) -> np.ndarray:
+    """MATCH_TYPE de chaque relevé : colonne MATCH_TYPE, sinon match_type commun, sinon
+    'MATCHED' pour les relevés liés par une colonne de related et 'UNMATCHED' pour les autres."""
+    if match_type is not None:
+        return np.full(len(statements), match_type, dtype=object)
+    if 'MATCH_TYPE' in statements.columns:
+        return statements['MATCH_TYPE'].to_numpy(dtype=object)
+    linked = np.zeros(len(statements), dtype=bool)
+    for column in (related or {}).values():
+        linked |= statements[column].notna().to_numpy()
+    return np.where(linked, 'MATCHED', 'UNMATCHED').astype(object)
+
+
+def evaluate(predicted: pd.DataFrame, links: pd.DataFrame, statements: pd.DataFrame, match_types: np.ndarray,
+             statement_id: str = 'STATEMENT_ID') -> pd.DataFrame:
+    """Précision et rappel des liens prédits, par MATCH_TYPE des relevés puis sur l'ensemble ('ALL').
+
+    Les liens attendus sont ceux de links dont le relevé a un MATCH_TYPE d'étiquette 1
+    (training_set.LABELS) ; tout lien prédit vers un autre relevé est un faux positif.
+    """
+    names = [name for name in MATCH_TYPES if name in set(match_types)]
+    names += sorted(set(match_types) - set(names))
+    codes = pd.Categorical(match_types, categories=names).codes.astype(np.int64)
+    statement_index = pd.Index(statements[statement_id])
+
+    def per_type(statement_ids) -> np.ndarray:
+        positions = statement_index.get_indexer(statement_ids)
+        return np.where(positions >= 0, codes[np.maximum(positions, 0)], -1)
+
+    positive = np.array([LABELS.get(name, 0) for name in names], dtype=bool)
+    link_types = per_type(links['STATEMENT_ID'])
+    expected = links[(link_types >= 0) & positive[np.maximum(link_types, 0)]]
+    expected = expected[['STATEMENT_ID', 'DOCUMENT_TYPE', 'DOCUMENT_ID']].drop_duplicates()
+    compared = predicted[['STATEMENT_ID', 'DOCUMENT_TYPE', 'DOCUMENT_ID']].merge(expected, how='left',
+                                                                                 indicator=True)
+    correct = (compared['_merge'] == 'both').to_numpy()
+    predicted_types = per_type(predicted['STATEMENT_ID'])
+
+    def counts(values: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        values = np.asarray(values)
+        kept = values >= 0
+        return np.bincount(values[kept], weights=None if weights is None else weights[kept],
+                           minlength=len(names)).astype(np.int64)
+
+    matched = np.zeros(len(statements), dtype=bool)
+    positions = statement_index.get_indexer(predicted['STATEMENT_ID'].unique())
+    matched[positions[positions >= 0]] = True
+    report = pd.DataFrame({
+        'MATCH_TYPE': names,
+        'STATEMENTS': counts(codes),
+        'MATCHED_STATEMENTS': counts(codes[matched]),
+        'EXPECTED_LINKS': counts(per_type(expected['STATEMENT_ID'])),
+        'PREDICTED_LINKS': counts(predicted_types),
+        'CORRECT_LINKS': counts(predicted_types, correct.astype(np.float64))
+    })
+    report.loc[len(report)] = ['ALL'] + report.iloc[:, 1:].sum().tolist()
+    report['PRECISION'] = report['CORRECT_LINKS'] / report['PREDICTED_LINKS'].where(report['PREDICTED_LINKS'] > 0)
+    report['RECALL'] = report['CORRECT_LINKS'] / report['EXPECTED_LINKS'].where(report['EXPECTED_LINKS'] > 0)
+    return report[REPORT_COLUMNS]
+
+
+def matcher_baseline(statements: pd.DataFrame, documents: Dict[str, pd.DataFrame],
+                     links: Optional[pd.DataFrame] = None, source: str = 'accounting',
+                     match_type: Optional[str] = None, output_dir: Optional[str] = None,
+                     name: str = 'matcher_baseline', **options) -> Dict:
+    """Lettrage baseline d'un dataset, évalué et chronométré.
+
+    Args:
+        statements: Relevés (ou transactions) du dataset.
+        documents: Documents par DOCUMENT_TYPE (voir ReferenceMatcher).
+        links: Table de liens attendue ; None pour la déduire des colonnes SOURCES[source]['related'].
+        source: Générateur des tables (SOURCES).
+        match_type: MATCH_TYPE commun à tous les relevés (scénarios de dépenses).
+        output_dir: Dossier du dataset où écrire <name>.json, None pour ne rien écrire.
+        name: Nom du fichier de rapport.
+        **options: Paramètres de ReferenceMatcher (tolerance, date_window, max_subset...).
+
+    Returns:
+        Dictionnaire : tailles, durées (index, lettrage), relevés par seconde et rapport par MATCH_TYPE.
+    """
+    config = SOURCES[source]
+    statement_id = config['statements']['id']
+    if links is None:
+        links = related_links(statements, config['related'], config['statements']['amount'], statement_id)
+    matcher = ReferenceMatcher(documents, source, **options)
+    predicted = matcher.match(statements)
+    report = evaluate(predicted, links, statements,
+                      statement_match_types(statements, match_type, config['related']), statement_id)
+
+    baseline = {
+        'source': source,
+        'statements': len(statements),
+        'documents': {document_type: len(frame) for document_type, frame in documents.items()},
+        'index_seconds': round(matcher.index_seconds, 3),
+        'match_seconds': round(matcher.match_seconds, 3),
+        'statements_per_second': round(matcher.statements_per_second, 1),
+        'methods': predicted['METHOD'].value_counts(sort=False).to_dict(),
+        'report': json.loads(report.to_json(orient='records'))
+    }
+    total = report.iloc[-1]
+    print(f"✅ Lettrage baseline {source} : {len(statements)} relevés en {matcher.match_seconds:.2f}s "
+          f"({matcher.statements_per_second:,.0f} relevés/s), "
+          f"précision {total['PRECISION']:.3f}, rappel {total['RECALL']:.3f}")
+    if output_dir is not None:
+        with open(os.path.join(output_dir, f'{name}.json'), 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, ensure_ascii=False)
+    return baseline
@@ -0,0 +1,371 @@
+"""
+Mesures par étape du pipeline de génération
+===========================================
+
+Les méthodes de génération et d'export des générateurs sont décorées par
+measured : sans enregistreur actif, l'appel passe tel quel ; dans un bloc
+
+    with StageMetrics('metrics.jsonl', profile={'accounting.generate_invoices'}):
+        generator.generate_invoices()
+
+chaque étape produit une ligne JSON (durée, lignes produites, lignes/s,
+mémoire résidente au début et à la fin, hausse du pic, temps Faker / I/O /
+calcul NumPy). Les étapes appelées par une autre étape portent son nom dans
+parent.
+
+- temps Faker et I/O : les points d'appel (FakerValuePool.pool, écritures
+  CSV / Parquet / SQL) sont entourés de timed('faker') / timed('io') ; le
+  temps restant de l'étape est compté en calcul (numpy_seconds). Les appels
+  Faker ligne à ligne des anciens modes ne sont pas chronométrés un par un :
+  le profileur par échantillonnage les attribue à Faker ;
+- profilage optionnel par étape (profile : noms d'étapes, ou True pour
+  toutes) : cProfile (fichier <profile_dir>/<étape>.prof) ou échantillonnage
+  de la pile du thread principal (fonctions les plus vues et part du temps
+  dans faker / numpy-pandas / I/O) ;
+- progression : les boucles longues appellent advance(lignes, total) ; une
+  ligne de progression avec ETA est réécrite sur stderr.
+
+    python stage_metrics.py --output metrics.jsonl accounting_dataset_generator.py
+"""
+
+import argparse
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import runpy
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Union
+
+try:
+    import resource
+except ImportError:  # Windows : pas de getrusage, pic mémoire non mesuré
+    resource = None
+
+CATEGORIES = ['faker', 'io']
+PROGRESS_INTERVAL = 0.5  # secondes entre deux rafraîchissements de la ligne de progression
+
+# Modules classés par l'échantillonnage : premier motif trouvé dans la pile, du haut vers le bas
+SAMPLE_CATEGORIES = {
+    'faker': [os.sep + 'faker' + os.sep],
+    'io': [os.sep + 'csv' + os.sep, os.sep + 'io' + os.sep, os.sep + 'parquet' + os.sep, 'partitioned_writer',
+           'oracle_loader', 'columnar_export'],
+    'numpy': [os.sep + 'numpy' + os.sep, os.sep + 'pandas' + os.sep, os.sep + 'pyarrow' + os.sep]
+}
+
+# Enregistreurs actifs (le dernier reçoit les mesures)
+_ACTIVE: List['StageMetrics'] = []
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pic de mémoire résidente du processus (Mo), None si non mesurable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def rss_mb() -> Optional[float]:
+    """Mémoire résidente courante du processus (Mo), None si non mesurable (hors Linux)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return round(int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def current() -> Optional['StageMetrics']:
+    """Enregistreur actif, None hors d'un bloc StageMetrics."""
+    return _ACTIVE[-1] if _ACTIVE else None
+
+
+@contextlib.contextmanager
+def timed(category: str):
+    """Compte la durée du bloc dans category ('faker', 'io') pour toutes les étapes en cours."""
+    metrics = current()
+    if metrics is None or not metrics.stack:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_time(category, time.perf_counter() - started)
+
+
+def advance(rows: int, total: Optional[int] = None):
+    """Signale rows lignes produites par l'étape en cours (sur total attendues, pour l'ETA)."""
+    metrics = current()
+    if metrics is not None and metrics.stack:
+        metrics.advance(rows, total)
+
+
+def count_rows(result) -> Optional[int]:
+    """Lignes produites d'après le résultat d'une étape : table, lignes par table ou tuple de tables."""
+    if isinstance(result, dict):
+        counts = [value for value in result.values() if isinstance(value, int)]
+        return sum(counts) if counts else None
+    if isinstance(result, tuple):
+        return count_rows(result[0]) if result else None
+    return len(result) if hasattr(result, '__len__') and not isinstance(result, str) else None
+
+
+def measured(prefix: str, rows: Callable = count_rows) -> Callable:
+    """Décorateur d'étape : mesure la fonction sous le nom <prefix>.<nom> si un enregistreur est actif.
+
+    rows(résultat) donne les lignes produites ; à défaut (None), celles signalées par advance.
+    """
+    def decorate(function: Callable) -> Callable:
+        name = f"{prefix}.{function.__name__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            metrics = current()
+            if metrics is None:
+                return function(*args, **kwargs)
+            with metrics.stage(name) as stage:
+                result = function(*args, **kwargs)
+                stage.rows = rows(result)
+            return result
+        return wrapper
+    return decorate
+
+
+class _Sampler(threading.Thread):
+    """Échantillonne la pile d'un thread toutes les interval secondes (fonction en cours, catégorie)."""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.functions = Counter()
+        self.categories = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            code = frame.f_code
+            self.functions[f"{os.path.basename(code.co_filename)}:{code.co_name}"] += 1
+            self.categories[self._category(frame)] += 1
+
+    @staticmethod
+    def _category(frame) -> str:
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            for category, patterns in SAMPLE_CATEGORIES.items():
+                if any(pattern in filename for pattern in patterns):
+                    return category
+            frame = frame.f_back
+        return 'python'
+
+    def stop(self, top: int = 10) -> Dict:
+        self._stop_event.set()
+        self.join()
+        samples = max(self.samples, 1)
+        return {
+            'samples': self.samples,
+            'categories': {name: round(count / samples, 3) for name, count in self.categories.most_common()},
+            'top_functions': [{'function': name, 'share': round(count / samples, 3)}
+                              for name, count in self.functions.most_common(top)]
+        }
+
+
+class Stage:
+    """Étape en cours : durée, lignes, temps par catégorie, mémoire au début, progression."""
+
+    def __init__(self, name: str, parent: Optional[str]):
+        self.name = name
+        self.parent = parent
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.started = time.perf_counter()
+        self.rows = None
+        self.advanced = 0
+        self.total = None
+        self.seconds = {category: 0.0 for category in CATEGORIES}
+        self.rss_start = rss_mb()
+        self.peak_start = peak_rss_mb()
+        self.profiler = None
+        self.sampler = None
+
+
+class StageMetrics:
+    """Enregistreur des mesures par étape (lignes JSON), actif dans un bloc with."""
+
+    def __init__(self, path: Optional[str] = None, profile: Union[bool, Set[str], None] = None,
+                 profiler: str = 'cprofile', profile_dir: str = 'profiles', sample_interval: float = 0.005,
+                 progress: bool = True, stream=None):
+        """
+        Args:
+            path: Fichier des lignes JSON (ajout), None pour garder les mesures en mémoire seulement.
+            profile: Étapes profilées (noms complets, ex: 'accounting.generate_invoices'), True pour toutes.
+            profiler: 'cprofile' (un fichier .prof par étape) ou 'sampling' (pile échantillonnée).
+            profile_dir: Dossier des fichiers .prof.
+            sample_interval: Période d'échantillonnage (secondes) du profileur 'sampling'.
+            progress: Affiche la ligne de progression des étapes qui appellent advance.
+            stream: Flux de la progression et du résumé (sys.stderr par défaut).
+        """
+        if profiler not in ('cprofile', 'sampling'):
+            raise ValueError(f"Profileur inconnu: {profiler}")
+        self.path = path
+        self.profile = profile
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.sample_interval = sample_interval
+        self.progress = progress
+        self.stream = stream or sys.stderr
+        self.records: List[Dict] = []
+        self.stack: List[Stage] = []
+        self._file = None
+        self._profiling = False
+        self._last_progress = 0.0
+
+    def __enter__(self) -> 'StageMetrics':
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        _ACTIVE.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _ACTIVE.remove(self)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.records:
+            self.stream.write('\n'.join(self.report_lines()) + '\n')
+
+    def _profiled(self, name: str) -> bool:
+        return self.profile is True or (bool(self.profile) and name in self.profile)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Mesure le bloc comme une étape name (imbriquée dans l'étape en cours s'il y en a une)."""
+        stage = Stage(name, self.stack[-1].name if self.stack else None)
+        # Un seul profileur à la fois : une étape imbriquée dans une étape profilée ne l'est pas à part
+        if self._profiled(name) and not self._profiling:
+            self._profiling = True
+            if self.profiler == 'cprofile':
+                stage.profiler = cProfile.Profile()
+                stage.profiler.enable()
+            else:
+                stage.sampler = _Sampler(threading.get_ident(), self.sample_interval)
+                stage.sampler.start()
+        self.stack.append(stage)
+        try:
+            yield stage
+        finally:
+            self.stack.pop()
+            self._finish(stage)
+
+    def add_time(self, category: str, seconds: float):
+        for stage in self.stack:
+            stage.seconds[category] = stage.seconds.get(category, 0.0) + seconds
+
+    def advance(self, rows: int, total: Optional[int] = None):
+        stage = self.stack[-1]
+        stage.advanced += rows
+        stage.total = total or stage.total
+        now = time.perf_counter()
+        if self.progress and now - self._last_progress >= PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.stream.write('\r' + self._progress_line(stage, now))
+            self.stream.flush()
+
+    @staticmethod
+    def _progress_line(stage: Stage, now: float) -> str:
+        elapsed = now - stage.started
+        speed = stage.advanced / elapsed if elapsed > 0 else 0.0
+        line = f"  ⏳ {stage.name} {stage.advanced:,}"
+        if stage.total:
+            done = min(stage.advanced / stage.total, 1.0)
+            eta = (stage.total - stage.advanced) / speed if speed > 0 else 0.0
+            line += f"/{stage.total:,} lignes ({done:.0%}), ETA {time.strftime('%H:%M:%S', time.gmtime(eta))}"
+        else:
+            line += " lignes"
+        return line + f", {speed:,.0f} lignes/s   "
+
+    def _finish(self, stage: Stage):
+        seconds = time.perf_counter() - stage.started
+        if stage.advanced and self.progress:
+            self.stream.write('\r' + self._progress_line(stage, time.perf_counter()) + '\n')
+        record = {
+            'stage': stage.name,
+            'parent': stage.parent,
+            'started_at': stage.started_at,
+            'seconds': round(seconds, 4),
+            'rows': stage.rows if stage.rows is not None else (stage.advanced or None)
+        }
+        record['rows_per_second'] = round(record['rows'] / seconds, 1) if record['rows'] and seconds > 0 else None
+        for category in CATEGORIES:
+            record[f'{category}_seconds'] = round(stage.seconds[category], 4)
+        record['numpy_seconds'] = round(max(seconds - sum(stage.seconds.values()), 0.0), 4)
+        rss_end, peak_end = rss_mb(), peak_rss_mb()
+        record.update({
+            'rss_start_mb': stage.rss_start,
+            'rss_end_mb': rss_end,
+            'peak_rss_mb': peak_end,
+            'peak_rss_delta_mb': round(peak_end - stage.peak_start, 1) if peak_end is not None else None
+        })
+        if stage.profiler is not None:
+            stage.profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok=True)
+            record['profile'] = os.path.join(self.profile_dir, f'{stage.name}.prof')
+            stage.profiler.dump_stats(record['profile'])
+            self._profiling = False
+        if stage.sampler is not None:
+            record['samples'] = stage.sampler.stop()
+            self._profiling = False
+
+        self.records.append(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self._file.flush()
+
+    def report_lines(self) -> List[str]:
+        """Tableau des étapes mesurées (étapes de premier niveau et imbriquées en retrait)."""
+        lines = [f"{'Étape':<52} {'Durée':>9} {'Lignes':>12} {'Lignes/s':>11} "
+                 f"{'Faker':>8} {'I/O':>8} {'Calcul':>8} {'Pic +Mo':>8}"]
+        for record in self.records:
+            name = ('  ' if record['parent'] else '') + record['stage']
+            lines.append(f"{name:<52} {record['seconds']:>8.2f}s {record['rows'] or 0:>12,} "
+                         f"{record['rows_per_second'] or 0:>11,.0f} {record['faker_seconds']:>7.2f}s "
+                         f"{record['io_seconds']:>7.2f}s {record['numpy_seconds']:>7.2f}s "
+                         f"{record['peak_rss_delta_mb'] or 0:>8,.0f}")
+        return lines
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Exécute un script de génération avec les mesures par étape")
+    parser.add_argument('script', help="Script Python à exécuter (ex: accounting_dataset_generator.py)")
+    parser.add_argument('--output', default='metrics.jsonl', help="Fichier des lignes JSON")
+    parser.add_argument('--profile', nargs='*', default=None,
+                        help="Étapes profilées (sans nom : toutes)")
+    parser.add_argument('--profiler', choices=['cprofile', 'sampling'], default='cprofile')
+    parser.add_argument('--profile-dir', default='profiles')
+    parser.add_argument('--no-progress', action='store_true')
+    args, script_args = parser.parse_known_args(argv)
+    profile = None if args.profile is None else (set(args.profile) or True)
+    sys.argv = [args.script] + script_args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    # Lancé en script, ce module est __main__ : les générateurs importent stage_metrics, dont l'enregistreur
+    # actif doit être le même
+    import stage_metrics
+    with stage_metrics.StageMetrics(args.output, profile, args.profiler, args.profile_dir,
+                                    progress=not args.no_progress):
+        runpy.run_path(args.script, run_name='__main__')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Moteur de calcul TVA / retenues à la source
+===========================================
+
+Calcule en une seule passe vectorisée les colonnes de montants d'une facture
+(TVA, TTC, RAS 5%, RAS TVA, montant à payer) à partir de tableaux de montants
+HT et de types de client.
+
+Les montants sont calculés en centimes entiers (int64) : TTC = HT + TVA et
+net à payer = TTC - RAS au centime près, sans écart d'arrondi flottant.
+
+Partagé par accounting_dataset_generator.py et invoices_generate.py : chaque
+régime fiscal est une entrée de table de règles, ajouter un régime ne touche
+pas au calcul.
+"""
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+# Règles par type de client :
+#   tva_rates   : taux de TVA possibles (tirés au hasard s'il y en a plusieurs)
+#   tva_weights : poids des taux (None = équiprobables)
+#   ras_5p      : retenue à la source sur le HT
+#   ras_tva     : part de la TVA retenue à la source
+TAX_RULES = {
+    'PUBLIC': {
+        'tva_rates': [0.20],
+        'tva_weights': None,
+        'ras_5p': 0.05,
+        'ras_tva': 0.75
+    },
+    'PRIVATE': {
+        'tva_rates': [0.055, 0.10, 0.20],  # 5,5%, 10% ou 20%
+        'tva_weights': None,
+        'ras_5p': 0.0,
+        'ras_tva': 0.0
+    }
+}
+
+AMOUNT_COLUMNS = ['TOTAL_HT', 'AMOUNT_TTC', 'MONTANT_TVA', 'RAS_5P', 'RAS_TVA', 'AMOUNT_TO_PAY']
+
+
+def compute_invoice_amounts(ht_amounts, client_types, rules: Dict = TAX_RULES,
+                            rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """Calcule toutes les colonnes de montants pour un lot de factures.
+
+    Args:
+        ht_amounts: Montants HT (tableau ou liste).
+        client_types: Types de client, même longueur que ht_amounts.
+        rules: Table des régimes fiscaux (voir TAX_RULES).
+        rng: Générateur NumPy pour le tirage des taux ; np.random par défaut.
+
+    Returns:
+        Dict colonne -> tableau NumPy, arrondis au centime (calcul exact en centimes entiers).
+    """
+    ht_amounts = np.asarray(ht_amounts, dtype=np.float64)
+    tva_rate, ras_5p_rate, ras_tva_rate = _rates(ht_amounts, client_types, rules, rng)
+
+    cents = _amounts_in_cents(np.round(ht_amounts * 100).astype(np.int64), tva_rate, ras_5p_rate, ras_tva_rate)
+    return {column: values / 100 for column, values in cents.items()}
+
+
+def _rates(amounts: np.ndarray, client_types, rules: Dict, rng) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Taux de TVA, de RAS 5% et de RAS TVA de chaque ligne selon le type de client."""
+    rng = rng if rng is not None else np.random
+    client_types = np.asarray(client_types)
+
+    tva_rate = np.zeros(len(amounts))
+    ras_5p_rate = np.zeros(len(amounts))
+    ras_tva_rate = np.zeros(len(amounts))
+    assigned = np.zeros(len(amounts), dtype=bool)
+
+    for client_type, rule in rules.items():
+        mask = client_types == client_type
+        rates = np.asarray(rule['tva_rates'], dtype=np.float64)
+        if len(rates) == 1:
+            tva_rate[mask] = rates[0]
+        else:
+            weights = rule.get('tva_weights')
+            if weights is not None:
+                weights = np.asarray(weights, dtype=np.float64)
+                weights = weights / weights.sum()
+            # Un tirage par ligne puis filtrage : le nombre de tirages ne dépend
+            # pas de la répartition des types (tirages indexés par ligne)
+            tva_rate[mask] = rng.choice(rates, len(amounts), p=weights)[mask]
+        ras_5p_rate[mask] = rule['ras_5p']
+        ras_tva_rate[mask] = rule['ras_tva']
+        assigned |= mask
+
+    if not assigned.all():
+        unknown = sorted(set(client_types[~assigned].tolist()))
+        raise ValueError(f"Type(s) de client sans règle fiscale: {unknown}")
+
+    return tva_rate, ras_5p_rate, ras_tva_rate
+
+
+def compute_invoice_amounts_cents(ht_cents, client_types, rules: Dict = TAX_RULES,
+                                  rng: Optional[np.random.Generator] = None) -> Dict[str, np.ndarray]:
+    """Comme compute_invoice_amounts, sur des montants HT en centimes (int64) : résultats en centimes."""
+    ht_cents = np.asarray(ht_cents, dtype=np.int64)
+    tva_rate, ras_5p_rate, ras_tva_rate = _rates(ht_cents, client_types, rules, rng)
+    return _amounts_in_cents(ht_cents, tva_rate, ras_5p_rate, ras_tva_rate)
+
+
+def _round_rate(cents: np.ndarray, rate: np.ndarray) -> np.ndarray:
+    """cents * rate arrondi au centime (demi-centime vers le haut), en arithmétique entière.
+
+    Les taux sont exprimés en dix-millièmes (0,055 -> 550) : aucun arrondi flottant.
+    """
+    basis_points = np.rint(np.asarray(rate) * 10_000).astype(np.int64)
+    return (cents * basis_points + 5_000) // 10_000
+
+
+def _amounts_in_cents(ht_cents, tva_rate, ras_5p_rate, ras_tva_rate) -> Dict[str, np.ndarray]:
+    # TTC = HT + TVA et net = TTC - RAS exactement, au centime près
+    montant_tva = _round_rate(ht_cents, tva_rate)
+    amount_ttc = ht_cents + montant_tva
+    ras_5p = _round_rate(ht_cents, ras_5p_rate)
+    ras_tva = _round_rate(montant_tva, ras_tva_rate)
+    return {
+        'TOTAL_HT': ht_cents,
+        'AMOUNT_TTC': amount_ttc,
+        'MONTANT_TVA': montant_tva,
+        'RAS_5P': ras_5p,
+        'RAS_TVA': ras_tva,
+        'AMOUNT_TO_PAY': amount_ttc - ras_5p - ras_tva
+    }
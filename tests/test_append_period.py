@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from accounting_dataset_generator import AccountingDatasetGenerator
+
+
+def _generator():
+    generator = AccountingDatasetGenerator()
+    generator.batch_mode = True
+    generator.nb_clients, generator.nb_invoices, generator.nb_expenses, generator.nb_bank_statements = 40, 200, 100, 250
+    generator.chunk_size = 100
+    return generator
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    output_dir = str(tmp_path / 'output')
+    _generator().export_streaming(output_dir)
+    return output_dir
+
+
+def test_append_period_accepts_iso_strings(dataset):
+    before = len(pd.read_csv(f'{dataset}/invoices.csv'))
+    row_counts = _generator().append_period(dataset, start='2027-01-01', end='2027-02-01', nb_new_clients=5)
+    invoices = pd.read_csv(f'{dataset}/invoices.csv')
+    assert len(invoices) == before + row_counts['invoices']
+    added = pd.to_datetime(invoices['INVOICE_DATE'].iloc[before:])
+    assert added.min() >= pd.Timestamp('2027-01-01') and added.max() < pd.Timestamp('2027-02-01')
+    assert invoices['INVOICE_ID'].is_unique
+
+
+def test_append_period_rejects_mismatched_header(dataset):
+    path = f'{dataset}/expenses.csv'
+    expenses = pd.read_csv(path, encoding='utf-8-sig')
+    expenses.drop(columns=expenses.columns[-1]).to_csv(path, index=False, encoding='utf-8-sig')
+    with pytest.raises(ValueError, match='expenses.csv'):
+        _generator().append_period(dataset, start='2027-01-01')
+    assert len(pd.read_csv(path)) == len(expenses)
+
+
+def test_appended_clients_keep_emails_unique(tmp_path):
+    def unique_email_generator():
+        generator = _generator()
+        generator.unique_emails = True
+        # Petit lot d'emails : sans exclusion, les nouveaux clients reprendraient ceux de l'export
+        generator.value_pools.cache_dir = None
+        generator.value_pools.sizes = {'email': 60}
+        return generator
+
+    output_dir = str(tmp_path / 'output')
+    unique_email_generator().export_streaming(output_dir)
+    unique_email_generator().append_period(output_dir, start='2027-01-01', nb_new_clients=50)
+    unique_email_generator().append_period(output_dir, start='2027-02-01', nb_new_clients=30)
+    clients = pd.read_csv(f'{output_dir}/clients.csv')
+    assert len(clients) == 120
+    assert clients['EMAIL'].notna().all() and clients['EMAIL'].is_unique
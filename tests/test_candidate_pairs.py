@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import invoices_generate
+from candidate_pairs import BlockingIndex, candidate_pairs, candidate_recall
+
+
+@pytest.fixture(scope='module')
+def invoice_candidates():
+    invoices_generate.fake.seed_instance(7)
+    invoices_generate.RNG = np.random.default_rng(7)
+    invoices = invoices_generate.generate_all_invoices(2000)
+    statements, links = invoices_generate.generate_bank_statements(invoices_generate.split_invoices(invoices),
+                                                                   with_links=True)
+    index = BlockingIndex(invoices, 'INVOICE')
+    return statements, links, candidate_pairs(statements, index, links, source='invoices')
+
+
+def test_recall_per_match_type_is_a_fraction(invoice_candidates):
+    statements, links, candidates = invoice_candidates
+    recalls = {}
+    for match_type, group in statements.groupby('MATCH_TYPE', observed=True):
+        recall = candidate_recall(candidates, links, group['STATEMENT_ID'])
+        assert 0.0 <= recall <= 1.0, match_type
+        recalls[match_type] = recall
+    assert recalls['MATCHED'] > 0.95
+    # Rappels par MATCH_TYPE pondérés par leurs liens de factures : rappel global
+    invoice_links = links[links['DOCUMENT_TYPE'] == 'INVOICE']
+    expected = invoice_links.drop_duplicates(['STATEMENT_ID', 'DOCUMENT_TYPE', 'DOCUMENT_ID'])
+    per_type = expected.merge(statements[['STATEMENT_ID', 'MATCH_TYPE']], on='STATEMENT_ID')
+    weights = per_type['MATCH_TYPE'].value_counts()
+    weighted = sum(recalls[name] * count for name, count in weights.items()) / weights.sum()
+    assert weighted == pytest.approx(candidate_recall(candidates, links))
+
+
+def test_recall_ignores_other_document_types(invoice_candidates):
+    statements, links, candidates = invoice_candidates
+    expenses = pd.DataFrame({'STATEMENT_ID': links['STATEMENT_ID'], 'DOCUMENT_TYPE': 'EXPENSE',
+                             'DOCUMENT_ID': links['DOCUMENT_ID'], 'ALLOCATED_AMOUNT': 0.0})
+    both = pd.concat([links, expenses], ignore_index=True)
+    assert candidate_recall(candidates, both) == pytest.approx(candidate_recall(candidates, links))
@@ -0,0 +1,44 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet as pq  # noqa: E402
+
+from columnar_export import ColumnarWriter, read_table  # noqa: E402
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_timestamps_keep_time_of_day(tmp_path, fmt):
+    frame = pd.DataFrame({
+        'STATEMENT_ID': [1, 2, 3],
+        'STATEMENT_DATE': pd.to_datetime(['2026-10-15', '2026-10-16', '2026-10-17']),
+        'CREATED_AT': pd.to_datetime(['2026-10-17 01:32:03.194285', '2026-10-17 08:00:00.000000', None]),
+        'MATCH_TYPE': ['MATCHED', 'PARTIAL', 'MATCHED']
+    })
+    with ColumnarWriter(str(tmp_path), fmt=fmt, partition_by={'bank_statements': 'MATCH_TYPE'}) as writer:
+        writer.write('bank_statements', frame)
+    schema = writer.schemas['bank_statements']
+    assert schema.field('STATEMENT_DATE').type == pa.date32()
+    assert pa.types.is_timestamp(schema.field('CREATED_AT').type)
+
+    result = read_table(str(tmp_path), 'bank_statements', fmt=fmt).sort_values('STATEMENT_ID', ignore_index=True)
+    assert result['STATEMENT_DATE'].tolist() == [datetime.date(2026, 10, 15), datetime.date(2026, 10, 16),
+                                                 datetime.date(2026, 10, 17)]
+    pd.testing.assert_series_equal(result['CREATED_AT'], frame['CREATED_AT'], check_dtype=False)
+
+
+def test_invoices_created_at_round_trip(tmp_path):
+    import numpy as np
+    import invoices_generate
+
+    invoices_generate.fake.seed_instance(9)
+    invoices_generate.RNG = np.random.default_rng(9)
+    splits = invoices_generate.split_invoices(invoices_generate.generate_all_invoices(200))
+    statements = invoices_generate.generate_bank_statements(splits)
+    invoices_generate.save_datasets_columnar(splits, statements, output_dir=str(tmp_path))
+    files = list((tmp_path / 'bank_statements').rglob('*.parquet'))
+    stored = pd.concat([pq.read_table(path).to_pandas() for path in files], ignore_index=True)
+    expected = statements.sort_values('STATEMENT_ID')['CREATED_AT'].to_numpy()
+    assert (stored.sort_values('STATEMENT_ID')['CREATED_AT'].to_numpy() == expected).all()
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import invoices_generate
+from accounting_dataset_generator import AccountingDatasetGenerator
+from compact_tables import TABLE_SCHEMAS, from_compact, to_compact
+
+
+@pytest.fixture(scope='module')
+def accounting_tables():
+    generator = AccountingDatasetGenerator()
+    generator.batch_mode = True
+    generator.nb_clients, generator.nb_invoices, generator.nb_expenses, generator.nb_bank_statements = 60, 400, 300, 500
+    generator.generate_invoice_statuses()
+    generator.generate_clients()
+    generator.generate_invoices()
+    generator.generate_expenses()
+    generator.generate_bank_statements()
+    return {table: getattr(generator, table) for table in TABLE_SCHEMAS}
+
+
+@pytest.mark.parametrize('table', list(TABLE_SCHEMAS))
+def test_round_trip(accounting_tables, table):
+    frame = accounting_tables[table]
+    compact = to_compact(frame, table)
+    pd.testing.assert_frame_equal(from_compact(compact), frame)
+    for column in TABLE_SCHEMAS[table]['money']:
+        if column in frame.columns:
+            assert pd.api.types.is_integer_dtype(compact[column])
+
+
+def test_nullable_ids_and_missing_amounts(accounting_tables):
+    statements = accounting_tables['bank_statements']
+    assert statements['RELATED_INVOICE_ID'].isna().any() and statements['CREDIT'].isna().any()
+    compact = to_compact(statements, 'bank_statements')
+    assert compact['RELATED_INVOICE_ID'].dtype == 'Int32'
+    assert compact['CREDIT'].dtype == 'Int64'
+    restored = from_compact(compact)
+    assert restored['RELATED_INVOICE_ID'].dtype == 'Int64'
+    assert restored['CREDIT'].isna().equals(statements['CREDIT'].isna())
+
+
+def test_float_ids_with_missing_values():
+    frame = pd.DataFrame({'STATEMENT_ID': [1, 2, 3], 'RELATED_INVOICE_ID': [10.0, np.nan, 12.0],
+                          'DEBIT': [np.nan, 19.99, 0.01], 'CREDIT': [1234567.89, np.nan, np.nan]})
+    restored = from_compact(to_compact(frame, 'bank_statements'))
+    assert restored['RELATED_INVOICE_ID'].tolist()[::2] == [10, 12] and pd.isna(restored['RELATED_INVOICE_ID'][1])
+    pd.testing.assert_frame_equal(restored[['DEBIT', 'CREDIT']], frame[['DEBIT', 'CREDIT']])
+
+
+def test_timestamps_left_untouched():
+    invoices_generate.fake.seed_instance(13)
+    invoices_generate.RNG = np.random.default_rng(13)
+    invoices = invoices_generate.generate_all_invoices(300)
+    statements = invoices_generate.generate_bank_statements(invoices_generate.split_invoices(invoices))
+    compact = to_compact(statements, 'bank_statements')
+    # CREATED_AT porte l'heure de génération : pas d'alignement au jour
+    assert compact['CREATED_AT'].dtype == statements['CREATED_AT'].dtype
+    assert compact['CREATED_AT'].equals(statements['CREATED_AT'])
+    assert compact['STATEMENT_DATE'].dtype == 'datetime64[s]'
+    for table, frame in [('invoices', invoices), ('bank_statements', statements)]:
+        restored = from_compact(to_compact(frame, table))
+        for column in TABLE_SCHEMAS[table]['money']:
+            pd.testing.assert_series_equal(restored[column], frame[column].astype(np.float64), check_names=False)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from accounting_dataset_generator import AccountingDatasetGenerator
+from counter_rng import CounterRNG, philox4x32
+
+# Vecteurs de test Philox4x32-10 de Random123 (kat_vectors) : compteur, clé, sortie
+PHILOX_VECTORS = [
+    ((0x00000000, 0x00000000, 0x00000000, 0x00000000), (0x00000000, 0x00000000),
+     (0x6627e8d5, 0xe169c58d, 0xbc57ac4c, 0x9b00dbd8)),
+    ((0xffffffff, 0xffffffff, 0xffffffff, 0xffffffff), (0xffffffff, 0xffffffff),
+     (0x408f276d, 0x41c83b0e, 0xa20bc7c6, 0x6d5451fd)),
+    ((0x243f6a88, 0x85a308d3, 0x13198a2e, 0x03707344), (0xa4093822, 0x299f31d0),
+     (0xd16cfe09, 0x94fdcceb, 0x5001e420, 0x24126ea1)),
+]
+
+
+@pytest.mark.parametrize('counter, key, expected', PHILOX_VECTORS)
+def test_philox_known_answers(counter, key, expected):
+    words = philox4x32(tuple(np.array([word], dtype=np.uint64) for word in counter), key)
+    assert tuple(int(word[0]) for word in words) == expected
+
+
+def test_philox_vectorized_matches_scalar():
+    counters = [vector[0] for vector in PHILOX_VECTORS]
+    words = philox4x32(tuple(np.array(column, dtype=np.uint64) for column in zip(*counters)), (0, 0))
+    for i, counter in enumerate(counters):
+        single = philox4x32(tuple(np.array([word], dtype=np.uint64) for word in counter), (0, 0))
+        assert [int(word[i]) for word in words] == [int(word[0]) for word in single]
+
+
+def test_counter_rng_random_pinned_to_philox():
+    rng = CounterRNG(0, 'invoices', [0])
+    rng.key = (0, 0)
+    # compteur (0, 0, 0, 0) : mots 0x6627e8d5, 0xe169c58d -> flottant sur 53 bits
+    expected = ((0x6627e8d5 >> 5) * (1 << 26) + (0xe169c58d >> 6)) / float(1 << 53)
+    assert rng.random(1)[0] == expected
+
+
+def test_counter_rng_rows_independent_of_batch():
+    row_ids = np.array([1, 7, 1 << 33, (1 << 40) + 5], dtype=np.uint64)
+    together = CounterRNG(42, 'expenses', row_ids)
+    values = [together.random(), together.normal(), together.integers(0, 1000)]
+    for i, row_id in enumerate(row_ids):
+        alone = CounterRNG(42, 'expenses', [row_id])
+        assert alone.random()[0] == values[0][i]
+        assert alone.normal()[0] == values[1][i]
+        assert alone.integers(0, 1000)[0] == values[2][i]
+
+
+def _generator():
+    generator = AccountingDatasetGenerator()
+    generator.batch_mode = True
+    generator.rng_mode = 'counter'
+    generator.seed = 11
+    generator.nb_clients, generator.nb_invoices, generator.nb_expenses = 50, 300, 200
+    generator.as_of = pd.Timestamp('2026-06-30').date()
+    generator.generate_invoice_statuses()
+    return generator
+
+
+@pytest.fixture(scope='module')
+def full_generation():
+    generator = _generator()
+    generator.generate_clients()
+    generator.generate_invoices()
+    generator.generate_expenses()
+    return generator
+
+
+@pytest.mark.parametrize('table, id_column, first_id, n', [
+    ('clients', 'CLIENT_ID', 10, 15),
+    ('invoices', 'INVOICE_ID', 101, 40),
+    ('expenses', 'EXPENSE_ID', 150, 50),
+])
+def test_generate_rows_matches_full_generation(full_generation, table, id_column, first_id, n):
+    full = getattr(full_generation, table)
+    expected = full[full[id_column].between(first_id, first_id + n - 1)].reset_index(drop=True)
+    rows = _generator().generate_rows(table, first_id, n).reset_index(drop=True)
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(rows, expected)
@@ -0,0 +1,84 @@
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from date_windows import date_bounds, day_offsets, parse_date, random_dates
+
+TODAY = date(2026, 10, 17)
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('today', TODAY),
+    ('now', TODAY),
+    ('-2y', date(2024, 10, 16)),     # 730,48 jours
+    ('-5y', date(2021, 10, 16)),
+    ('-12M', date(2025, 10, 16)),    # 365,04 jours
+    ('-18M', date(2025, 4, 17)),
+    ('-18m', date(2026, 10, 16)),    # minutes, comme Faker : la veille
+    ('-24m', date(2026, 10, 16)),
+    ('+30d', date(2026, 11, 16)),
+    ('-3w', date(2026, 9, 26)),
+    ('-1y-6M', date(2025, 4, 17)),
+    ('2027-01-01', date(2027, 1, 1)),
+    (date(2027, 1, 1), date(2027, 1, 1)),
+    (datetime(2027, 1, 1, 15, 30), date(2027, 1, 1)),
+    (pd.Timestamp('2027-01-01'), date(2027, 1, 1)),
+    (np.datetime64('2027-01-01'), date(2027, 1, 1)),
+    (timedelta(days=-10), date(2026, 10, 7)),
+    (-10, date(2026, 10, 7)),
+])
+def test_parse_date(value, expected):
+    assert parse_date(value, today=TODAY) == expected
+
+
+@pytest.mark.parametrize('value', ['', 'yesterday', '2y', '-2x', '2027-13-01', None])
+def test_parse_date_rejects(value):
+    with pytest.raises(ValueError):
+        parse_date(value, today=TODAY)
+
+
+def test_parse_date_defaults_to_today():
+    assert parse_date('today') == date.today()
+
+
+def test_date_bounds():
+    assert date_bounds('-2y', 'today', today=TODAY) == (np.datetime64('2024-10-16'), np.datetime64('2026-10-17'))
+
+
+def test_random_dates_within_window():
+    dates = random_dates(np.random.default_rng(0), '2026-01-01', '2026-02-01', 10_000)
+    assert dates.dtype == np.dtype('datetime64[D]')
+    assert dates.min() == np.datetime64('2026-01-01') and dates.max() == np.datetime64('2026-01-31')
+    # Fenêtre vide : le jour de début
+    assert (random_dates(np.random.default_rng(0), '2026-01-01', '2026-01-01', 5) == np.datetime64('2026-01-01')).all()
+
+
+def test_day_offsets_inclusive_bounds():
+    offsets = day_offsets(np.random.default_rng(0), -2, 2, 10_000).astype(np.int64)
+    assert set(offsets.tolist()) == {-2, -1, 0, 1, 2}
+    high = np.array([0, 3, 10])
+    per_row = day_offsets(np.random.default_rng(0), 0, high, 3).astype(np.int64)
+    assert ((per_row >= 0) & (per_row <= high)).all()
+
+
+def test_accounting_date_windows():
+    from accounting_dataset_generator import AccountingDatasetGenerator
+
+    generator = AccountingDatasetGenerator()
+    generator.batch_mode = True
+    generator.nb_clients, generator.nb_invoices, generator.nb_expenses = 50, 300, 200
+    windows = generator.date_windows
+    assert date_bounds(*windows['clients'], today=TODAY) == (np.datetime64('2021-10-16'), np.datetime64(TODAY))
+    assert date_bounds(*windows['expenses'], today=TODAY) == (np.datetime64('2026-10-16'), np.datetime64(TODAY))
+
+    generator.generate_invoice_statuses()
+    generator.generate_clients()
+    generator.generate_expenses()
+    start, end = date_bounds(*windows['clients'])
+    created = pd.to_datetime(generator.clients['CREATED_AT']).to_numpy().astype('datetime64[D]')
+    assert (created >= start).all() and (created < end).all()
+    start, end = date_bounds(*windows['expenses'])
+    expense_dates = pd.to_datetime(generator.expenses['EXPENSE_DATE']).to_numpy().astype('datetime64[D]')
+    assert (expense_dates >= start).all() and (expense_dates <= end).all()
@@ -0,0 +1,62 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from db_sink import DatabaseSink
+
+
+def _sink(path):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE CLIENTS (CLIENT_ID INTEGER PRIMARY KEY, CLIENT_NAME TEXT)")
+    connection.commit()
+    connection.close()
+    return DatabaseSink(lambda: sqlite3.connect(path, timeout=60, check_same_thread=False),
+                        tables={'clients': 'CLIENTS'})
+
+
+def _count(path):
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM CLIENTS").fetchone()[0]
+    finally:
+        connection.close()
+
+
+def test_failing_chunk_followed_by_good_chunk_raises(tmp_path):
+    path = str(tmp_path / 'sink.db')
+    sink = _sink(path)
+    # Clé primaire en double : le premier bloc est annulé
+    sink.write('clients', pd.DataFrame({'CLIENT_ID': [1, 1], 'CLIENT_NAME': ['a', 'b']}))
+    sink.write('clients', pd.DataFrame({'CLIENT_ID': [2], 'CLIENT_NAME': ['c']}))
+    with pytest.raises(sqlite3.IntegrityError):
+        sink.close()
+    assert _count(path) == 1
+
+
+def test_all_chunks_written(tmp_path):
+    path = str(tmp_path / 'sink.db')
+    with _sink(path) as sink:
+        for start in range(0, 50, 10):
+            sink.write('clients', pd.DataFrame({'CLIENT_ID': range(start, start + 10), 'CLIENT_NAME': 'x'}))
+    assert _count(path) == 50
+    assert sink.report()['clients']['rows'] == 50
+
+
+def test_waits_follow_foreign_keys(tmp_path):
+    path = str(tmp_path / 'sink.db')
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE INVOICE_STATUSES (STATUS_ID INTEGER PRIMARY KEY)")
+    connection.commit()
+    connection.close()
+    sink = _sink(path)
+    sink.tables = {'invoice_statuses': 'INVOICE_STATUSES', 'clients': 'CLIENTS', 'invoices': 'INVOICES'}
+    sink.write('invoice_statuses', pd.DataFrame({'STATUS_ID': [1, 1]}))
+    # Les clients n'ont pas de clé étrangère vers les statuts : pas d'attente, pas d'erreur
+    sink.write('clients', pd.DataFrame({'CLIENT_ID': [1], 'CLIENT_NAME': ['a']}))
+    # Les factures référencent les statuts : l'échec du bloc parent est relancé
+    with pytest.raises(sqlite3.IntegrityError):
+        sink.write('invoices', pd.DataFrame({'INVOICE_ID': [1], 'STATUS_ID': [1], 'CLIENT_ID': [1]}))
+    with pytest.raises(sqlite3.IntegrityError):
+        sink.close()
+    assert _count(path) == 1
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import expenses_generate
+import invoices_generate
+from document_links import LINK_COLUMNS, related_links
+
+
+def _allocated_cents(links: pd.DataFrame) -> pd.Series:
+    cents = np.round(links['ALLOCATED_AMOUNT'].to_numpy() * 100).astype(np.int64)
+    return pd.Series(cents).groupby(links['STATEMENT_ID'].to_numpy()).sum()
+
+
+def _amount_cents(statements: pd.DataFrame, ids: str, debit: str, credit: str) -> pd.Series:
+    amounts = statements[debit].fillna(statements[credit]).to_numpy(dtype=np.float64)
+    return pd.Series(np.round(amounts * 100).astype(np.int64), index=statements[ids].to_numpy())
+
+
+def _assert_allocations_match(links, statements, ids, debit, credit):
+    assert list(links.columns) == LINK_COLUMNS
+    allocated = _allocated_cents(links)
+    amounts = _amount_cents(statements, ids, debit, credit)
+    assert allocated.index.isin(amounts.index).all()
+    # Somme des montants affectés = montant du relevé, au centime
+    assert (allocated == amounts.reindex(allocated.index)).all()
+
+
+@pytest.fixture(scope='module')
+def bank_statements():
+    invoices_generate.fake.seed_instance(4)
+    invoices_generate.RNG = np.random.default_rng(4)
+    splits = invoices_generate.split_invoices(invoices_generate.generate_all_invoices(2000))
+    return invoices_generate.generate_bank_statements(splits, with_links=True)
+
+
+def test_invoice_links_allocate_statement_amounts(bank_statements):
+    statements, links = bank_statements
+    _assert_allocations_match(links, statements, 'STATEMENT_ID', 'DEBIT', 'CREDIT')
+    linked = set(links['STATEMENT_ID'])
+    documents = statements['RELATED_INVOICE_ID'].notna() | statements['RELATED_EXPENSE_ID'].notna()
+    assert linked == set(statements.loc[documents, 'STATEMENT_ID'])
+
+
+def test_grouped_invoice_links_list_each_invoice(bank_statements):
+    statements, links = bank_statements
+    grouped = statements[statements['MATCH_TYPE'] == 'GROUPED']
+    invoice_links = links[links['DOCUMENT_TYPE'] == 'INVOICE']
+    by_statement = invoice_links.groupby('STATEMENT_ID')['DOCUMENT_ID'].agg(list)
+    for statement_id, ids in zip(grouped['STATEMENT_ID'], grouped['GROUPED_INVOICE_IDS']):
+        assert by_statement[statement_id] == [int(value) for value in ids.split(',')]
+
+
+@pytest.mark.parametrize('scenario', ['matched', 'unmatched', 'partial', 'grouped'])
+def test_expense_links_allocate_transaction_amounts(scenario):
+    expenses_generate.RNG = np.random.default_rng(8)
+    generate = {
+        'matched': lambda: expenses_generate.generate_transaction_expenses_matched(500, 0.8, None, with_links=True),
+        'unmatched': lambda: expenses_generate.generate_unmatched_transactions_expenses(500, None, with_links=True),
+        'partial': lambda: expenses_generate.generate_partial_payment_expenses(500, output_dir=None,
+                                                                               with_links=True),
+        'grouped': lambda: expenses_generate.generate_grouped_payment_expenses(500, output_dir=None,
+                                                                               with_links=True)
+    }[scenario]
+    df_expenses, df_transactions, links = generate()
+    _assert_allocations_match(links, df_transactions, 'statement_id', 'debit', 'credit')
+    assert links['DOCUMENT_ID'].isin(df_expenses['expense_id']).all()
+
+
+def test_related_links_take_first_filled_amount():
+    statements = pd.DataFrame({
+        'STATEMENT_ID': [1, 2, 3, 4],
+        'CREDIT': [120.5, np.nan, np.nan, 80.0],
+        'DEBIT': [np.nan, 45.25, 10.0, np.nan],
+        'RELATED_INVOICE_ID': [11, np.nan, np.nan, 14],
+        'RELATED_EXPENSE_ID': [np.nan, 22, np.nan, np.nan]
+    })
+    links = related_links(statements, {'INVOICE': 'RELATED_INVOICE_ID', 'EXPENSE': 'RELATED_EXPENSE_ID'})
+    assert links['STATEMENT_ID'].tolist() == [1, 2, 4]
+    assert links['DOCUMENT_TYPE'].tolist() == ['INVOICE', 'EXPENSE', 'INVOICE']
+    assert links['DOCUMENT_ID'].tolist() == [11, 22, 14]
+    _assert_allocations_match(links, statements, 'STATEMENT_ID', 'CREDIT', 'DEBIT')
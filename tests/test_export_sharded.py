@@ -0,0 +1,44 @@
+import filecmp
+import os
+
+import pandas as pd
+
+from accounting_dataset_generator import AccountingDatasetGenerator
+
+TABLES = ['invoice_statuses', 'clients', 'invoices', 'expenses', 'bank_statements']
+
+
+def _generator(seed: int = 7) -> AccountingDatasetGenerator:
+    generator = AccountingDatasetGenerator()
+    generator.batch_mode = True
+    generator.seed = seed
+    generator.nb_clients, generator.nb_invoices, generator.nb_expenses, generator.nb_bank_statements = 40, 600, 300, 700
+    generator.chunk_size = 150
+    return generator
+
+
+def test_same_seed_gives_identical_files(tmp_path):
+    first, second = str(tmp_path / 'first'), str(tmp_path / 'second')
+    _generator().export_sharded(first, nb_shards=3, processes=2)
+    _generator().export_sharded(second, nb_shards=3, processes=2)
+    for table in TABLES:
+        assert filecmp.cmp(os.path.join(first, f'{table}.csv'), os.path.join(second, f'{table}.csv'),
+                           shallow=False), table
+
+
+def test_shard_id_ranges_do_not_overlap(tmp_path):
+    output_dir = str(tmp_path / 'shards')
+    row_counts = _generator().export_sharded(output_dir, nb_shards=3, processes=2, merge=False)
+    ranges = {table: [] for table in ['invoices', 'expenses', 'bank_statements']}
+    id_columns = {'invoices': 'INVOICE_ID', 'expenses': 'EXPENSE_ID', 'bank_statements': 'STATEMENT_ID'}
+    for shard in range(3):
+        for table, column in id_columns.items():
+            ids = pd.read_csv(os.path.join(output_dir, f'shard_{shard:03d}', f'{table}.csv'), usecols=[column])[column]
+            assert ids.is_unique
+            ranges[table].append((ids.min(), ids.max()))
+    for table, bounds in ranges.items():
+        # Plages croissantes et disjointes, dans l'ordre des shards
+        assert all(previous[1] < following[0] for previous, following in zip(bounds, bounds[1:])), table
+    merged = pd.concat([pd.read_csv(os.path.join(output_dir, f'shard_{shard:03d}', 'bank_statements.csv'),
+                                    usecols=['STATEMENT_ID']) for shard in range(3)])
+    assert len(merged) == row_counts['bank_statements'] and merged['STATEMENT_ID'].is_unique
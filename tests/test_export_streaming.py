@@ -0,0 +1,62 @@
+import filecmp
+import os
+
+import pandas as pd
+import pytest
+
+from accounting_dataset_generator import AccountingDatasetGenerator
+
+# Tables tirées ligne à ligne (rng_mode='counter') : identiques quel que soit le découpage en blocs
+ROW_TABLES = ['invoice_statuses', 'clients', 'invoices', 'expenses']
+
+
+def _generator(chunk_size: int) -> AccountingDatasetGenerator:
+    generator = AccountingDatasetGenerator()
+    generator.batch_mode = True
+    generator.rng_mode = 'counter'
+    generator.seed = 5
+    generator.nb_clients, generator.nb_invoices, generator.nb_expenses, generator.nb_bank_statements = 40, 600, 300, 700
+    generator.chunk_size = chunk_size
+    return generator
+
+
+@pytest.fixture(scope='module')
+def exports(tmp_path_factory):
+    root = tmp_path_factory.mktemp('exports')
+    streaming = str(root / 'streaming')
+    _generator(150).export_streaming(streaming)
+
+    full = str(root / 'full')
+    generator = _generator(150)
+    generator.generate_invoice_statuses()
+    generator.generate_clients()
+    generator.generate_invoices()
+    generator.generate_expenses()
+    generator.generate_bank_statements()
+    generator.export_to_csv(full)
+    return streaming, full
+
+
+@pytest.mark.parametrize('table', ROW_TABLES)
+def test_streaming_matches_in_memory_export(exports, table):
+    streaming, full = exports
+    assert filecmp.cmp(os.path.join(streaming, f'{table}.csv'), os.path.join(full, f'{table}.csv'), shallow=False)
+
+
+def test_streaming_statements_consistent(exports):
+    streaming, full = exports
+    statements = pd.read_csv(os.path.join(streaming, 'bank_statements.csv'))
+    assert list(statements.columns) == list(pd.read_csv(os.path.join(full, 'bank_statements.csv'), nrows=0).columns)
+    assert statements['STATEMENT_ID'].tolist() == list(range(1, len(statements) + 1))
+    invoices = pd.read_csv(os.path.join(streaming, 'invoices.csv'))
+    expenses = pd.read_csv(os.path.join(streaming, 'expenses.csv'))
+    assert statements['RELATED_INVOICE_ID'].dropna().isin(invoices['INVOICE_ID']).all()
+    assert statements['RELATED_EXPENSE_ID'].dropna().isin(expenses['EXPENSE_ID']).all()
+
+
+def test_streaming_independent_of_chunk_size(exports, tmp_path):
+    streaming, _ = exports
+    _generator(10_000).export_streaming(str(tmp_path))
+    for table in ROW_TABLES:
+        assert filecmp.cmp(os.path.join(streaming, f'{table}.csv'), os.path.join(str(tmp_path), f'{table}.csv'),
+                           shallow=False), table
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from installments import split_installments
+
+RULES = ['equal', 'share']
+
+
+def _cent_sums(installments, size):
+    sums = np.zeros(size, dtype=np.int64)
+    np.add.at(sums, installments.rows, installments.cents)
+    return sums
+
+
+@pytest.mark.parametrize('rule', RULES)
+@pytest.mark.parametrize('totals', [
+    [0.01] * 6,
+    [0.0, 0.01, 0.02, 0.03, 1.0, 0.05],
+    [9_999_999_999.99, 123_456_789_012.34, 1e12, 0.01, 42.42, 7.0],
+])
+def test_parts_sum_exactly_to_each_total(rule, totals):
+    counts = np.array([1, 2, 3, 4, 5, 1])
+    installments = split_installments(totals, counts, np.random.default_rng(0), rule=rule)
+    assert installments.cents.dtype == np.int64
+    assert (installments.cents >= 0).all()
+    expected = np.round(np.asarray(totals) * 100).astype(np.int64)
+    assert (_cent_sums(installments, len(totals)) == expected).all()
+
+
+@pytest.mark.parametrize('rule', RULES)
+@pytest.mark.parametrize('share_range', [(0.1, 0.6), (0.0, 1e-9), (0.999, 0.9999999)])
+def test_many_totals_sum_exactly(rule, share_range):
+    rng = np.random.default_rng(1)
+    totals = np.round(rng.uniform(0, 1e7, 200_000), 2)
+    counts = rng.integers(1, 8, len(totals))
+    installments = split_installments(totals, counts, rng, rule=rule, share_range=share_range)
+    assert (installments.cents >= 0).all()
+    assert (_cent_sums(installments, len(totals)) == np.round(totals * 100).astype(np.int64)).all()
+
+
+@pytest.mark.parametrize('rule', RULES)
+def test_single_installment_is_the_total(rule):
+    totals = [0.01, 1234.56, 1e10]
+    installments = split_installments(totals, [1, 1, 1], np.random.default_rng(2), rule=rule)
+    assert installments.rows.tolist() == [0, 1, 2]
+    assert installments.ranks.tolist() == [0, 0, 0]
+    assert installments.cents.tolist() == [1, 123456, 1_000_000_000_000]
+    assert installments.labels.tolist() == ['1/1', '1/1', '1/1']
+
+
+def test_equal_parts_differ_by_at_most_one_cent():
+    installments = split_installments([0.01, 100.0, 0.1], [3, 3, 4], np.random.default_rng(3), rule='equal')
+    assert installments.cents.tolist() == [0, 0, 1, 3333, 3333, 3334, 2, 3, 2, 3]
+
+
+@pytest.mark.parametrize('rule', RULES)
+def test_labels_ranks_and_offsets(rule):
+    counts = np.array([3, 1, 12, 2])
+    installments = split_installments([90.0, 5.0, 1200.0, 0.01], counts, np.random.default_rng(4), rule=rule,
+                                      first_days=10, step_days=30)
+    assert installments.rows.tolist() == [0] * 3 + [1] + [2] * 12 + [3] * 2
+    assert installments.ranks.tolist() == [0, 1, 2, 0] + list(range(12)) + [0, 1]
+    assert installments.numbers.tolist() == [rank + 1 for rank in installments.ranks.tolist()]
+    assert installments.counts.tolist() == np.repeat(counts, counts).tolist()
+    assert installments.labels.tolist() == (['1/3', '2/3', '3/3', '1/1']
+                                            + [f'{i}/12' for i in range(1, 13)] + ['1/2', '2/2'])
+    assert (installments.offsets == (10 + 30 * installments.ranks).astype('timedelta64[D]')).all()
+
+
+def test_offset_ranges_per_total():
+    counts = np.array([2, 3])
+    installments = split_installments([10.0, 20.0], counts, np.random.default_rng(5),
+                                      first_days=(np.array([0, 100]), np.array([5, 105])), step_days=(7, 7))
+    days = installments.offsets.astype(np.int64) - 7 * installments.ranks
+    assert ((days >= np.array([0, 0, 100, 100, 100])) & (days <= np.array([5, 5, 105, 105, 105]))).all()
+
+
+def test_unknown_rule():
+    with pytest.raises(ValueError):
+        split_installments([1.0], [2], np.random.default_rng(6), rule='random')
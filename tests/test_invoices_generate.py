@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import invoices_generate
+
+# En-tête de bank_statements_all.csv produit par la version ligne à ligne d'origine
+BASELINE_HEADER = [
+    'STATEMENT_ID', 'STATEMENT_DATE', 'OPERATION_LABEL', 'ADDITIONAL_LABEL', 'DEBIT', 'CREDIT', 'COMMENTS',
+    'RELATED_INVOICE_ID', 'CREATED_AT', 'SOURCE_FILENAME', 'FILE_BLOB', 'MIME_TYPE', 'RELATED_EXPENSE_ID',
+    'VALUE_DATE', 'MATCH_TYPE', 'GROUPED_INVOICE_IDS', 'ACTUAL_INVOICE_ID'
+]
+
+
+def _cents(values) -> np.ndarray:
+    return np.round(np.asarray(values, dtype=np.float64) * 100).astype(np.int64)
+
+
+@pytest.fixture(scope='module')
+def generated():
+    invoices_generate.fake.seed_instance(21)
+    invoices_generate.RNG = np.random.default_rng(21)
+    splits = invoices_generate.split_invoices(invoices_generate.generate_all_invoices(3000))
+    return splits, invoices_generate.generate_bank_statements(splits)
+
+
+def test_columns_match_baseline_header(generated, tmp_path):
+    splits, statements = generated
+    assert list(statements.columns) == BASELINE_HEADER
+    invoices_generate.save_datasets(splits, statements, output_dir=str(tmp_path))
+    for match_type in ['all', 'matched', 'partial', 'grouped', 'unmatched', 'expense']:
+        header = pd.read_csv(tmp_path / f'bank_statements_{match_type}.csv', nrows=0).columns.tolist()
+        assert header == BASELINE_HEADER
+    assert statements['STATEMENT_ID'].tolist() == list(range(1, len(statements) + 1))
+
+
+def test_match_type_counts(generated):
+    splits, statements = generated
+    counts = statements['MATCH_TYPE'].value_counts()
+    grouped = splits['grouped']
+    low, high = invoices_generate.GROUP_SIZE_RANGE
+    assert counts['MATCHED'] == len(splits['matched'])
+    assert counts['UNMATCHED'] == len(splits['unmatched'])
+    assert counts['EXPENSE'] == 200
+    assert 2 * len(splits['partial']) <= counts['PARTIAL'] <= 4 * len(splits['partial'])
+    assert -(-len(grouped) // high) <= counts['GROUPED'] <= -(-len(grouped) // low)
+    # Ordre des blocs : MATCHED, PARTIAL, GROUPED, UNMATCHED, EXPENSE
+    order = statements['MATCH_TYPE'].drop_duplicates().tolist()
+    assert order == ['MATCHED', 'PARTIAL', 'GROUPED', 'UNMATCHED', 'EXPENSE']
+
+
+def test_partial_credits_sum_to_amount_to_pay(generated):
+    splits, statements = generated
+    partial = statements[statements['MATCH_TYPE'] == 'PARTIAL']
+    paid = pd.Series(_cents(partial['CREDIT']), index=partial.index).groupby(
+        partial['RELATED_INVOICE_ID'].astype(np.int64).to_numpy()).agg(['sum', 'size'])
+    invoices = splits['partial'].set_index('INVOICE_ID')
+    assert sorted(paid.index) == sorted(invoices.index)
+    expected = _cents(invoices.loc[paid.index, 'AMOUNT_TO_PAY'])
+    assert (paid['sum'].to_numpy() == expected).all()
+    assert paid['size'].between(2, 4).all()
+    labels = partial['ADDITIONAL_LABEL'].str.extract(r'PAIEMENT PARTIEL (\d+)/(\d+)').astype(int)
+    assert (labels[1].to_numpy() == paid.loc[partial['RELATED_INVOICE_ID'].astype(np.int64), 'size'].to_numpy()).all()
+
+
+def test_grouped_related_invoice_is_first_of_list(generated):
+    splits, statements = generated
+    grouped = statements[statements['MATCH_TYPE'] == 'GROUPED']
+    id_lists = grouped['GROUPED_INVOICE_IDS'].str.split(',').map(lambda ids: [int(i) for i in ids])
+    assert (grouped['RELATED_INVOICE_ID'].astype(np.int64).to_numpy() == id_lists.map(lambda ids: ids[0])).all()
+    # Chaque facture groupée une fois, dans l'ordre, et total = somme des factures du groupe
+    invoices = splits['grouped'].set_index('INVOICE_ID')
+    assert sum(id_lists.tolist(), []) == invoices.index.tolist()
+    totals = id_lists.map(lambda ids: _cents(invoices.loc[ids, 'AMOUNT_TO_PAY']).sum())
+    assert (_cents(grouped['CREDIT']) == totals.to_numpy()).all()
+    sizes = grouped['ADDITIONAL_LABEL'].str.extract(r'PAIEMENT GROUPE (\d+) FACTURES')[0].astype(int)
+    assert (sizes.to_numpy() == id_lists.map(len).to_numpy()).all()
@@ -0,0 +1,26 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+import invoices_generate
+from partitioned_writer import write_csv
+
+
+def test_write_csv_creates_directory(tmp_path):
+    path = str(tmp_path / 'a' / 'b' / 'table.csv')
+    frame = pd.DataFrame({'ID': [1, 2, 3], 'NAME': ['x', 'y', 'z']})
+    assert write_csv(path, [frame.iloc[:2], frame.iloc[2:]]) == 3
+    pd.testing.assert_frame_equal(pd.read_csv(path), frame, check_dtype=False)
+
+
+def test_save_datasets_to_fresh_directory(tmp_path):
+    invoices_generate.fake.seed_instance(5)
+    invoices_generate.RNG = np.random.default_rng(5)
+    splits = invoices_generate.split_invoices(invoices_generate.generate_all_invoices(300))
+    statements, links = invoices_generate.generate_bank_statements(splits, with_links=True)
+    output_dir = str(tmp_path / 'csvx')
+    row_counts = invoices_generate.save_datasets(splits, statements, output_dir=output_dir, links=links)
+    assert row_counts[os.path.join(output_dir, 'all_invoices.csv')] == sum(len(part) for part in splits.values())
+    assert row_counts[os.path.join(output_dir, 'bank_statements_all.csv')] == len(statements)
+    assert len(pd.read_csv(os.path.join(output_dir, 'statement_links.csv'))) == len(links)
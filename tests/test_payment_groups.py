@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from payment_groups import group_payments
+
+DISTRIBUTIONS = ['uniform', 'hazard', 'poisson', 'geometric']
+
+
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS)
+@pytest.mark.parametrize('total, size_range', [(0, (2, 6)), (1, (2, 6)), (97, (2, 6)), (1000, (3, 3)), (501, (1, 8))])
+def test_sizes_stay_within_size_range(distribution, total, size_range):
+    groups = group_payments(total, np.random.default_rng(total), size_range, distribution)
+    min_size, max_size = size_range
+    assert ((groups.sizes >= min_size) & (groups.sizes <= max_size)).all()
+    assert groups.members == groups.sizes.sum() <= total
+    # Documents hors groupe : moins qu'un groupe minimal
+    assert total - groups.members < min_size
+
+
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS)
+def test_only_last_group_may_be_a_short_tail(distribution):
+    for seed in range(20):
+        groups = group_payments(103, np.random.default_rng(seed), (4, 7), distribution, min_tail=2)
+        assert ((groups.sizes[:-1] >= 4) & (groups.sizes[:-1] <= 7)).all()
+        assert 2 <= groups.sizes[-1] <= 7
+        assert 103 - groups.members < 2
+
+
+def test_totals_equal_member_sums():
+    rng = np.random.default_rng(3)
+    groups = group_payments(2_000, rng, (2, 6), 'poisson', mean=4)
+    amounts = np.round(rng.uniform(0.01, 25_000, 2_000), 2)
+    totals = groups.totals(amounts)
+    assert len(totals) == len(groups)
+    for group, (start, size) in enumerate(zip(groups.starts, groups.sizes)):
+        members = amounts[start:start + size]
+        assert np.array_equal(groups.group_ids[start:start + size], np.full(size, group))
+        # Au centime près, sans dérive de l'addition flottante
+        assert round(totals[group] * 100) == sum(round(amount * 100) for amount in members)
+
+
+def test_first_latest_and_join_follow_members():
+    rng = np.random.default_rng(11)
+    groups = group_payments(300, rng, (2, 6))
+    ids = np.arange(1, 301)
+    dates = np.datetime64('2025-01-01') + rng.integers(0, 365, 300).astype('timedelta64[D]')
+    first, latest = groups.first(ids), groups.latest(dates)
+    joined = groups.join(ids.astype(str), limit=3)
+    for group, (start, size) in enumerate(zip(groups.starts, groups.sizes)):
+        assert first[group] == ids[start]
+        assert latest[group] == dates[start:start + size].max()
+        expected = ", ".join(str(value) for value in ids[start:start + min(size, 3)])
+        if size > 3:
+            expected += f" +{size - 3} autres"
+        assert joined[group] == expected
@@ -0,0 +1,148 @@
+import random
+from decimal import ROUND_HALF_UP, Decimal
+
+import numpy as np
+import pytest
+
+import tax_engine
+from tax_engine import TAX_RULES, _round_rate, compute_invoice_amounts, compute_invoice_amounts_cents
+
+CENT = Decimal('0.01')
+
+
+def _half_up(value: Decimal) -> Decimal:
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _exact(ht: float, tva_rate: float, ras_5p: float, ras_tva: float) -> dict:
+    """Règles du moteur en décimal exact : TVA, RAS au demi-centime supérieur, TTC et net par somme."""
+    ht = Decimal(f'{ht:.2f}')
+    tva = _half_up(ht * Decimal(str(tva_rate)))
+    ras = _half_up(ht * Decimal(str(ras_5p)))
+    ras_on_tva = _half_up(tva * Decimal(str(ras_tva)))
+    return {'TOTAL_HT': ht, 'MONTANT_TVA': tva, 'AMOUNT_TTC': ht + tva, 'RAS_5P': ras, 'RAS_TVA': ras_on_tva,
+            'AMOUNT_TO_PAY': ht + tva - ras - ras_on_tva}
+
+
+def _baseline_accounting(ht: float, client_type: str, tva_rate: float) -> dict:
+    """calculate_invoice_amounts ligne à ligne d'origine (accounting_dataset_generator)."""
+    if client_type == 'PUBLIC':
+        montant_tva = ht * 0.2
+        amount_ttc = ht + montant_tva
+        ras_5p = ht * 0.05
+        ras_tva = montant_tva * 0.75
+        return {'TOTAL_HT': round(ht, 2), 'AMOUNT_TTC': round(amount_ttc, 2), 'MONTANT_TVA': round(montant_tva, 2),
+                'RAS_5P': round(ras_5p, 2), 'RAS_TVA': round(ras_tva, 2),
+                'AMOUNT_TO_PAY': round(amount_ttc - ras_5p - ras_tva, 2)}
+    montant_tva = ht * tva_rate
+    amount_ttc = ht + montant_tva
+    return {'TOTAL_HT': round(ht, 2), 'AMOUNT_TTC': round(amount_ttc, 2), 'MONTANT_TVA': round(montant_tva, 2),
+            'RAS_5P': 0.0, 'RAS_TVA': 0.0, 'AMOUNT_TO_PAY': round(amount_ttc, 2)}
+
+
+def _baseline_invoices(total_ht: float, client_type: str) -> dict:
+    """Calcul ligne à ligne d'origine de invoices_generate (TVA 20%, RAS pour PUBLIC)."""
+    montant_tva = round(total_ht * 0.2, 2)
+    amount_ttc = round(total_ht * 1.2, 2)
+    if client_type == 'PUBLIC':
+        ras_5p = round(total_ht * 0.05, 2)
+        ras_tva = round(total_ht * 0.2 * 0.75, 2)
+        amount_to_pay = round(amount_ttc - ras_5p - ras_tva, 2)
+    else:
+        ras_5p = ras_tva = 0
+        amount_to_pay = amount_ttc
+    return {'TOTAL_HT': total_ht, 'MONTANT_TVA': montant_tva, 'AMOUNT_TTC': amount_ttc, 'RAS_5P': ras_5p,
+            'RAS_TVA': ras_tva, 'AMOUNT_TO_PAY': amount_to_pay}
+
+
+def _ht_amounts(n: int = 5000, seed: int = 0) -> np.ndarray:
+    generator = random.Random(seed)
+    # PU x quantité comme les générateurs, plus des montants à demi-centime de TVA
+    amounts = [round(round(generator.uniform(50, 2000), 2) * generator.randint(1, 20), 2) for _ in range(n)]
+    return np.array(amounts + [0.0, 0.01, 0.10, 0.30, 1.10, 2.50, 12.34, 99_999_999.99])
+
+
+def _single_rate_rules(client_type: str, rate: float) -> dict:
+    return {client_type: {**TAX_RULES[client_type], 'tva_rates': [rate]}}
+
+
+@pytest.mark.parametrize('client_type, rate', [('PUBLIC', 0.20), ('PRIVATE', 0.055), ('PRIVATE', 0.10),
+                                               ('PRIVATE', 0.20)])
+def test_matches_exact_half_up_rules(client_type, rate):
+    ht = _ht_amounts()
+    rule = TAX_RULES[client_type]
+    amounts = compute_invoice_amounts(ht, [client_type] * len(ht), _single_rate_rules(client_type, rate))
+    for i, value in enumerate(ht.tolist()):
+        expected = _exact(value, rate, rule['ras_5p'], rule['ras_tva'])
+        for column, amount in expected.items():
+            assert Decimal(f'{amounts[column][i]:.2f}') == amount, (value, column)
+    cents = {column: np.round(values * 100).astype(np.int64) for column, values in amounts.items()}
+    assert (cents['AMOUNT_TTC'] == cents['TOTAL_HT'] + cents['MONTANT_TVA']).all()
+    assert (cents['AMOUNT_TO_PAY'] == cents['AMOUNT_TTC'] - cents['RAS_5P'] - cents['RAS_TVA']).all()
+
+
+def _compare_with_baseline(amounts: dict, baseline: dict, ht: np.ndarray, rate: float, ras_5p: float):
+    """Identique à l'arrondi près des demi-centimes (TVA, RAS 5%) ; RAS TVA à un centime près.
+
+    Le moteur arrondit au demi-centime supérieur (round flottant d'origine : au pair / au binaire le plus
+    proche) et calcule la RAS TVA sur la TVA arrondie (d'origine : sur la TVA non arrondie).
+    """
+    ht_cents = np.round(ht * 100).astype(np.int64)
+    ties = {'MONTANT_TVA': (ht_cents * round(rate * 10_000)) % 10_000 == 5_000,
+            'RAS_5P': (ht_cents * round(ras_5p * 10_000)) % 10_000 == 5_000}
+    gaps = {column: np.abs(amounts[column] - baseline[column]) for column in tax_engine.AMOUNT_COLUMNS}
+    for column, gap in gaps.items():
+        if column == 'AMOUNT_TO_PAY':
+            # Net : écarts des deux retenues, plus un centime d'arrondi de la soustraction d'origine
+            assert (gap <= gaps['RAS_5P'] + gaps['RAS_TVA'] + 0.01 + 1e-9).all()
+            continue
+        assert gap.max() <= 0.01 + 1e-9, column
+        if column in ('TOTAL_HT', 'AMOUNT_TTC'):
+            assert (gap[~ties['MONTANT_TVA']] < 1e-9).all(), column
+        elif column in ties:
+            assert (gap[~ties[column]] < 1e-9).all(), column
+
+
+@pytest.mark.parametrize('client_type, rate', [('PUBLIC', 0.20), ('PRIVATE', 0.055), ('PRIVATE', 0.10),
+                                               ('PRIVATE', 0.20)])
+def test_matches_accounting_baseline(client_type, rate):
+    ht = _ht_amounts()
+    amounts = compute_invoice_amounts(ht, [client_type] * len(ht), _single_rate_rules(client_type, rate))
+    rows = [_baseline_accounting(value, client_type, rate) for value in ht.tolist()]
+    baseline = {column: np.array([row[column] for row in rows]) for column in tax_engine.AMOUNT_COLUMNS}
+    _compare_with_baseline(amounts, baseline, ht, rate, TAX_RULES[client_type]['ras_5p'])
+
+
+@pytest.mark.parametrize('client_type', ['PUBLIC', 'PRIVE'])
+def test_matches_invoices_baseline(client_type):
+    import invoices_generate
+
+    ht = _ht_amounts()
+    amounts = compute_invoice_amounts(ht, [client_type] * len(ht), invoices_generate.TAX_RULES)
+    rows = [_baseline_invoices(value, client_type) for value in ht.tolist()]
+    baseline = {column: np.array([row[column] for row in rows], dtype=np.float64)
+                for column in tax_engine.AMOUNT_COLUMNS}
+    _compare_with_baseline(amounts, baseline, ht, 0.20, invoices_generate.TAX_RULES[client_type]['ras_5p'])
+
+
+def test_private_clients_are_ras_exempt():
+    ht = _ht_amounts(500)
+    amounts = compute_invoice_amounts(ht, ['PRIVATE'] * len(ht), rng=np.random.default_rng(0))
+    assert (amounts['RAS_5P'] == 0).all() and (amounts['RAS_TVA'] == 0).all()
+    assert (amounts['AMOUNT_TO_PAY'] == amounts['AMOUNT_TTC']).all()
+    rates = np.round(amounts['MONTANT_TVA'] / np.maximum(ht, 1e-9), 3)[ht > 100]
+    assert set(rates.tolist()) == {0.055, 0.1, 0.2}
+
+
+def test_round_rate_half_up():
+    # 10 x 5% = 0,5 centime -> 1 ; 30 x 5% = 1,5 -> 2 ; 10 x 5,5% = 0,55 -> 1 ; 9 x 5,5% = 0,495 -> 0
+    assert _round_rate(np.array([10, 30, 10, 9, 0]), np.array([0.05, 0.05, 0.055, 0.055, 0.2])).tolist() == \
+        [1, 2, 1, 0, 0]
+    # 2,50 x 20% x 75% : TVA 50 centimes, RAS TVA 37,5 -> 38
+    cents = compute_invoice_amounts_cents([250], ['PUBLIC'])
+    assert cents['MONTANT_TVA'].tolist() == [50] and cents['RAS_TVA'].tolist() == [38]
+
+
+def test_unknown_client_type():
+    with pytest.raises(ValueError):
+        compute_invoice_amounts([100.0], ['ASSOCIATION'])
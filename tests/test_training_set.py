@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import invoices_generate
+from training_set import LABELS, balance_classes, build_training_set, labeled_pairs
+
+
+@pytest.fixture(scope='module')
+def invoice_pairs():
+    invoices_generate.fake.seed_instance(6)
+    invoices_generate.RNG = np.random.default_rng(6)
+    invoices = invoices_generate.generate_all_invoices(2000)
+    statements, links = invoices_generate.generate_bank_statements(invoices_generate.split_invoices(invoices),
+                                                                   with_links=True)
+    pairs = labeled_pairs(statements, links, invoices, 'INVOICE_ID', 'INVOICE',
+                          related_column='RELATED_INVOICE_ID', source='invoices')
+    return statements, links, pairs
+
+
+def test_one_pair_per_invoice_link(invoice_pairs):
+    statements, links, pairs = invoice_pairs
+    invoice_links = links[links['DOCUMENT_TYPE'] == 'INVOICE']
+    match_types = statements.set_index('STATEMENT_ID')['MATCH_TYPE'].reindex(invoice_links['STATEMENT_ID'])
+    # Liens des dépenses ignorés ; un couple par facture liée, MATCH_TYPE du relevé
+    expected = match_types.value_counts()
+    counts = pairs['MATCH_TYPE'].value_counts()
+    for match_type in LABELS:
+        assert counts[match_type] == expected.get(match_type, 0)
+    assert (pairs['RELATED_INVOICE_ID'] == pairs['INVOICE_ID']).all()
+
+
+def test_labels_split_positive_and_negative_pairs(invoice_pairs):
+    statements, links, pairs = invoice_pairs
+    labels = pairs['libele'].to_numpy()
+    positive = pairs['MATCH_TYPE'].isin(['MATCHED', 'PARTIAL', 'GROUPED']).to_numpy()
+    assert set(np.unique(labels)) == {0, 1}
+    assert (labels[positive] == 1).all() and (labels[~positive] == 0).all()
+    assert labels.sum() == positive.sum()
+    assert (pairs['merge_source'] == 'invoices').all()
+
+
+def test_unknown_rows_and_match_types_are_dropped():
+    statements = pd.DataFrame({'STATEMENT_ID': [1, 2, 3], 'MATCH_TYPE': ['MATCHED', 'EXPENSE', 'UNMATCHED']})
+    documents = pd.DataFrame({'DOC_ID': [10, 20, 30]})
+    links = pd.DataFrame({'STATEMENT_ID': [1, 2, 3, 4, 3], 'DOCUMENT_TYPE': ['EXPENSE'] * 5,
+                          'DOCUMENT_ID': [10, 20, 99, 30, 30], 'ALLOCATED_AMOUNT': [1.0, 2.0, 3.0, 4.0, 5.0]})
+    pairs = labeled_pairs(statements, links, documents, 'DOC_ID', 'EXPENSE')
+    assert pairs['STATEMENT_ID'].tolist() == [1, 3]
+    assert pairs['DOC_ID'].tolist() == [10, 30]
+    assert pairs['libele'].tolist() == [1, 0]
+    assert pairs['ALLOCATED_AMOUNT'].tolist() == [1.0, 5.0]
+
+
+def test_balance_evens_positive_and_negative_labels(invoice_pairs):
+    pairs = invoice_pairs[2]
+    balance = {'MATCHED': 1, 'PARTIAL': 1, 'UNMATCHED': 2}
+    balanced = balance_classes(pairs, balance, size=400, rng=np.random.default_rng(0))
+    counts = balanced['MATCH_TYPE'].value_counts()
+    assert (counts['MATCHED'], counts['PARTIAL'], counts['GROUPED'], counts['UNMATCHED']) == (100, 100, 0, 200)
+    assert (balanced['libele'] == 1).sum() == (balanced['libele'] == 0).sum() == 200
+    # Tirage sans remise, ordre d'origine conservé
+    keys = ['STATEMENT_ID', 'INVOICE_ID']
+    positions = pd.MultiIndex.from_frame(pairs[keys]).get_indexer(pd.MultiIndex.from_frame(balanced[keys]))
+    assert (positions >= 0).all() and (np.diff(positions) > 0).all()
+
+    # Sans size : le plus grand tirage possible, limité par la classe la plus rare
+    largest = balance_classes(pairs, balance, rng=np.random.default_rng(0))
+    available = pairs['MATCH_TYPE'].value_counts()
+    size = int(min(available['MATCHED'] / 0.25, available['PARTIAL'] / 0.25, available['UNMATCHED'] / 0.5))
+    counts = largest['MATCH_TYPE'].value_counts()
+    # Arrondi de chaque part : au plus un couple d'écart par MATCH_TYPE
+    assert abs(len(largest) - size) <= len(balance)
+    assert abs((largest['libele'] == 1).sum() - (largest['libele'] == 0).sum()) <= 1
+    assert all(counts[name] <= available[name] for name in balance)
+
+
+def test_balance_with_size_and_shortage(invoice_pairs):
+    pairs = invoice_pairs[2]
+    balanced = balance_classes(pairs, {'MATCHED': 3, 'UNMATCHED': 1}, size=200, rng=np.random.default_rng(1))
+    counts = balanced['MATCH_TYPE'].value_counts()
+    assert (counts['MATCHED'], counts['UNMATCHED']) == (150, 50)
+    assert not balanced.duplicated(['STATEMENT_ID', 'INVOICE_ID']).any()
+    with pytest.raises(ValueError):
+        balance_classes(pairs, {'GROUPED': 1, 'UNMATCHED': 1}, size=len(pairs))
+
+
+def test_build_training_set_balances_sources(invoice_pairs, tmp_path):
+    pairs = invoice_pairs[2]
+    training = build_training_set([pairs.iloc[::2], pairs.iloc[1::2]], balance={'MATCHED': 1, 'UNMATCHED': 1},
+                                  rng=np.random.default_rng(2), output_dir=str(tmp_path))
+    assert (training['libele'] == 1).sum() == (training['libele'] == 0).sum() > 0
+    written = pd.read_parquet(tmp_path / 'training_set' / 'part-00000.parquet')
+    assert len(written) == len(training)
@@ -0,0 +1,123 @@
+"""
+Jeu d'entraînement étiqueté (relevé, document)
+==============================================
+
+Remplace merge_and_label_transactions du notebook, qui relisait les CSV
+tout juste écrits, les tronquait par head(), les fusionnait paire par paire
+et déduisait l'étiquette du nom des fichiers.
+
+- labeled_pairs part des tables en mémoire (ou relues par
+  columnar_export.read_table) : la table de liens (document_links) donne les
+  couples, les lignes des deux côtés sont retrouvées par jointure entière
+  (Index.get_indexer) puis prises en un seul take, sorties pré-dimensionnées ;
+- l'étiquette vient du MATCH_TYPE du relevé (LABELS) ;
+- build_training_set concatène les couples, équilibre les classes selon des
+  proportions configurables (balance_classes) et écrit un seul fichier typé.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from columnar_export import ColumnarWriter
+
+# Étiquette de chaque MATCH_TYPE : 1 si le relevé se rapproche de son document, 0 sinon
+LABELS = {'MATCHED': 1, 'PARTIAL': 1, 'GROUPED': 1, 'UNMATCHED': 0}
+MATCH_TYPES = list(LABELS)
+
+
+def labeled_pairs(statements: pd.DataFrame, links: pd.DataFrame, documents: pd.DataFrame, document_id: str,
+                  document_type: str, related_column: Optional[str] = None, match_type: Optional[str] = None,
+                  statement_id: str = 'STATEMENT_ID', source: str = '',
+                  suffixes: Tuple[str, str] = ('_bank', '_exp')) -> pd.DataFrame:
+    """Couples (relevé, document) de links, avec les colonnes des deux côtés et l'étiquette.
+
+    Args:
+        statements: Relevés (ou transactions) ; colonne MATCH_TYPE si match_type est None.
+        links: Table de liens (STATEMENT_ID, DOCUMENT_TYPE, DOCUMENT_ID, ALLOCATED_AMOUNT).
+        documents: Factures ou dépenses liées.
+        document_id: Colonne d'ID de documents.
+        document_type: Type des documents ('INVOICE', 'EXPENSE') : les autres liens sont ignorés.
+        related_column: Colonne de statements qui référence le document (ex: RELATED_INVOICE_ID) ;
+            remplacée par l'ID du document du couple, comme une vue dépliée des paiements groupés.
+        match_type: MATCH_TYPE commun à tous les relevés (scénarios de dépenses sans colonne MATCH_TYPE).
+        statement_id: Colonne d'ID de statements.
+        source: Valeur de la colonne merge_source.
+        suffixes: Suffixes des colonnes présentes des deux côtés (relevé, document).
+
+    Returns:
+        Une ligne par lien retrouvé dont le MATCH_TYPE est dans LABELS, colonnes du relevé
+        puis du document, ALLOCATED_AMOUNT, MATCH_TYPE, merge_source et libele.
+    """
+    links = links[(links['DOCUMENT_TYPE'] == document_type).to_numpy()]
+    statement_rows = pd.Index(statements[statement_id]).get_indexer(links['STATEMENT_ID'])
+    document_rows = pd.Index(documents[document_id]).get_indexer(links['DOCUMENT_ID'])
+    if match_type is None:
+        match_types = statements['MATCH_TYPE'].to_numpy(dtype=object)[np.maximum(statement_rows, 0)]
+    else:
+        match_types = np.full(len(links), match_type, dtype=object)
+    found = (statement_rows >= 0) & (document_rows >= 0) & np.isin(match_types, MATCH_TYPES)
+
+    shared = statements.columns.intersection(documents.columns)
+    bank = statements.take(statement_rows[found]).reset_index(drop=True)
+    if related_column is not None:
+        bank[related_column] = links['DOCUMENT_ID'].to_numpy()[found]
+    document = documents.take(document_rows[found]).reset_index(drop=True)
+    pairs = pd.concat([bank.rename(columns={column: column + suffixes[0] for column in shared}),
+                       document.rename(columns={column: column + suffixes[1] for column in shared})], axis=1)
+    pairs['ALLOCATED_AMOUNT'] = links['ALLOCATED_AMOUNT'].to_numpy()[found]
+    pairs['MATCH_TYPE'] = pd.Categorical(match_types[found], categories=MATCH_TYPES)
+    pairs['merge_source'] = source
+    pairs['libele'] = np.array([LABELS[name] for name in MATCH_TYPES], dtype=np.int8)[pairs['MATCH_TYPE'].cat.codes]
+    return pairs
+
+
+def balance_classes(pairs: pd.DataFrame, balance: Dict[str, float], size: Optional[int] = None,
+                    rng: Optional[np.random.Generator] = None) -> pd.DataFrame:
+    """Tire des couples selon les proportions balance par MATCH_TYPE (sans remise, ordre conservé).
+
+    Sans size, la taille est la plus grande que chaque MATCH_TYPE peut fournir ;
+    un MATCH_TYPE absent de balance est écarté.
+    """
+    rng = rng or np.random.default_rng()
+    shares = {name: share / sum(balance.values()) for name, share in balance.items() if share > 0}
+    codes = pairs['MATCH_TYPE'].to_numpy(dtype=object)
+    positions = {name: np.flatnonzero(codes == name) for name in shares}
+    if size is None:
+        size = int(min(len(positions[name]) / share for name, share in shares.items())) if shares else 0
+    selected = []
+    for name, share in shares.items():
+        wanted = int(round(size * share))
+        if wanted > len(positions[name]):
+            raise ValueError(f"{name} : {wanted} couples demandés, {len(positions[name])} disponibles")
+        selected.append(rng.choice(positions[name], wanted, replace=False))
+    return pairs.take(np.sort(np.concatenate(selected)) if selected else []).reset_index(drop=True)
+
+
+def build_training_set(pairs: List[pd.DataFrame], balance: Optional[Dict[str, float]] = None,
+                       size: Optional[int] = None, rng: Optional[np.random.Generator] = None,
+                       output_dir: Optional[str] = None, name: str = 'training_set',
+                       fmt: str = 'parquet') -> pd.DataFrame:
+    """Jeu d'entraînement : couples concaténés, classes équilibrées, écrit en un fichier typé.
+
+    Args:
+        pairs: Résultats de labeled_pairs (une source chacun).
+        balance: Proportion de chaque MATCH_TYPE, ex: {'MATCHED': 1, 'UNMATCHED': 1} ;
+            None garde tous les couples.
+        size: Nombre total de couples (voir balance_classes).
+        rng: Générateur des tirages.
+        output_dir: Dossier de sortie (output_dir/name/part-00000.<fmt>), None pour ne rien écrire.
+        name: Nom de la table écrite.
+        fmt: 'parquet' ou 'arrow' (voir columnar_export.ColumnarWriter).
+    """
+    training = pd.concat(pairs, ignore_index=True) if len(pairs) > 1 else pairs[0]
+    if balance is not None:
+        training = balance_classes(training, balance, size, rng)
+    if output_dir is not None:
+        with ColumnarWriter(output_dir, fmt=fmt) as writer:
+            writer.write(name, training)
+    counts = training['MATCH_TYPE'].value_counts(sort=False)
+    print(f"✅ Jeu d'entraînement '{name}' : {len(training)} couples "
+          f"({', '.join(f'{match_type}: {count}' for match_type, count in counts.items() if count)})")
+    return training
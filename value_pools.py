@@ -0,0 +1,100 @@
+"""
+Lots de valeurs Faker pré-générés
+=================================
+
+Les appels Faker (company, city, name, email, address...) dominent le coût
+de génération ligne à ligne. FakerValuePool génère une fois, avec une graine
+fixe, un lot de valeurs par méthode Faker, le sauvegarde sur disque et sert
+ensuite les lignes par tirage d'indices NumPy.
+
+La taille du lot règle le compromis unicité / vitesse : un petit lot est
+généré très vite mais répète les valeurs, un lot de taille N (unique=True)
+garantit N valeurs distinctes (ex: emails uniques).
+"""
+
+import json
+import os
+import zlib
+from typing import Collection, Dict, Optional
+
+import numpy as np
+from faker import Faker
+
+from stage_metrics import timed
+
+
+class FakerValuePool:
+    """Lots de valeurs Faker servis par tirage d'indices NumPy."""
+
+    def __init__(self, locale: str = 'fr_FR', seed: int = 42, pool_size: int = 5000,
+                 cache_dir: Optional[str] = '.faker_pools', sizes: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            locale: Locale Faker des valeurs générées.
+            seed: Graine de base ; chaque lot dérive sa propre graine de celle-ci.
+            pool_size: Taille par défaut d'un lot.
+            cache_dir: Répertoire de sauvegarde des lots (None = pas de cache disque).
+            sizes: Tailles spécifiques par méthode Faker, ex: {'email': 100000}.
+        """
+        self.locale = locale
+        self.seed = seed
+        self.pool_size = pool_size
+        self.cache_dir = cache_dir
+        self.sizes = dict(sizes or {})
+        self._pools = {}
+
+    def _key(self, method: str, size: int, unique: bool, kwargs: Dict) -> str:
+        params = '_'.join(f"{k}={v}" for k, v in sorted(kwargs.items()))
+        return f"{self.locale}|{method}|{params}|{size}|{int(unique)}|{self.seed}"
+
+    def _cache_path(self, key: str) -> str:
+        method = key.split('|')[1]
+        return os.path.join(self.cache_dir, f"{method}_{zlib.crc32(key.encode('utf-8')):08x}.json")
+
+    def pool(self, method: str, size: Optional[int] = None, unique: bool = False, **kwargs) -> np.ndarray:
+        """Retourne le lot de valeurs d'une méthode Faker (généré ou relu depuis le disque)."""
+        size = size or self.sizes.get(method, self.pool_size)
+        key = self._key(method, size, unique, kwargs)
+        if key in self._pools:
+            return self._pools[key]
+
+        path = self._cache_path(key) if self.cache_dir else None
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                values = json.load(f)
+        else:
+            fake = Faker(self.locale)
+            fake.seed_instance(self.seed + zlib.crc32(key.encode('utf-8')))
+            provider = fake.unique if unique else fake
+            generate = getattr(provider, method)
+            with timed('faker'):
+                values = [generate(**kwargs) for _ in range(size)]
+            if path:
+                # Écriture atomique : plusieurs processus peuvent générer le même lot
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(values, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+
+        values = np.array(values, dtype=object)
+        self._pools[key] = values
+        return values
+
+    def draw(self, method: str, n: int, rng: np.random.Generator, unique: bool = False,
+             exclude: Optional[Collection] = None, **kwargs) -> np.ndarray:
+        """Tire n valeurs d'une méthode Faker.
+
+        Avec unique=True le lot est dimensionné à n (au moins) et servi sans remise ;
+        les valeurs de exclude (déjà utilisées, ex: emails d'un export existant) sont
+        écartées du lot, agrandi d'autant.
+        """
+        if unique:
+            exclude = list(exclude) if exclude is not None else []
+            size = max(n + len(exclude), self.sizes.get(method, self.pool_size))
+            values = self.pool(method, size=size, unique=True, **kwargs)
+            if exclude:
+                values = values[~np.isin(values, np.array(exclude, dtype=object))]
+            return values[rng.permutation(len(values))[:n]]
+        values = self.pool(method, **kwargs)
+        return values[rng.integers(0, len(values), n)]